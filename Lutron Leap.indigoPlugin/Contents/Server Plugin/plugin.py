@@ -4,21 +4,28 @@
 import indigo   # noqa
 import logging
 import json
+import bisect
+import collections
+import functools
 import os
+import queue
+import random
+import sys
 import time
 import colorsys
 from datetime import timedelta
 import threading
 import asyncio
-import queue
-from typing import Any, Awaitable, Optional
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Hashable, Iterable, NamedTuple, Optional
 
 from pylutron_caseta import _LEAP_DEVICE_TYPES as LEAP_DEVICE_TYPES     # noqa
 from pylutron_caseta import RA3_OCCUPANCY_SENSOR_DEVICE_TYPES, BridgeDisconnectedError, BridgeResponseError
 from pylutron_caseta.color_value import FullColorValue, WarmCoolColorValue
 from pylutron_caseta.pairing import async_pair
 from pylutron_caseta.smartbridge import Smartbridge
-from zeroconf import IPVersion, ServiceBrowser, ServiceStateChange, Zeroconf
+from zeroconf import IPVersion, ServiceStateChange, Zeroconf
+from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
 
 # LEAP device types (within LEAP_DEVICE_TYPES['light']) that support color/white-tuning
 COLOR_TUNABLE_LEAP_TYPES = ("SpectrumTune", "ColorTune")
@@ -33,9 +40,35 @@ DEV_GROUP  = "occupancy_group"
 DEV_COLOR  = "leapColor"
 DEV_BATTERY = "leapBattery"
 
-BATTERY_POLL_INTERVAL = 6 * 60 * 60  # seconds between battery status polls
-RECONNECT_REFRESH_DELAY = 10  # seconds to wait after a bridge reconnect before refreshing cached devices/buttons/scenes/areas
-BRIDGE_CONNECT_RETRY_DELAY = 30  # seconds to wait before retrying a failed initial bridge connection
+BATTERY_POLL_GOOD_INTERVAL = 24 * 60 * 60  # seconds between battery status polls while the battery reports Good
+BATTERY_POLL_INTERVAL = 60 * 60  # seconds between battery status polls for Low, Unknown or not yet read batteries
+BATTERY_POLL_RETRY_DELAY = 5 * 60  # seconds before retrying a failed battery poll, doubled for each failure in a row
+BATTERY_POLL_SPREAD = 60 * 60  # seconds a sweep of due battery polls is spread over, so a restart doesn't send them all at once
+BATTERY_POLL_CHECK_INTERVAL = 60  # seconds between checks for battery devices that are due for a poll
+BATTERY_POLL_CONCURRENCY = 8  # battery polls in flight across all bridges
+CATALOG_SNAPSHOT_VERSION = 1  # bump when the layout of the saved catalog snapshot changes
+RECONNECT_REFRESH_DELAY = 10  # seconds to wait after a bridge reconnect before refreshing the catalog, if its login can't be awaited
+RECONNECT_LOGIN_TIMEOUT = 60  # seconds to wait for the bridge to log in again after a reconnect before giving up on the refresh
+BRIDGE_CONNECT_TIMEOUT = 90  # seconds a bridge connect, including its login and catalog load, is given before it's retried
+BRIDGE_RETRY_MIN_DELAY = 0.5  # seconds before the first retry of a failed bridge connect, doubled for each failure in a row
+BRIDGE_RETRY_MAX_DELAY = 60  # most seconds between bridge connect retries
+BRIDGE_SESSION_TIMEOUT = 10  # seconds a reconnect attempt waits for a new session to open
+HEALTH_PROBE_INTERVAL = 15  # seconds between LEAP pings to each connected bridge
+HEALTH_PROBE_TIMEOUT = 3.0  # seconds a ping has to be answered in
+HEALTH_MISSED_PROBES = 3  # pings in a row without an answer before the link is declared dead and reconnected
+HEALTH_RTT_WEIGHT = 0.2  # weight of the newest ping in the running round trip time
+LUTRON_SERVICE_TYPE = "_lutron._tcp.local."
+SERVICE_INFO_TIMEOUT = 3000  # milliseconds to wait for a discovered bridge's service info
+BATCH_ACTION_TIMEOUT = 30  # seconds a batch action waits for all of its commands before reporting
+ACTION_TIMEOUT = 5.0  # default seconds an action waits for the bridge to answer, when actions wait for the bridge
+OPTIMISTIC_CONFIRM_TIMEOUT = 10  # seconds an optimistically written state waits for the bridge to confirm it before it's reverted
+METRICS_PUBLISH_INTERVAL = 60  # seconds between updates of the bridge timing and command queue states
+PRIORITY_INTERACTIVE, PRIORITY_BATCH, PRIORITY_BACKGROUND = range(3)  # bridge command priorities, highest first
+SCHEDULER_IN_FLIGHT = 8  # bridge commands in flight per bridge
+SCHEDULER_BACKGROUND_IN_FLIGHT = 2  # of those, how many can be background commands (battery polls)
+SCHEDULER_QUEUE_LIMITS = (100, 250, 50)  # commands waiting per bridge, by priority, before new ones are rejected or old ones shed
+EVENT_THROTTLE_TOP_DEVICES = 10  # devices listed by Write Plugin Statistics to Log with the most throttled events
+CATALOG_VOLATILE_KEYS = frozenset(("current_state", "fan_speed", "tilt", "color", "warm_dim", "status"))  # live values, not catalog structure
 
 _FAN_SPEED_MAP: dict[int, str] = {
     0: "Off",
@@ -44,9 +77,506 @@ _FAN_SPEED_MAP: dict[int, str] = {
     3: "High",
 }
 
+# Indigo changes these states itself when one of their partners is written (turning a dimmer off zeroes its brightness,
+# setting a speed index turns a fan on, etc.), so a write to one makes the last-written value of the others unreliable.
+_COUPLED_STATES: dict[str, tuple[str, ...]] = {
+    "onOffState": ("brightnessLevel", "speedIndex", "speedLevel"),
+    "brightnessLevel": ("onOffState",),
+    "speedIndex": ("onOffState", "speedLevel"),
+    "speedLevel": ("onOffState", "speedIndex"),
+}
+
+# command kind -> the Indigo states an optimistic update of that kind writes
+_OPTIMISTIC_STATES: dict[str, tuple[str, ...]] = {
+    "level": ("onOffState", "brightnessLevel"),
+    "fan": ("speedIndex",),
+}
+
+# device type -> seconds a device's events are throttled to during fades and shade travel, unless set in the device's config
+EVENT_THROTTLE_DEFAULTS: dict[str, float] = {
+    DEV_DIMMER: 0.5,
+    DEV_COLOR: 0.5,
+    DEV_SHADE: 1.0,
+}
+
+RULE_DEVICE_ACTIONS = ("toggle", "on", "off", "level")  # rule actions whose target is an Indigo device
+RULE_DIRECT_TYPES = (DEV_SWITCH, DEV_DIMMER, DEV_COLOR, DEV_SHADE)  # device types a rule sends its command to the bridge for directly
+RULE_OCCUPANCY_CONDITIONS = {"Occupied": "occupied", "Unoccupied": "vacant"}  # group status -> rule condition, other statuses run no rules
+
+# the LEAP device fields every device type shows as states of the same name
+LEAP_STATE_KEYS: tuple[str, ...] = ("area", "button_groups", "current_state", "device_id", "device_name", "fan_speed", "model", "name",
+                                    "occupancy_sensors", "serial", "tilt", "type", "zone")
+
+# speed name reported by the bridge -> Indigo speedIndex
+_FAN_SPEED_INDEX: dict[str, int] = {
+    "Off": 0,
+    "Low": 1,
+    "Medium": 2,
+    "MediumHigh": 2,
+    "High": 3,
+}
+
 def clamp(n: float, min_value: float, max_value: float) -> float:
     return max(min(max_value, n), min_value)
 
+
+def deep_sizeof(obj: Any, seen: set[int]) -> int:
+    """Bytes held by obj and the containers and objects it refers to, skipping anything already in seen, so objects
+    shared between structures are only counted once across calls."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+
+class CommandLane:
+    """Latest-wins command queue for one LEAP device. At most one command of each kind ("level", "fan", "tilt", ...)
+    waits to be sent, and a newer command of the same kind replaces it. Commands are sent one at a time, in the order
+    their kinds were queued, so they can't reach the bridge out of order.
+
+    intended holds the value each kind was last asked to go to, so relative adjustments can build on it while the
+    bridge hasn't reported back yet. It's cleared by the plugin once the device reports in with nothing in flight.
+
+    A command can carry a future, resolved with True/False once it's sent, or None if a newer command replaced it."""
+
+    __slots__ = ("name", "send", "pending", "intended", "task", "superseded")
+
+    def __init__(self, name: str, send: Callable[[int, Callable[[], Awaitable[Any]], str, str], Awaitable[tuple[bool, Any]]]) -> None:
+        self.name: str = name
+        self.send = send    # (priority, factory, device name, action name) -> (success, result)
+        self.pending: dict[str, tuple[Callable[[], Awaitable[Any]], str, Optional[asyncio.Future], int]] = {}
+        self.intended: dict[str, Any] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.superseded: int = 0
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.pending) or (self.task is not None and not self.task.done())
+
+    def submit(self, kind: str, factory: Callable[[], Awaitable[Any]], action_name: str, done: Optional[asyncio.Future] = None,
+               priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Queue a command. Must be called on the event loop."""
+        if replaced := self.pending.pop(kind, None):
+            self.superseded += 1
+            if replaced[2] and not replaced[2].done():
+                replaced[2].set_result(None)
+        self.pending[kind] = (factory, action_name, done, priority)
+        if not self.task or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        while self.pending:
+            kind = next(iter(self.pending))
+            factory, action_name, done, priority = self.pending.pop(kind)
+            success, _ = await self.send(priority, factory, self.name, action_name)
+            if done and not done.done():
+                done.set_result(success)
+
+
+class BridgeEventRoute:
+    """The callback the Smartbridge calls for one subscribed device, button or occupancy group. Its API takes a callable
+    per subscription, so on a large system there are thousands of these; a three slot object routing to one of the
+    plugin's handlers is a fraction of the size of a closure."""
+
+    __slots__ = ("handler", "bridge_id", "item_id")
+
+    def __init__(self, handler: Callable[..., None], bridge_id: int, item_id: str) -> None:
+        self.handler = handler
+        self.bridge_id = bridge_id
+        self.item_id = sys.intern(item_id)
+
+    def __call__(self, *args: Any) -> None:
+        self.handler(self.bridge_id, self.item_id, *args)
+
+
+class Rule(NamedTuple):
+    """A local rule, run on the event loop when its condition happens at its source. Saved in pluginPrefs["rules"] as
+    a list of these fields, in this order."""
+    name: str
+    source: str         # button or occupancy group address, "bridge id:LEAP id"
+    condition: str      # press, release, taps, occupied or vacant
+    taps: int           # presses, for a taps condition
+    action: str         # toggle, on, off, level, scene or tap
+    target: str         # Indigo device id, or a scene or button address for scene and tap
+    level: int          # for a level action
+
+    @property
+    def rule_id(self) -> str:
+        return f"{self.source}-{self.condition}{self.taps if self.condition == 'taps' else ''}-{self.target}"
+
+
+class DeviceEventHandler:
+    """What device_event needs for one started LEAP device, worked out when the device starts so an event is a dict
+    lookup and a call, instead of building an address and walking the device types."""
+
+    __slots__ = ("dev_id", "translate", "throttle_window", "throttle_leading")
+
+    def __init__(self, dev_id: int, translate: Callable[[indigo.Device, dict[str, Any], list[dict[str, Any]]], None],
+                 throttle_window: float, throttle_leading: bool) -> None:
+        self.dev_id = dev_id
+        self.translate = translate      # (device, leap data, update list), appends the states for the device's type
+        self.throttle_window = throttle_window
+        self.throttle_leading = throttle_leading
+
+
+class CatalogIndex:
+    """Display labels for one bridge's catalog: the full path of every area, and (address, label) lists of the buttons
+    and devices, sorted for the config dialogs. Built once per catalog change instead of on every dialog refresh. Ids,
+    addresses and area paths are interned, so the copies in the labels, lists and the plugin's lookups share one string."""
+
+    __slots__ = ("signature", "area_paths", "device_labels", "button_labels", "device_list", "button_list")
+
+    def __init__(self, bridge_id: int, devices: dict[str, dict[str, Any]], buttons: dict[str, dict[str, Any]], areas: dict[str, dict[str, Any]]) -> None:
+        self.signature: tuple = self.catalog_signature(devices, buttons, areas)
+
+        self.area_paths: dict[str, Optional[str]] = {}
+        for area_id in areas:
+            self.area_path(area_id, areas)
+
+        self.device_labels: dict[str, str] = {sys.intern(device_id): self.device_label(device, devices) for device_id, device in devices.items()}
+        self.button_labels: dict[str, str] = {sys.intern(button_id): self.button_label(button, devices) for button_id, button in buttons.items()}
+        self.device_list: list[tuple[str, str]] = sorted(((sys.intern(f"{bridge_id}:{k}"), v) for k, v in self.device_labels.items()),
+                                                         key=lambda item: item[1])
+        self.button_list: list[tuple[str, str]] = sorted(((sys.intern(f"{bridge_id}:{k}"), v) for k, v in self.button_labels.items()),
+                                                         key=lambda item: item[1])
+
+    @staticmethod
+    def catalog_signature(devices: dict[str, dict[str, Any]], buttons: dict[str, dict[str, Any]], areas: dict[str, dict[str, Any]]) -> tuple:
+        """Just the fields the labels are built from, so level changes don't force a rebuild."""
+        return (
+            tuple((k, v.get('area'), v.get('parent_device'), v.get('control_station_name'), v.get('device_name')) for k, v in devices.items()),
+            tuple((k, v.get('parent_device'), v.get('button_number'), v.get('device_name')) for k, v in buttons.items()),
+            tuple((k, v.get('parent_id'), v.get('name')) for k, v in areas.items()),
+        )
+
+    def area_path(self, area_id: Optional[str], areas: dict[str, dict[str, Any]]) -> Optional[str]:
+        if not area_id:
+            return None
+        if area_id in self.area_paths:
+            return self.area_paths[area_id]
+
+        self.area_paths[area_id] = None     # guards against a parent loop
+        if not (area := areas.get(area_id)):
+            return None
+        if parent_path := self.area_path(area.get("parent_id"), areas):
+            path = sys.intern(f"{parent_path}/{area.get('name')}")
+        else:
+            path = area.get('name')
+        self.area_paths[sys.intern(area_id)] = path
+        return path
+
+    def device_label(self, device: dict[str, Any], devices: dict[str, dict[str, Any]]) -> str:
+        parent_device = devices.get(device.get('parent_device'))
+        name = f"{self.area_paths.get(device.get('area'))}"
+        if parent_device and (parent_device_control_station_name := parent_device.get('control_station_name')):
+            name += f"/{parent_device_control_station_name}"
+        if parent_device and (parent_device_name := parent_device.get('device_name')):
+            name += f"/{parent_device_name}"
+        name += f"/{device.get('device_name')} ({device['device_id']})"
+        return name
+
+    def button_label(self, button: dict[str, Any], devices: dict[str, dict[str, Any]]) -> str:
+        # build a full path name for the button, starting with the area (if defined)
+        name = ""
+        if parent_device := devices.get(button.get('parent_device')):
+            if area := self.area_paths.get(parent_device.get('area')):
+                name = f"{area}/"
+
+            if control_station_name := parent_device.get('control_station_name'):
+                name += f"{control_station_name}/"
+
+            if parent_device_name := parent_device.get('device_name'):
+                name += f"{parent_device_name}/"
+
+        name += f"({button.get('button_number')}) {button.get('device_name')} ({button['device_id']})"
+        return name
+
+    @staticmethod
+    def filtered(items: list[tuple[str, str]], text: str) -> list[tuple[str, str]]:
+        if not text:
+            return items
+        text = text.lower()
+        return [item for item in items if text in item[1].lower()]
+
+
+class LatencyHistogram:
+    """Latencies counted in fixed buckets, cheap enough to record for every bridge command. Percentiles are reported as
+    the upper bound of the bucket they fall in."""
+
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self) -> None:
+        self.counts: list[int] = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count: int = 0
+        self.total_ms: float = 0.0
+        self.max_ms: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0.0
+        rank, seen = percent / 100.0 * self.count, 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.BUCKETS_MS[bucket], self.max_ms) if bucket < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> str:
+        return (f"count {self.count}, mean {self.total_ms / max(self.count, 1):.1f}ms, p50 {self.percentile(50):.1f}ms, "
+                f"p90 {self.percentile(90):.1f}ms, p99 {self.percentile(99):.1f}ms, max {self.max_ms:.1f}ms")
+
+
+class LinkHealth:
+    """What the health monitor knows about one bridge's connection."""
+
+    __slots__ = ("rtt_ms", "missed", "up_since", "reconnects", "session")
+
+    def __init__(self) -> None:
+        self.rtt_ms: Optional[float] = None     # running average of the ping round trip time
+        self.missed: int = 0                    # pings in a row without an answer
+        self.up_since: Optional[float] = None   # when the link last came up, None while it's down
+        self.reconnects: int = 0
+        self.session: Optional[asyncio.Event] = None    # set by on_bridge_connect while a reconnect waits for a new session
+
+    def record_rtt(self, seconds: float) -> None:
+        rtt_ms = seconds * 1000.0
+        self.rtt_ms = rtt_ms if self.rtt_ms is None else self.rtt_ms + HEALTH_RTT_WEIGHT * (rtt_ms - self.rtt_ms)
+        self.missed = 0
+
+    @property
+    def uptime(self) -> int:
+        return int(time.time() - self.up_since) if self.up_since else 0
+
+    @staticmethod
+    def retry_delay(failures: int) -> float:
+        """Exponential backoff with jitter, so bridges that dropped together don't all retry at the same moment."""
+        return min(BRIDGE_RETRY_MIN_DELAY * 2 ** failures, BRIDGE_RETRY_MAX_DELAY) * random.uniform(0.5, 1.5)
+
+
+class BridgeMetrics:
+    """Timing and error counts for one bridge, only collected while instrumentation is turned on."""
+
+    def __init__(self) -> None:
+        self.commands: dict[str, LatencyHistogram] = {}     # action name -> bridge command latency
+        self.events: dict[str, LatencyHistogram] = {}       # event handler -> subscriber callback to Indigo write latency
+        self.errors: int = 0
+        self.disconnect_errors: int = 0
+        self.reconnects: int = 0
+        self.in_flight: int = 0
+
+    def command_histogram(self, action_name: str) -> LatencyHistogram:
+        if not (histogram := self.commands.get(action_name)):
+            histogram = self.commands[action_name] = LatencyHistogram()
+        return histogram
+
+    def event_histogram(self, handler: str) -> LatencyHistogram:
+        if not (histogram := self.events.get(handler)):
+            histogram = self.events[handler] = LatencyHistogram()
+        return histogram
+
+    @staticmethod
+    def combined(histograms: dict[str, LatencyHistogram]) -> LatencyHistogram:
+        total = LatencyHistogram()
+        for histogram in histograms.values():
+            total.merge(histogram)
+        return total
+
+
+class BridgeScheduler:
+    """Sends one bridge's commands, at most in_flight_limit at a time, highest priority first and oldest first within a
+    priority. Background commands are held to background_limit of those slots, so polls can't keep control commands
+    waiting.
+
+    Each priority's queue is bounded. When it's full a new interactive or batch command is rejected, while a new
+    background command sheds the oldest waiting one instead, as a stale poll is worth less than a fresh one. A command
+    with the same key as the newest one waiting at its priority is an exact repeat and isn't queued again, the caller
+    gets the waiting one's future. Only the newest is checked, so a repeat is never moved ahead of a later command.
+
+    Futures resolve with send's (success, result), or (False, None) for commands rejected, shed, or dropped by close().
+    Only use it on the event loop."""
+
+    def __init__(self, name: str, send: Callable[..., Awaitable[tuple[bool, Any]]], logger: logging.Logger,
+                 in_flight_limit: int = SCHEDULER_IN_FLIGHT, background_limit: int = SCHEDULER_BACKGROUND_IN_FLIGHT,
+                 queue_limits: tuple[int, ...] = SCHEDULER_QUEUE_LIMITS) -> None:
+        self.name: str = name
+        self.send = send    # (coroutine, device name, action name, **call_args) -> (success, result)
+        self.logger = logger
+        self.in_flight_limit: int = in_flight_limit
+        self.background_limit: int = background_limit
+        self.queue_limits: tuple[int, ...] = queue_limits
+        # per priority: (factory, device name, action name, key, future, time queued, call_args)
+        self.queues: tuple[collections.deque, ...] = tuple(collections.deque() for _ in queue_limits)
+        self.in_flight: int = 0
+        self.background_in_flight: int = 0
+        self.closed: bool = False
+        self.wait: LatencyHistogram = LatencyHistogram()    # time commands spent queued, since the states were last published
+        self.rejected: int = 0
+        self.shed: int = 0
+        self.deduplicated: int = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(len(waiting) for waiting in self.queues)
+
+    def submit(self, priority: int, factory: Callable[[], Awaitable[Any]], device_name: str, action_name: str,
+               key: Optional[Hashable] = None, **call_args: Any) -> asyncio.Future:
+        """Queue a command. factory creates the coroutine when the command is sent, call_args are passed on to send."""
+        waiting = self.queues[priority]
+        if key is not None and waiting and waiting[-1][3] == key:
+            self.deduplicated += 1
+            return waiting[-1][4]
+
+        future = asyncio.get_running_loop().create_future()
+        if self.closed:
+            future.set_result((False, None))
+            return future
+        if len(waiting) >= self.queue_limits[priority]:
+            if priority != PRIORITY_BACKGROUND:
+                self.rejected += 1
+                self.logger.warning(f"{device_name}: {action_name}: {self.name} has {len(waiting)} commands waiting, command rejected")
+                future.set_result((False, None))
+                return future
+            self.shed += 1
+            shed = self.drop(waiting.popleft())
+            self.logger.debug(f"{shed}: {self.name} has {len(waiting)} background commands waiting, dropped the oldest")
+
+        waiting.append((factory, device_name, action_name, key, future, time.perf_counter(), call_args))
+        self.dispatch()
+        return future
+
+    def drop(self, command: tuple) -> str:
+        _, device_name, action_name, _, future, _, _ = command
+        if not future.done():
+            future.set_result((False, None))
+        return f"{device_name}: {action_name}"
+
+    def dispatch(self) -> None:
+        while self.in_flight < self.in_flight_limit:
+            for priority, waiting in enumerate(self.queues):
+                if waiting and (priority != PRIORITY_BACKGROUND or self.background_in_flight < self.background_limit):
+                    break
+            else:
+                return
+            command = waiting.popleft()
+            self.in_flight += 1
+            if priority == PRIORITY_BACKGROUND:
+                self.background_in_flight += 1
+            asyncio.get_running_loop().create_task(self.run(priority, command))
+
+    async def run(self, priority: int, command: tuple) -> None:
+        factory, device_name, action_name, _, future, queued_at, call_args = command
+        self.wait.record(time.perf_counter() - queued_at)
+        result = (False, None)
+        try:
+            result = await self.send(factory(), device_name, action_name, **call_args)
+        finally:
+            if not future.done():
+                future.set_result(result)
+            self.in_flight -= 1
+            if priority == PRIORITY_BACKGROUND:
+                self.background_in_flight -= 1
+            self.dispatch()
+
+    def close(self) -> None:
+        """Drop everything still waiting, and reject anything submitted from now on."""
+        self.closed = True
+        for waiting in self.queues:
+            while waiting:
+                self.drop(waiting.popleft())
+
+
+class IndigoWriter:
+    """Makes the plugin's Indigo server calls on a thread of its own, so the event loop never waits on the server while
+    bridge traffic is waiting to be read. Work is done in the order it was queued, except that state updates queued for
+    a device with no other call queued in between are merged into a single updateStatesOnServer."""
+
+    def __init__(self, logger: logging.Logger, on_failed: Callable[[int, list[str]], None]) -> None:
+        self.logger = logger
+        self.on_failed = on_failed  # (device id, state keys) that couldn't be written, called on the writer thread
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        # device id -> its newest queued state update, [device, key -> state entry, barrier when queued], until it's sent
+        self.pending_states: dict[int, list] = {}
+        self.barrier: int = 0   # counts queued calls, updates are only merged when no call was queued since
+        self.thread: Optional[threading.Thread] = None
+        self.updates_sent: int = 0
+        self.updates_merged: int = 0
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, name="IndigoWriter", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.queue.put((None, ()))
+
+    def update_states(self, device: indigo.Device, update_list: list[dict[str, Any]]) -> None:
+        with self.lock:
+            if (pending := self.pending_states.get(device.id)) and pending[2] == self.barrier:
+                states = pending[1]
+                for item in update_list:
+                    states.pop(item['key'], None)   # re-added at the end, so Indigo applies it after the states it follows
+                    states[item['key']] = item
+                self.updates_merged += 1
+                return
+            pending = self.pending_states[device.id] = [device, {item['key']: item for item in update_list}, self.barrier]
+        self.queue.put((self.send_states, (pending,)))
+
+    def call(self, function: Callable[..., Any], *args: Any) -> None:
+        """Queue an Indigo call (a trigger execute, a state image change, ...), made after everything queued before it."""
+        with self.lock:
+            self.barrier += 1
+            self.queue.put((function, args))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for everything queued so far to be done. Returns False if it isn't within timeout seconds."""
+        done = threading.Event()
+        self.call(done.set)
+        return done.wait(timeout)
+
+    def send_states(self, pending: list) -> None:
+        device, states, _ = pending
+        with self.lock:
+            if self.pending_states.get(device.id) is pending:
+                del self.pending_states[device.id]
+            update_list = list(states.values())
+        try:
+            device.updateStatesOnServer(update_list)
+            self.updates_sent += 1
+        except Exception as e:
+            self.logger.error(f"{device.name}: failed to update states: {e}")
+            self.on_failed(device.id, [item['key'] for item in update_list])
+
+    def run(self) -> None:
+        while True:
+            function, args = self.queue.get()
+            if function is None:
+                break
+            try:
+                function(*args)
+            except Exception as e:
+                self.logger.error(f"IndigoWriter: {getattr(function, '__name__', function)} failed: {e}")
+
+
 class Plugin(indigo.PluginBase):
 
     def __init__(self, pluginId: str, pluginDisplayName: str, pluginVersion: str, pluginPrefs: indigo.Dict) -> None:
@@ -61,10 +591,15 @@ class Plugin(indigo.PluginBase):
 
         self.pluginId: str = pluginId
         self.pluginPrefs: indigo.Dict = pluginPrefs
-        self.event_loop: Optional[asyncio.AbstractEventLoop] = None
+        # created here, run by run_async_thread, so Indigo callbacks can hand it work from the start
+        self.event_loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
         self.async_thread: Optional[threading.Thread] = None
 
-        self.found_bridges: dict[str, str] = {}  # zeroconf discovered bridges
+        self.found_bridges: dict[str, str] = {}  # zeroconf discovered bridges, server name -> label for the bridge config dialog
+        self.discovered_services: dict[str, tuple[str, list[str]]] = {}  # zeroconf service name -> (server name, IPv4 addresses)
+        self.discovery_tasks: set[asyncio.Task] = set()
+        self.bridge_retry_wakeups: dict[int, asyncio.Event] = {}  # set to cut short a failed bridge's wait before its next connect
+        self.link_health: dict[int, LinkHealth] = {}  # bridge id -> its health monitor's findings
 
         self.leap_bridges: dict[int, Optional[Smartbridge]] = {}  # devices with matching Indigo devices
         self.leap_devices: dict[str, int] = {}
@@ -74,62 +609,245 @@ class Plugin(indigo.PluginBase):
 
         self.leap_known_devices: dict[int, dict[str, dict[str, Any]]] = {}
         self.leap_known_groups: dict[int, dict[str, dict[str, Any]]] = {}
-
-        self.linked_device_list: dict[str, dict[str, str]] = {}
-
-        self.bridge_connected_events: dict[int, asyncio.Event] = {}
-        self.bridge_connect_tasks: dict[int, asyncio.Task] = {}
-
-        self.keypress_queue: queue.Queue[tuple[str, float]] = queue.Queue()
-
-        self.currentKeyTime: float = 0
-        self.currentKeyAddress: Optional[str] = None
-        self.currentKeyTaps: int = 0
-        self.activeKeyPress: bool = False
+        self.catalog_indexes: dict[int, CatalogIndex] = {}
+        self.catalog_snapshots: set[int] = set()  # bridges whose catalog came from the saved snapshot, not the live bridge yet
+        # bridge id -> category -> {entry id: (fingerprint, name)}, the catalog as last cached, for finding what changed on the bridge
+        self.catalog_fingerprints: dict[int, dict[str, dict[str, tuple[int, Optional[str]]]]] = {}
+
+        # rule id -> Rule, changed only on Indigo's threads; rule_index is rebuilt from it and swapped in whole, so the event
+        # loop always sees a complete index: (source address, condition) -> the rules to run
+        self.rules: dict[str, Rule] = {}
+        self.rule_index: dict[tuple[str, str], tuple[Rule, ...]] = {}
+
+        # (pluginTypeId, address, event_type/clicks) -> {trigger id: trigger name}, maintained by triggerStartProcessing/triggerStopProcessing
+        self.trigger_index: dict[tuple[str, str, str], dict[int, str]] = {}
+        self.trigger_keys: dict[int, tuple[str, str, str]] = {}
+
+        # Indigo server calls made from the event loop go through the writer, see IndigoWriter
+        self.writer: IndigoWriter = IndigoWriter(self.logger, functools.partial(self.call_on_loop, self.forget_written_states))
+        # started plugin devices, so bridge events don't have to fetch them from the server; kept current by deviceUpdated
+        self.device_cache: dict[int, indigo.Device] = {}
+
+        # last state values (value, uiValue) written to each Indigo device, so unchanged states are never re-sent
+        self.device_states_written: dict[int, dict[str, tuple[Any, Optional[str]]]] = {}
+        self.write_counters: dict[str, int] = {"updates_sent": 0, "updates_skipped": 0, "states_sent": 0, "states_skipped": 0}
+
+        self.battery_polls_pending: set[int] = set()  # battery devices with a poll scheduled or in flight
+        self.battery_poll_semaphore: asyncio.Semaphore = asyncio.Semaphore(BATTERY_POLL_CONCURRENCY)
+
+        self.command_lanes: dict[tuple[int, str], CommandLane] = {}  # (bridge id, LEAP device id) -> lane
+        self.bridge_schedulers: dict[int, BridgeScheduler] = {}  # every command sent to a bridge goes through its scheduler
+
+        self.instrumentation: bool = bool(self.pluginPrefs.get("instrumentation", False))
+        self.bridge_metrics: dict[int, BridgeMetrics] = {}
+        self.multi_press_peak: int = 0  # most buttons in a multi-press sequence at once, while instrumentation is on
+
+        # bridge id -> future resolved with the Smartbridge once its first login and setup are complete, see bridge_ready()
+        self.bridge_ready_futures: dict[int, asyncio.Future] = {}
+        self.device_start_progress: dict[int, list[int]] = {}  # bridge id -> [devices started, devices waiting or started]
+        # bridge id -> the devices start_device has subscribed, kept when the bridge device restarts so they can be
+        # subscribed again on its new Smartbridge
+        self.started_devices: dict[int, set[int]] = {}
+        self.bridge_connect_tasks: dict[int, concurrent.futures.Future] = {}
+
+        # wait for the bridge to answer before an action returns, so scripts get its success or failure
+        self.sync_actions: bool = bool(self.pluginPrefs.get("sync_actions", False))
+        self.action_timeout: float = float(self.pluginPrefs.get("action_timeout", ACTION_TIMEOUT) or ACTION_TIMEOUT)
+
+        # show a command's result in Indigo as soon as it's queued, then let the bridge confirm or correct it
+        self.optimistic_updates: bool = bool(self.pluginPrefs.get("optimistic_updates", False))
+        # (Indigo device id, command kind) -> (value written optimistically, timer that reverts it), only touched on the event loop
+        self.optimistic_states: dict[tuple[int, str], tuple[Any, asyncio.TimerHandle]] = {}
+
+        # (bridge id, LEAP device id) -> handler for its events, for the started LEAP devices other than occupancy groups
+        self.device_event_handlers: dict[tuple[int, str], DeviceEventHandler] = {}
+        # Indigo device id -> [timer ending the throttle window, an event is waiting for the end of it], only touched on the event loop
+        self.event_throttles: dict[int, list] = {}
+        self.events_suppressed: dict[tuple[int, int], int] = {}  # (bridge id, Indigo device id) -> events coalesced into a later write
+
+        # multi-press state, per button address: (taps so far, click timer), only touched on the event loop
+        self.button_taps: dict[str, tuple[int, asyncio.TimerHandle]] = {}
         self.click_timeout: float = float(self.pluginPrefs.get("click_timeout", "0.5"))
+        # per-button click timeouts from multiButtonPress triggers: button address -> {trigger id: timeout}
+        self.button_click_timeouts: dict[str, dict[int, float]] = {}
+
+        self.stop_event: asyncio.Event = asyncio.Event()
 
     def startup(self) -> None:
         self.logger.debug("startup")
 
-        savedList = self.pluginPrefs.get("linked_devices", None)
-        if savedList:
-            self.linked_device_list = json.loads(savedList)
-            self.log_linked_devices()
-
-        ServiceBrowser(Zeroconf(ip_version=IPVersion.V4Only), ["_lutron._tcp.local."], handlers=[self.on_service_state_change])
+        self.load_rules()
 
         indigo.devices.subscribeToChanges()
 
-        threading.Thread(target=self.run_async_thread).start()
+        self.writer.start()
+        self.async_thread = threading.Thread(target=self.run_async_thread)
+        self.async_thread.start()
         self.logger.debug("startup complete")
 
+    def bridge_folder(self, address: str) -> str:
+        return f"{indigo.server.getInstallFolderPath()}/Preferences/Plugins/{self.pluginId}/{address}"
+
     def ssl_file_path(self, address: str) -> str:
-        folder = f"{indigo.server.getInstallFolderPath()}/Preferences/Plugins/{self.pluginId}/{address}"
+        folder = self.bridge_folder(address)
         if not os.path.exists(folder):
             os.makedirs(folder)
         return folder + "/leapBridge"
 
+    def catalog_snapshot_path(self, address: str) -> str:
+        return f"{self.ssl_file_path(address)}-catalog.json"
+
+    def load_catalog_snapshot(self, bridge_dev: indigo.Device) -> None:
+        """Load the bridge's catalog as it was last saved, so the config dialogs and device states work before the bridge
+        connects. The live catalog replaces it in populate_bridge_catalog. The file is read on the calling thread, the
+        catalog caches are only changed on the event loop, by install_catalog_snapshot."""
+        path = self.catalog_snapshot_path(bridge_dev.address)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"{bridge_dev.name}: unable to read catalog snapshot {path}: {e}")
+            return
+        if snapshot.get('version') != CATALOG_SNAPSHOT_VERSION:
+            self.logger.debug(f"{bridge_dev.name}: ignoring catalog snapshot version {snapshot.get('version')}")
+            return
+        self.call_on_loop(self.install_catalog_snapshot, bridge_dev, snapshot)
+
+    def install_catalog_snapshot(self, bridge_dev: indigo.Device, snapshot: dict[str, Any]) -> None:
+        # queued before bridge_connect, so it's always in place before the live catalog replaces it
+        for category, cache in self.catalog_caches().items():
+            cache[bridge_dev.id] = {sys.intern(item_id): item for item_id, item in snapshot[category].items()}
+        self.catalog_fingerprints[bridge_dev.id] = {category: {item_id: self.catalog_fingerprint(item) for item_id, item in cache[bridge_dev.id].items()}
+                                                    for category, cache in self.catalog_caches().items()}
+        self.update_catalog_index(bridge_dev.id, bridge_dev.name)
+        self.catalog_snapshots.add(bridge_dev.id)
+        self.logger.debug(f"{bridge_dev.name}: loaded catalog snapshot saved {time.ctime(snapshot['saved'])}")
+
+    async def save_catalog_snapshot(self, bridge_dev: indigo.Device) -> None:
+        if bridge_dev.id not in self.leap_known_devices or bridge_dev.id in self.catalog_snapshots:
+            return      # nothing new to save
+        if not os.path.exists(f"{self.bridge_folder(bridge_dev.address)}/leapBridge.key"):
+            return      # its files have moved to a new address
+        snapshot = {
+            'version': CATALOG_SNAPSHOT_VERSION,
+            'saved': time.time(),
+            'devices': self.leap_known_devices[bridge_dev.id],
+            'buttons': self.leap_buttons[bridge_dev.id],
+            'scenes': self.leap_scenes[bridge_dev.id],
+            'areas': self.leap_areas[bridge_dev.id],
+            'groups': self.leap_known_groups[bridge_dev.id],
+        }
+        # serialized here on the loop, where the catalog is updated; color values aren't JSON, and aren't needed
+        data = json.dumps(snapshot, default=lambda _: None)
+        path = self.catalog_snapshot_path(bridge_dev.address)
+
+        def write_snapshot() -> None:
+            with open(f"{path}.tmp", "w") as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+
+        try:
+            await self.event_loop.run_in_executor(None, write_snapshot)
+        except Exception as e:
+            self.logger.warning(f"{bridge_dev.name}: unable to save catalog snapshot {path}: {e}")
+            return
+        self.logger.debug(f"{bridge_dev.name}: saved catalog snapshot, {len(data)} bytes")
+
+    def validatePrefsConfigUi(self, valuesDict: indigo.Dict) -> tuple[bool, indigo.Dict] | tuple[bool, indigo.Dict, indigo.Dict]:
+        self.logger.threaddebug(f"validatePrefsConfigUi, valuesDict = {valuesDict}")
+
+        if action_timeout := valuesDict.get('action_timeout', ""):
+            try:
+                if float(action_timeout) <= 0:
+                    raise ValueError
+            except ValueError:
+                errorsDict = indigo.Dict()
+                errorsDict['action_timeout'] = "Bridge Timeout must be a number of seconds greater than zero, or blank."
+                return False, valuesDict, errorsDict
+
+        return True, valuesDict
+
     def closedPrefsConfigUi(self, valuesDict: indigo.Dict, userCancelled: bool) -> None:
         self.logger.threaddebug(f"closedPrefsConfigUi, valuesDict = {valuesDict}")
         if not userCancelled:
             self.click_timeout = float(valuesDict.get("click_timeout", "0.5"))
+            self.sync_actions = bool(valuesDict.get("sync_actions", False))
+            self.optimistic_updates = bool(valuesDict.get("optimistic_updates", False))
+            self.action_timeout = float(valuesDict.get("action_timeout", ACTION_TIMEOUT) or ACTION_TIMEOUT)
+            self.instrumentation = bool(valuesDict.get("instrumentation", False))
+            if not self.instrumentation:
+                self.bridge_metrics = {}
+                self.multi_press_peak = 0
             self.logLevel = int(valuesDict.get("logLevel", logging.INFO))
             self.logger.debug(f"LogLevel = {self.logLevel}")
             self.indigo_log_handler.setLevel(self.logLevel)
             self.plugin_file_handler.setLevel(self.logLevel)
 
     def on_service_state_change(self, zeroconf: Zeroconf, service_type: str, name: str, state_change: ServiceStateChange) -> None:
+        """Called by the AsyncServiceBrowser on the event loop, so it mustn't block. Service info is resolved in a task per
+        announcement, so several bridges resolve at once."""
         self.logger.threaddebug(f"Service {name} of type {service_type} state changed: {state_change}")
 
         if state_change in [ServiceStateChange.Added, ServiceStateChange.Updated]:
-            info = zeroconf.get_service_info(service_type, name)
-            self.logger.threaddebug(f"Adding Found Bridge: {info}")
-            if info.server not in self.found_bridges:
-                self.found_bridges[info.server] = f"{info.properties.get(b'SYSTYPE', b'Unknown').decode('utf-8')} @ {info.server}"
+            task = asyncio.get_running_loop().create_task(self.resolve_service(zeroconf, service_type, name))
+            self.discovery_tasks.add(task)
+            task.add_done_callback(self.discovery_tasks.discard)
         elif state_change is ServiceStateChange.Removed:
-            info = zeroconf.get_service_info(service_type, name)
-            if info.server in self.found_bridges:
-                del self.found_bridges[info.server]
+            # the records are gone by now, so use what was resolved when it was added
+            if (service := self.discovered_services.pop(name, None)) and \
+                    not any(server == service[0] for server, _ in self.discovered_services.values()):
+                self.found_bridges.pop(service[0], None)
+
+    async def resolve_service(self, zeroconf: Zeroconf, service_type: str, name: str) -> None:
+        info = AsyncServiceInfo(service_type, name)
+        if not await info.async_request(zeroconf, SERVICE_INFO_TIMEOUT) or not info.server:
+            self.logger.debug(f"No service info for {name}")
+            return
+        self.logger.threaddebug(f"Adding Found Bridge: {info}")
+        addresses = info.parsed_addresses(IPVersion.V4Only)
+        previous = self.discovered_services.get(name)
+        self.discovered_services[name] = (info.server, addresses)
+        if info.server not in self.found_bridges:
+            self.found_bridges[info.server] = f"{info.properties.get(b'SYSTYPE', b'Unknown').decode('utf-8')} @ {info.server}"
+        self.bridge_announced(info.server, addresses, previous[1] if previous else [])
+
+    def bridge_announced(self, server: str, addresses: list[str], previous_addresses: list[str]) -> None:
+        """Match a bridge announcement to a paired bridge device, by its address, by the address the service had before,
+        or by the serial number in the bridge's host name (Lutron-<serial in hex>.local.). A bridge that's now at a new
+        IP address is moved there. One that's waiting to retry a failed connect is retried now."""
+        host = server.rstrip('.').lower()
+        for bridge_id in list(self.leap_bridges):
+            bridge_dev = self.get_device(bridge_id)
+            if bridge_dev.pluginProps.get('paired') != 'true':
+                continue
+            address = bridge_dev.address.rstrip('.').lower()
+            serial = str(bridge_dev.states.get('serial', ""))
+            if address == host or address in addresses:
+                if wakeup := self.bridge_retry_wakeups.get(bridge_id):
+                    self.logger.info(f"{bridge_dev.name}: bridge announced itself, connecting now")
+                    wakeup.set()
+            elif addresses and (address in previous_addresses or (serial.isdigit() and host.startswith(f"lutron-{int(serial):08x}"))):
+                self.move_bridge(bridge_dev, addresses[0])
+
+    def move_bridge(self, bridge_dev: indigo.Device, new_address: str) -> None:
+        """Move a paired bridge's files to its new IP address and update its address. Changing its props makes Indigo
+        restart the device, which connects to the new address straight away, and resubscribe_devices moves the bridge's
+        started devices over to the new connection."""
+        old_folder, new_folder = self.bridge_folder(bridge_dev.address), self.bridge_folder(new_address)
+        self.logger.info(f"{bridge_dev.name}: bridge has moved from {bridge_dev.address} to {new_address}")
+        try:
+            os.makedirs(new_folder, exist_ok=True)
+            for file_name in os.listdir(old_folder):
+                os.replace(f"{old_folder}/{file_name}", f"{new_folder}/{file_name}")
+            os.rmdir(old_folder)
+        except OSError as e:
+            self.logger.error(f"{bridge_dev.name}: unable to move the bridge's files to {new_folder}: {e}")
+            return
+        newProps = bridge_dev.pluginProps
+        newProps['address'] = new_address
+        bridge_dev.replacePluginPropsOnServer(newProps)
 
         ################################################################################
         #
@@ -140,22 +858,86 @@ class Plugin(indigo.PluginBase):
     def deviceDeleted(self, deleted_device: indigo.Device) -> None:
         indigo.PluginBase.deviceDeleted(self, deleted_device)
 
-        for link_id in list(self.linked_device_list.keys()):
-            link_item = self.linked_device_list[link_id]
-            if deleted_device.id == int(link_item["linked_device_id"]):
-                self.logger.info(f"A linked device ({deleted_device.name}) has been deleted.  Deleting link: {link_item['name']}")
-                del self.linked_device_list[link_id]
-                self.log_linked_devices()
-                indigo.activePlugin.pluginPrefs["linked_devices"] = json.dumps(self.linked_device_list)
+        deleted = [rule for rule in self.rules.values() if rule.action in RULE_DEVICE_ACTIONS and rule.target == str(deleted_device.id)]
+        for rule in deleted:
+            self.logger.info(f"A rule's device ({deleted_device.name}) has been deleted.  Deleting rule: {rule.name}")
+            del self.rules[rule.rule_id]
+        if deleted:
+            self.save_rules()
 
     def deviceUpdated(self, oldDevice: indigo.Device, newDevice: indigo.Device) -> None:
         indigo.PluginBase.deviceUpdated(self, oldDevice, newDevice)
+        if newDevice.id in self.device_cache:
+            self.device_cache[newDevice.id] = newDevice
+            if oldDevice.pluginProps != newDevice.pluginProps:
+                self.call_on_loop(self.recompile_device_event_handler, newDevice)
+
+    def recompile_device_event_handler(self, device: indigo.Device) -> None:
+        if (handler := self.device_event_handlers.get(self.device_event_key(device))) and handler.dev_id == device.id:
+            self.compile_device_event_handler(device)
+
+    def get_device(self, device_id: int) -> indigo.Device:
+        """The plugin device, from the cache if it's started, otherwise from the server."""
+        return self.device_cache.get(device_id) or indigo.devices[device_id]
+
+    ################################################################################
+    #
+    # Trigger index, so bridge events resolve their triggers with a dict lookup
+    #
+    ################################################################################
+
+    @staticmethod
+    def trigger_index_key(trigger: indigo.Trigger) -> Optional[tuple[str, str, str]]:
+        props = trigger.pluginProps
+        if trigger.pluginTypeId == "buttonEvent":
+            return "buttonEvent", props.get('button_address', ""), props.get('event_type', "")
+        elif trigger.pluginTypeId == "multiButtonPress":
+            return "multiButtonPress", props.get('button_address', ""), str(props.get('clicks', "1"))
+        elif trigger.pluginTypeId == "occupancy_event":
+            return "occupancy_event", props.get('occupancy_group', ""), props.get('event_type', "")
+        elif trigger.pluginTypeId == "smart_away_event":
+            return "smart_away_event", str(props.get('bridge', "")), props.get('event_type', "")
+        return None
+
+    def triggerStartProcessing(self, trigger: indigo.Trigger) -> None:
+        self.logger.threaddebug(f"{trigger.name}: Starting Trigger")
+        self.triggerStopProcessing(trigger)     # an edited trigger may have moved to a different key
+        key = self.trigger_index_key(trigger)
+        if not key:
+            return
+        self.trigger_keys[trigger.id] = key
+        # copy-on-write, so the event loop thread never sees a dict that is being mutated
+        self.trigger_index[key] = {**self.trigger_index.get(key, {}), trigger.id: trigger.name}
+
+        if key[0] == "multiButtonPress" and (click_timeout := trigger.pluginProps.get('click_timeout', "")):
+            self.button_click_timeouts[key[1]] = {**self.button_click_timeouts.get(key[1], {}), trigger.id: float(click_timeout)}
+
+    def triggerStopProcessing(self, trigger: indigo.Trigger) -> None:
+        key = self.trigger_keys.pop(trigger.id, None)
+        if not key:
+            return
+        remaining = {k: v for k, v in self.trigger_index.get(key, {}).items() if k != trigger.id}
+        if remaining:
+            self.trigger_index[key] = remaining
+        else:
+            self.trigger_index.pop(key, None)
+
+        if trigger.id in self.button_click_timeouts.get(key[1], {}):
+            remaining_timeouts = {k: v for k, v in self.button_click_timeouts[key[1]].items() if k != trigger.id}
+            if remaining_timeouts:
+                self.button_click_timeouts[key[1]] = remaining_timeouts
+            else:
+                self.button_click_timeouts.pop(key[1], None)
+
+    def execute_triggers(self, key: tuple[str, str, str]) -> None:
+        for trigger_id, trigger_name in self.trigger_index.get(key, {}).items():
+            self.logger.debug(f"Executing Trigger '{trigger_name}' for {key}")
+            self.writer.call(indigo.trigger.execute, trigger_id)
 
     ##############################################################################################
 
     def run_async_thread(self) -> None:
         self.logger.debug("run_async_thread starting")
-        self.event_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.event_loop)
         self.event_loop.run_until_complete(self.async_main())
         self.event_loop.close()
@@ -165,44 +947,199 @@ class Plugin(indigo.PluginBase):
         self.logger.debug("async_main starting")
 
         asyncio.create_task(self.battery_status_loop())
+        asyncio.create_task(self.metrics_loop())
 
-        while True:
-            await asyncio.sleep(0.1)
-            await self.buttonMultiPressCheck()
-            if self.stopThread:
-                self.logger.debug("async_main: stopping")
-                break
+        aiozc = AsyncZeroconf(ip_version=IPVersion.V4Only)
+        browser = AsyncServiceBrowser(aiozc.zeroconf, [LUTRON_SERVICE_TYPE], handlers=[self.on_service_state_change])
+
+        # everything else runs from callbacks and tasks, so just wait here until the plugin stops
+        await self.stop_event.wait()
+        await browser.async_cancel()
+        await aiozc.async_close()
         self.logger.debug("async_main: exiting")
 
+    def stopConcurrentThread(self) -> None:
+        indigo.PluginBase.stopConcurrentThread(self)
+        self.writer.stop()
+        if not self.event_loop.is_closed():
+            self.call_on_loop(self.stop_event.set)
+
+    ########################################
+    # Handing work to the event loop. Indigo calls the plugin on its own threads, and asyncio objects (tasks, futures,
+    # the bridges, the schedulers) may only be touched on the loop's thread, so everything goes through these.
+    ########################################
+
+    def call_on_loop(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Run callback(*args) on the event loop as soon as it's free. Safe to call from any thread. Does nothing once
+        the loop is closed, as it is if Indigo stops devices after the plugin's threads have exited."""
+        if self.event_loop.is_closed():
+            self.logger.debug(f"call_on_loop: event loop closed, skipping {getattr(callback, '__name__', callback)}")
+            return
+        self.event_loop.call_soon_threadsafe(callback, *args)
+
+    def submit_to_loop(self, coro: Awaitable[Any], name: str) -> concurrent.futures.Future:
+        """Run a coroutine on the event loop, logging it if it fails. Safe to call from any thread; the returned future can
+        be waited on or cancelled from any thread. Once the loop is closed the coroutine isn't run, and the returned
+        future is already cancelled."""
+        if self.event_loop.is_closed():
+            self.logger.debug(f"{name}: event loop closed, not run")
+            coro.close()
+            future = concurrent.futures.Future()
+            future.cancel()
+            return future
+        future = asyncio.run_coroutine_threadsafe(coro, self.event_loop)
+        future.add_done_callback(functools.partial(self.log_loop_failure, name))
+        return future
+
+    def log_loop_failure(self, name: str, future: concurrent.futures.Future) -> None:
+        if not future.cancelled() and (e := future.exception()):
+            self.logger.error(f"{name}: unexpected error: {e}")
+
+    def run_on_loop(self, coro: Awaitable[Any], name: str, timeout: float) -> tuple[bool, Any]:
+        """Run a coroutine on the event loop and wait up to timeout seconds for it. Returns (True, result), or
+        (False, None) if it didn't finish in time, in which case it's left to finish on its own. Never call this on
+        the event loop itself, it would wait for itself."""
+        future = self.submit_to_loop(coro, name)
+        try:
+            return True, future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.logger.warning(f"{name}: no answer from the bridge after {timeout:g}s")
+            return False, None
+        except concurrent.futures.CancelledError:
+            return False, None
+
     async def battery_status_loop(self) -> None:
         self.logger.debug("battery_status_loop starting")
 
         while not self.stopThread:
-            await self.poll_battery_status()
-
-            for _ in range(BATTERY_POLL_INTERVAL // 60):
-                if self.stopThread:
-                    break
-                await asyncio.sleep(60)
+            self.schedule_battery_polls()
+            await asyncio.sleep(BATTERY_POLL_CHECK_INTERVAL)
 
         self.logger.debug("battery_status_loop exiting")
 
-    async def poll_battery_status(self) -> None:
-        for device in indigo.devices.iter("self"):
-            if device.deviceTypeId != DEV_BATTERY:
+    async def metrics_loop(self) -> None:
+        while not self.stopThread:
+            await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
+            self.publish_bridge_states()
+            if self.instrumentation:
+                self.publish_metrics()
+
+    def publish_bridge_states(self) -> None:
+        for bridge_id in list(self.leap_bridges):
+            scheduler = self.bridge_scheduler(bridge_id)
+            health = self.link_health.get(bridge_id) or LinkHealth()
+            update_list = [
+                {'key': "link_rtt_ms", 'value': round(health.rtt_ms or 0.0, 1)},
+                {'key': "link_uptime", 'value': health.uptime},
+                {'key': "link_reconnects", 'value': health.reconnects},
+                {'key': "queue_depth", 'value': scheduler.depth},
+                {'key': "queue_wait_p95_ms", 'value': round(scheduler.wait.percentile(95), 1)},
+                {'key': "commands_rejected", 'value': scheduler.rejected},
+                {'key': "commands_shed", 'value': scheduler.shed},
+                {'key': "commands_deduplicated", 'value': scheduler.deduplicated},
+                {'key': "events_suppressed", 'value': sum(count for (bridge, _), count in list(self.events_suppressed.items()) if bridge == bridge_id)},
+            ]
+            self.write_states(self.get_device(bridge_id), update_list)
+            scheduler.wait = LatencyHistogram()
+
+    def metrics(self, bridge_id: Optional[int]) -> Optional[BridgeMetrics]:
+        """The bridge's metrics, or None if instrumentation is off. Only call this on the event loop."""
+        if not self.instrumentation or bridge_id is None:
+            return None
+        if not (metrics := self.bridge_metrics.get(bridge_id)):
+            metrics = self.bridge_metrics[bridge_id] = BridgeMetrics()
+        return metrics
+
+    def publish_metrics(self) -> None:
+        tasks_pending = len(asyncio.all_tasks(self.event_loop))
+        for bridge_id, metrics in list(self.bridge_metrics.items()):
+            if bridge_id not in self.leap_bridges:
                 continue
-            await self.poll_battery_device(device)
+            commands, events = BridgeMetrics.combined(metrics.commands), BridgeMetrics.combined(metrics.events)
+            update_list = [
+                {'key': "command_count", 'value': commands.count},
+                {'key': "command_p50_ms", 'value': round(commands.percentile(50), 1)},
+                {'key': "command_p95_ms", 'value': round(commands.percentile(95), 1)},
+                {'key': "command_errors", 'value': metrics.errors + metrics.disconnect_errors},
+                {'key': "commands_in_flight", 'value': metrics.in_flight},
+                {'key': "event_p95_ms", 'value': round(events.percentile(95), 1)},
+                {'key': "reconnects", 'value': metrics.reconnects},
+                {'key': "tasks_pending", 'value': tasks_pending},
+                {'key': "multi_press_pending", 'value': sum(1 for address in self.button_taps if address.startswith(f"{bridge_id}:"))},
+            ]
+            self.write_states(self.get_device(bridge_id), update_list)
+
+    @staticmethod
+    def battery_poll_interval(status: str) -> int:
+        """Seconds until a battery that reported `status` is polled again: rarely while it's Good, more often otherwise
+        so a low battery is noticed soon."""
+        return BATTERY_POLL_GOOD_INTERVAL if status == "Good" else BATTERY_POLL_INTERVAL
+
+    def next_battery_poll_time(self, device: indigo.Device) -> float:
+        """When the device is due, from its saved states so a plugin restart doesn't poll every device again."""
+        if next_poll_time := float(device.states.get('next_poll_time') or 0):
+            return next_poll_time
+        # polled before next_poll_time was saved, or never
+        last_poll_time = float(device.states.get('last_poll_time') or 0)
+        return last_poll_time + self.battery_poll_interval(device.states.get('battery_status', "Unknown")) if last_poll_time else 0.0
+
+    def schedule_battery_polls(self) -> None:
+        """Start a sweep for the battery devices that are due for a poll. The polls are spread over BATTERY_POLL_SPREAD,
+        so after a restart (or on a new install) the bridges see a steady trickle of requests instead of one per device
+        all at once. The started devices come from device_cache, so the sweep makes no server round trips."""
+        battery_devices = [device for device in list(self.device_cache.values()) if device.deviceTypeId == DEV_BATTERY]
+        now = time.time()
+        due = [device for device in battery_devices if device.id not in self.battery_polls_pending and self.next_battery_poll_time(device) <= now]
+        if not due:
+            return
+
+        due.sort(key=self.next_battery_poll_time)
+        spacing = BATTERY_POLL_SPREAD / len(battery_devices)
+        self.logger.debug(f"schedule_battery_polls: {len(due)} of {len(battery_devices)} battery devices due, {spacing:.0f}s apart")
+        self.battery_polls_pending.update(device.id for device in due)
+        self.event_loop.create_task(self.poll_battery_status(due, spacing))
+
+    async def poll_battery_status(self, devices: list[indigo.Device], spacing: float) -> None:
+        await asyncio.gather(*(self.scheduled_battery_poll(device, index * spacing) for index, device in enumerate(devices)))
+
+    async def scheduled_battery_poll(self, device: indigo.Device, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+            async with self.battery_poll_semaphore:
+                await self.poll_battery_device(device)
+        finally:
+            self.battery_polls_pending.discard(device.id)
 
     async def poll_battery_device(self, device: indigo.Device) -> None:
-        bridge = self.get_connected_bridge(int(device.pluginProps["bridge"]), device.name, "poll_battery_device", level=logging.DEBUG)
-        if not bridge:
+        bridge_id = int(device.pluginProps["bridge"])
+        bridge = self.get_connected_bridge(bridge_id, device.name, "poll_battery_device", level=logging.DEBUG)
+        if not bridge or not self.is_bridge_ready(bridge_id):
+            self.logger.debug(f"{device.name}: poll_battery_device: bridge not connected, will retry")
+            return
+
+        success, status = await self.bridge_scheduler(bridge_id).submit(
+            PRIORITY_BACKGROUND, functools.partial(bridge.get_battery_status, device.pluginProps["device"]), device.name, "poll_battery_device",
+            key=("battery", device.pluginProps["device"]), bridge_level=logging.DEBUG, other_level=logging.DEBUG)
+        now = int(time.time())
+        if not success:
+            # back off exponentially, the device may be out of range or its battery flat
+            failures = int(device.states.get('poll_failures') or 0) + 1
+            delay = min(BATTERY_POLL_RETRY_DELAY * 2 ** (failures - 1), BATTERY_POLL_GOOD_INTERVAL)
+            self.logger.debug(f"{device.name}: battery poll failed {failures} time(s) in a row, next try in {delay}s")
+            self.write_states(device, [{'key': "poll_failures", 'value': failures}, {'key': "next_poll_time", 'value': now + delay}])
             return
 
-        success, status = await self.call_bridge(bridge.get_battery_status(device.pluginProps["device"]), device.name, "poll_battery_device",
-                                                   bridge_level=logging.DEBUG, other_level=logging.DEBUG)
-        if success and status is not None:
-            device.updateStateOnServer("battery_status", status)
+        if status is None:
+            status = device.states.get('battery_status', "Unknown")
+        else:
             self.logger.debug(f"{device.name}: Battery status set to {status}")
+        update_list = [
+            {'key': "battery_status", 'value': status},
+            {'key': "last_poll_time", 'value': now},
+            {'key': "next_poll_time", 'value': now + self.battery_poll_interval(status)},
+            {'key': "poll_failures", 'value': 0},
+        ]
+        self.write_states(device, update_list)
 
     async def lap_pair(self, deviceID: int, address: str) -> None:
         """
@@ -239,7 +1176,7 @@ class Plugin(indigo.PluginBase):
             {'key': "protocol_version", 'value': data['version']},
             {'key': "status", 'value': "Paired"},
         ]
-        dev.updateStatesOnServer(update_list)
+        self.write_states(dev, update_list)
 
     async def bridge_connect(self, indigo_bridge_dev: indigo.Device) -> None:
         path = self.ssl_file_path(indigo_bridge_dev.address)
@@ -249,29 +1186,31 @@ class Plugin(indigo.PluginBase):
 
         self.logger.debug(f"{indigo_bridge_dev.name}: Creating bridge at {indigo_bridge_dev.address}")
 
-        # bridge_connected_events[id] is only ever set once the one-time initial setup below
+        # the bridge_ready() future is only ever resolved once the one-time initial setup below
         # (populate_bridge_catalog + subscriptions + Smart Away status) has completed, so it
         # doubles as the "has this bridge finished its first successful login" latch. Any
         # on_bridge_connect firing before that point is either the still-in-progress initial
         # connect (handled inline below) or a retry of a failed initial attempt (handled by the
         # retry loop below) -- either way there's nothing to refresh yet.
+        health = self.link_health[indigo_bridge_dev.id] = LinkHealth()
+
         def on_bridge_connect() -> None:
-            if self.bridge_connected_events[indigo_bridge_dev.id].is_set():
+            health.up_since, health.missed = time.time(), 0
+            if health.session:
+                health.session.set()
+            if self.is_bridge_ready(indigo_bridge_dev.id):
+                health.reconnects += 1
+                if metrics := self.metrics(indigo_bridge_dev.id):
+                    metrics.reconnects += 1
                 self.event_loop.create_task(self.refresh_bridge_catalog(indigo_bridge_dev.id, bridge))
 
         bridge = Smartbridge.create_tls(indigo_bridge_dev.address, f"{path}.key", f"{path}.crt", f"{path}-CA.crt",
                                          on_connect_callback=on_bridge_connect)
         self.leap_bridges[indigo_bridge_dev.id] = bridge
 
-        while True:
-            success, _ = await self.call_bridge(bridge.connect(), indigo_bridge_dev.name, "connect")
-            if success:
-                break
-            indigo_bridge_dev.updateStateOnServer('status', "Connect Failed")
-            self.logger.warning(f"{indigo_bridge_dev.name}: retrying connection in {BRIDGE_CONNECT_RETRY_DELAY}s")
-            await asyncio.sleep(BRIDGE_CONNECT_RETRY_DELAY)
-
-        indigo_bridge_dev.updateStateOnServer('status', "Connected")
+        if not await self.connect_with_backoff(indigo_bridge_dev.id, bridge, self.connect_bridge):
+            return      # bridge device was stopped
+        self.write_states(indigo_bridge_dev, [{'key': "status", 'value': "Connected"}])
         self.logger.info(f"{indigo_bridge_dev.name}: Bridge Connected")
 
         bridge_data = bridge.get_device_by_id('1')
@@ -283,62 +1222,277 @@ class Plugin(indigo.PluginBase):
             {'key': "dev_type", 'value': bridge_data['type']},
             {'key': "serial", 'value': bridge_data['serial']},
         ]
-        try:
-            indigo_bridge_dev.updateStatesOnServer(update_list)
-        except Exception as e:
-            self.logger.error(f"{indigo_bridge_dev.name}: failed to update states: {e}")
+        self.write_states(indigo_bridge_dev, update_list)
 
         # Button, Scene, and Area lists are populated here, since there are no Indigo devices to start.
-        self.populate_bridge_catalog(indigo_bridge_dev.id, indigo_bridge_dev.name, bridge, subscribe_buttons=True)
+        had_snapshot = indigo_bridge_dev.id in self.catalog_snapshots
+        changes = self.populate_bridge_catalog(indigo_bridge_dev.id, indigo_bridge_dev.name, bridge)
+        if had_snapshot and (summary := self.catalog_change_summary(changes)):
+            self.logger.info(f"{indigo_bridge_dev.name}: catalog changed since it was last saved: {summary}")
+        for button in bridge.get_buttons().values():
+            self.subscribe_button(indigo_bridge_dev.id, bridge, button)
+        await self.save_catalog_snapshot(indigo_bridge_dev)
 
         bridge.add_smart_away_subscriber(lambda status: self.smart_away_event(indigo_bridge_dev.id, status))
         success, smart_away_status = await self.call_bridge(bridge.get_smart_away_status(), indigo_bridge_dev.name, "get_smart_away_status",
-                                                              bridge_level=logging.DEBUG, other_level=logging.DEBUG)
+                                                              bridge_level=logging.DEBUG, other_level=logging.DEBUG, bridge_id=indigo_bridge_dev.id)
         if success:
-            indigo_bridge_dev.updateStateOnServer('smart_away_status', smart_away_status)
+            self.write_states(indigo_bridge_dev, [{'key': "smart_away_status", 'value': smart_away_status}])
 
         # Devices and Groups will be done when the devices start up.
         self.logger.debug(f"{indigo_bridge_dev.name}: Notifying devices that connection is complete")
-        self.bridge_connected_events[indigo_bridge_dev.id].set()
-
-    def populate_bridge_catalog(self, bridge_id: int, bridge_name: str, bridge: Smartbridge, subscribe_buttons: bool) -> None:
-        self.leap_known_devices[bridge_id] = {}
-        for device in bridge.get_devices().values():
-            self.logger.threaddebug(f"{bridge_name}: Found Device: {device['name']} ({device['device_id']}) - {device['type']} ({device['model']})")
-            self.leap_known_devices[bridge_id][device['device_id']] = device
+        if not (ready := self.bridge_ready(indigo_bridge_dev.id)).done():
+            ready.set_result(bridge)
+        self.resubscribe_devices(indigo_bridge_dev.id, bridge)
+        self.event_loop.create_task(self.bridge_health_monitor(indigo_bridge_dev.id, bridge))
+
+    async def connect_with_backoff(self, bridge_id: int, bridge: Smartbridge, attempt: Callable[[int, Smartbridge], Awaitable[bool]]) -> bool:
+        """Make connect attempts (connect_bridge or reconnect_session) until one succeeds, waiting LinkHealth.retry_delay()
+        between them, or retrying at once if zeroconf sees the bridge announce itself. Returns False if the bridge device
+        is stopped first."""
+        wakeup = self.bridge_retry_wakeups[bridge_id] = asyncio.Event()
+        try:
+            failures = 0
+            while self.leap_bridges.get(bridge_id) is bridge:
+                if await attempt(bridge_id, bridge):
+                    return self.leap_bridges.get(bridge_id) is bridge
+                bridge_dev = self.get_device(bridge_id)
+                delay = LinkHealth.retry_delay(failures)
+                failures += 1
+                self.write_states(bridge_dev, [{'key': "status", 'value': "Connect Failed"}])
+                self.logger.log(logging.WARNING if failures in (1, 5) or failures % 20 == 0 else logging.DEBUG,
+                                f"{bridge_dev.name}: connect failed {failures} time(s) in a row, retrying in {delay:.1f}s")
+                try:
+                    await asyncio.wait_for(wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+            return False
+        finally:
+            if self.bridge_retry_wakeups.get(bridge_id) is wakeup:
+                del self.bridge_retry_wakeups[bridge_id]
+
+    async def connect_bridge(self, bridge_id: int, bridge: Smartbridge) -> bool:
+        """One first connect attempt, given BRIDGE_CONNECT_TIMEOUT. The Smartbridge's connect() keeps retrying on its own
+        until it logs in, so it's shielded from the timeout: the next attempt's connect() resets it instead, which
+        cancelling it here wouldn't do cleanly."""
+        bridge_name = self.get_device(bridge_id).name
+        connect = self.event_loop.create_task(bridge.connect())
+        connect.add_done_callback(lambda task: task.cancelled() or task.exception())    # a timed out attempt's result isn't awaited
+        try:
+            success, _ = await asyncio.wait_for(self.call_bridge(asyncio.shield(connect), bridge_name, "connect"), BRIDGE_CONNECT_TIMEOUT)
+            return success
+        except asyncio.TimeoutError:
+            self.logger.debug(f"{bridge_name}: connect not complete after {BRIDGE_CONNECT_TIMEOUT}s")
+            return False
+
+    async def reconnect_session(self, bridge_id: int, bridge: Smartbridge) -> bool:
+        """One reconnect attempt for a link the health monitor found dead. After the first login the Smartbridge's
+        connect() restarts its connection but returns at once, so success is a new session opening (on_bridge_connect
+        sets health.session) within BRIDGE_SESSION_TIMEOUT and answering a ping. A failed attempt closes the
+        connection again, so the Smartbridge's own fixed 2s retries don't run between the backoff's attempts."""
+        if not (health := self.link_health.get(bridge_id)):
+            return False
+        session = health.session = asyncio.Event()
+        connect = self.event_loop.create_task(bridge.connect())
+        connect.add_done_callback(lambda task: task.cancelled() or task.exception())    # its result means nothing here
+        try:
+            await asyncio.wait_for(session.wait(), BRIDGE_SESSION_TIMEOUT)
+            success = await self.ping_bridge(bridge_id, bridge) is not None
+        except asyncio.TimeoutError:
+            success = False
+        finally:
+            health.session = None
+        if not success:
+            health.up_since = None
+            await bridge.close()
+        return success
+
+    async def ping_bridge(self, bridge_id: int, bridge: Smartbridge) -> Optional[float]:
+        """Returns the ping's round trip time in seconds, or None if it wasn't answered within HEALTH_PROBE_TIMEOUT."""
+        start = time.perf_counter()
+        try:
+            # pylutron_caseta has no public ping, this is the request its own keepalive sends
+            await asyncio.wait_for(bridge._request("ReadRequest", "/server/1/status/ping"), HEALTH_PROBE_TIMEOUT)  # noqa
+            return time.perf_counter() - start
+        except (asyncio.TimeoutError, BridgeDisconnectedError, BridgeResponseError, ConnectionError, OSError) as e:
+            self.logger.debug(f"{self.get_device(bridge_id).name}: ping not answered: {e!r}")
+            return None
 
-        self.leap_known_groups[bridge_id] = {}
-        for group in bridge.occupancy_groups.values():
-            self.logger.threaddebug(f"{bridge_name}: Found Group: {group['name']} - {group}")
-            self.leap_known_groups[bridge_id][group['occupancy_group_id']] = group
+    async def bridge_health_monitor(self, bridge_id: int, bridge: Smartbridge) -> None:
+        """Ping the bridge every HEALTH_PROBE_INTERVAL, keeping a running round trip time. A link that misses
+        HEALTH_MISSED_PROBES pings in a row is treated as dead and reconnected, rather than waiting for a command to
+        fail or for the Smartbridge's own once a minute ping."""
+        if not (health := self.link_health.get(bridge_id)):
+            return      # bridge device was stopped before the monitor started
+        while self.leap_bridges.get(bridge_id) is bridge:
+            await asyncio.sleep(HEALTH_PROBE_INTERVAL)
+            if self.leap_bridges.get(bridge_id) is not bridge:
+                break
+            if (rtt := await self.ping_bridge(bridge_id, bridge)) is not None:
+                health.record_rtt(rtt)
+                continue
+            health.missed += 1
+            if health.missed < HEALTH_MISSED_PROBES or self.leap_bridges.get(bridge_id) is not bridge:
+                continue
 
-        self.leap_buttons[bridge_id] = {}
-        for button in bridge.get_buttons().values():
-            self.logger.threaddebug(f"{bridge_name}: Found Button: {button['name']} ({button['parent_device']}) - {button['device_id']}")
-            self.leap_buttons[bridge_id][button['device_id']] = button
-            if subscribe_buttons:
-                bridge.add_button_subscriber(button['device_id'],
-                                            lambda event_type, button_device=button['parent_device'], button_id=button['device_id']: self.button_event(
-                                                 bridge_id, button_device, button_id, event_type))
-
-        self.leap_scenes[bridge_id] = {}
-        for scene in bridge.get_scenes().values():
-            self.logger.threaddebug(f"{bridge_name}: Found Scene: {scene['name']} - {scene['scene_id']}")
-            self.leap_scenes[bridge_id][scene['scene_id']] = scene
-
-        self.leap_areas[bridge_id] = {}
-        for area in bridge.areas.values():
-            self.logger.threaddebug(f"{bridge_name}: Found Area: {area}")
-            self.leap_areas[bridge_id][area['id']] = area
+            bridge_dev = self.get_device(bridge_id)
+            self.logger.warning(f"{bridge_dev.name}: no answer to {health.missed} pings, reconnecting")
+            health.up_since = None
+            self.write_states(bridge_dev, [{'key': "status", 'value': "Reconnecting"}])
+            if not await self.connect_with_backoff(bridge_id, bridge, self.reconnect_session):
+                break
+            # on_bridge_connect counted the reconnect and is refreshing the catalog
+            health.missed = 0
+            self.write_states(bridge_dev, [{'key': "status", 'value': "Connected"}])
+            self.logger.info(f"{bridge_dev.name}: Bridge reconnected")
+        self.logger.debug(f"bridge_health_monitor for bridge {bridge_id} exiting")
+
+    def bridge_ready(self, bridge_id: int) -> asyncio.Future:
+        """The future that bridge_connect resolves with the Smartbridge once the bridge is ready for its devices, created on
+        demand so devices can wait for a bridge that hasn't started yet. Only call this on the event loop."""
+        if not (future := self.bridge_ready_futures.get(bridge_id)):
+            future = self.bridge_ready_futures[bridge_id] = self.event_loop.create_future()
+        return future
+
+    def resubscribe_devices(self, bridge_id: int, bridge: Smartbridge) -> None:
+        """Devices started before the bridge device restarted (because its address moved, say) are still subscribed to
+        the old, closed Smartbridge, and don't start again themselves. Start them again on the new one. Devices still
+        waiting for the bridge aren't in started_devices yet, they start themselves once the ready future resolves."""
+        restarted = 0
+        for dev_id in list(self.started_devices.get(bridge_id, ())):
+            if device := self.device_cache.get(dev_id):
+                self.start_device(device, bridge_id, bridge)
+                restarted += 1
+        if restarted:
+            self.logger.debug(f"{self.get_device(bridge_id).name}: {restarted} devices subscribed to the new connection")
+
+    def forget_started_device(self, device: indigo.Device) -> None:
+        if device.deviceTypeId not in ('leapBridge', DEV_BATTERY):
+            self.started_devices.get(int(device.pluginProps['bridge']), set()).discard(device.id)
+
+    def is_bridge_ready(self, bridge_id: int) -> bool:
+        future = self.bridge_ready_futures.get(bridge_id)
+        return future is not None and future.done() and not future.cancelled()
+
+    def catalog_caches(self) -> dict[str, dict[int, dict[str, dict[str, Any]]]]:
+        return {"devices": self.leap_known_devices, "groups": self.leap_known_groups, "buttons": self.leap_buttons,
+                "scenes": self.leap_scenes, "areas": self.leap_areas}
+
+    @staticmethod
+    def catalog_fingerprint(entry: dict[str, Any]) -> tuple[int, Optional[str]]:
+        """The structure of a catalog entry, without its live values, for spotting entries that changed on the bridge.
+        Only its hash is kept, they're compared within one run of the plugin. The entry's name is kept alongside, since
+        a removed entry is already gone from the Smartbridge's dicts by the time it's logged."""
+        return hash(json.dumps({key: value for key, value in entry.items() if key not in CATALOG_VOLATILE_KEYS}, sort_keys=True, default=str)), entry.get('name')
+
+    def populate_bridge_catalog(self, bridge_id: int, bridge_name: str, bridge: Smartbridge) -> dict[str, tuple[list[str], list[str], list[str]]]:
+        """Switch the cached catalog over to the Smartbridge's own dicts, which it updates in place, so the plugin holds no
+        copy of its own. What was added, removed or changed since the last time is found by fingerprint.
+        Returns category -> (added, removed, changed) ids."""
+        self.catalog_snapshots.discard(bridge_id)
+        sources = {"devices": bridge.get_devices(), "groups": bridge.occupancy_groups, "buttons": bridge.get_buttons(),
+                   "scenes": bridge.get_scenes(), "areas": bridge.areas}
+        fingerprints = self.catalog_fingerprints.setdefault(bridge_id, {})
+        changes = {}
+        for category, cache in self.catalog_caches().items():
+            source = sources[category]
+            old, new = fingerprints.get(category, {}), {item_id: self.catalog_fingerprint(item) for item_id, item in source.items()}
+            added = [item_id for item_id in new if item_id not in old]
+            removed = [item_id for item_id in old if item_id not in new]
+            changed = [item_id for item_id in new if item_id in old and new[item_id] != old[item_id]]
+
+            for item_id in removed:
+                self.logger.debug(f"{bridge_name}: {category}: removed {old[item_id][1]} ({item_id})")
+            cache[bridge_id] = source
+            for item_id in added:
+                self.logger.threaddebug(f"{bridge_name}: {category}: added {source[item_id].get('name')} ({item_id})")
+            for item_id in changed:
+                self.logger.debug(f"{bridge_name}: {category}: changed {source[item_id].get('name')} ({item_id})")
+
+            fingerprints[category] = new
+            changes[category] = (added, removed, changed)
+
+        self.update_catalog_index(bridge_id, bridge_name)
+        return changes
+
+    @staticmethod
+    def catalog_change_summary(changes: dict[str, tuple[list[str], list[str], list[str]]]) -> str:
+        return ", ".join(f"{category} +{len(added)} -{len(removed)} ~{len(changed)}"
+                         for category, (added, removed, changed) in changes.items() if added or removed or changed)
+
+    def subscribe_button(self, bridge_id: int, bridge: Smartbridge, button: dict[str, Any]) -> None:
+        bridge.add_button_subscriber(button['device_id'], BridgeEventRoute(self.button_dispatch, bridge_id, button['device_id']))
+
+    def button_dispatch(self, bridge_id: int, button_id: str, event_type: str) -> None:
+        button_device = self.leap_buttons[bridge_id][button_id]['parent_device']
+        self.button_event(bridge_id, button_device, button_id, event_type)
+
+    def update_catalog_index(self, bridge_id: int, bridge_name: str) -> None:
+        devices, buttons, areas = self.leap_known_devices[bridge_id], self.leap_buttons[bridge_id], self.leap_areas[bridge_id]
+        old_index = self.catalog_indexes.get(bridge_id)
+        if old_index and old_index.signature == CatalogIndex.catalog_signature(devices, buttons, areas):
+            self.logger.threaddebug(f"{bridge_name}: catalog labels unchanged, keeping catalog index")
+            return
+        self.catalog_indexes[bridge_id] = CatalogIndex(bridge_id, devices, buttons, areas)
+        self.logger.debug(f"{bridge_name}: catalog index built, {len(devices)} devices, {len(buttons)} buttons, {len(areas)} areas")
 
     async def refresh_bridge_catalog(self, bridge_id: int, bridge: Smartbridge) -> None:
-        bridge_name = indigo.devices[bridge_id].name
-        self.logger.debug(f"{bridge_name}: bridge reconnected, waiting {RECONNECT_REFRESH_DELAY}s before refreshing cached devices/buttons/scenes/areas")
-        # subscriptions persist on the Smartbridge instance across reconnects, so no need to re-subscribe here;
-        # button/occupancy/smart-away subscribers registered at initial connect remain valid.
-        await asyncio.sleep(RECONNECT_REFRESH_DELAY)
-        self.populate_bridge_catalog(bridge_id, bridge_name, bridge, subscribe_buttons=False)
-        self.logger.info(f"{bridge_name}: cached devices/buttons/scenes/areas refreshed after reconnect")
+        bridge_dev = self.get_device(bridge_id)
+        # the Smartbridge reloads its catalog in its login task, which is the only signal that it's ready again. That's
+        # the private Smartbridge._login_task, as of pylutron_caseta 0.29.0, so fall back to a fixed delay without it.
+        login_task = getattr(bridge, "_login_task", None)
+        if login_task is None:
+            self.logger.debug(f"{bridge_dev.name}: bridge reconnected, waiting {RECONNECT_REFRESH_DELAY}s before refreshing catalog")
+            await asyncio.sleep(RECONNECT_REFRESH_DELAY)
+        else:
+            self.logger.debug(f"{bridge_dev.name}: bridge reconnected, waiting for login before refreshing catalog")
+            await asyncio.wait({login_task}, timeout=RECONNECT_LOGIN_TIMEOUT)
+            if not login_task.done() or login_task.cancelled() or login_task.exception():
+                self.logger.debug(f"{bridge_dev.name}: bridge login didn't complete, catalog will be refreshed on the next reconnect")
+                return
+        if self.leap_bridges.get(bridge_id) is not bridge:
+            return      # bridge device was stopped while waiting
+
+        # subscriptions persist on the Smartbridge instance across reconnects, only new buttons need subscribing
+        changes = self.populate_bridge_catalog(bridge_id, bridge_dev.name, bridge)
+        for button_id in changes["buttons"][0]:
+            self.subscribe_button(bridge_id, bridge, bridge.get_buttons()[button_id])
+        for category, prefix in (("devices", ""), ("groups", "GROUP.")):
+            for item_id in changes[category][1]:
+                if (dev_id := self.leap_devices.get(f"{bridge_id}:{prefix}{item_id}")) is not None:
+                    self.logger.warning(f"{bridge_dev.name}: {category} {item_id} is no longer on the bridge, Indigo device {dev_id} won't be updated")
+        await self.save_catalog_snapshot(bridge_dev)
+
+        resynced = self.resync_bridge_devices(bridge_id, bridge)
+        summary = self.catalog_change_summary(changes) or "no catalog changes"
+        self.logger.info(f"{bridge_dev.name}: catalog refreshed after reconnect, {summary}, {resynced} devices resynced")
+
+    def resync_bridge_devices(self, bridge_id: int, bridge: Smartbridge) -> int:
+        """Write the bridge's current levels and occupancy to the started Indigo devices that show something else, which is
+        anything that changed while the connection was down. These are catch-up writes, so the plugin's own button and
+        occupancy triggers aren't fired, though Indigo's state change triggers still fire on them as usual.
+        Returns the number of devices updated."""
+        resynced = 0
+        for leap_device_id, leap_data in bridge.get_devices().items():
+            dev_id = self.leap_devices.get(f"{bridge_id}:{leap_device_id}")
+            if (written := self.device_states_written.get(dev_id)) is None:
+                continue    # no Indigo device, or it isn't started
+            if all(written.get(item['key']) == (item['value'], None) for item in self.leap_state_list(leap_data)):
+                continue
+            device = self.get_device(dev_id)
+            if self.write_states(device, self.device_update_list(device, leap_data)):
+                resynced += 1
+
+        for group_id, data in bridge.occupancy_groups.items():
+            dev_id = self.leap_devices.get(f"{bridge_id}:GROUP.{group_id}")
+            if (written := self.device_states_written.get(dev_id)) is None:
+                continue
+            if written.get("onOffState", (None,))[0] == (data['status'] == "Occupied"):
+                continue
+            self.update_group_states(self.get_device(dev_id), data)
+            resynced += 1
+        return resynced
 
     def get_connected_bridge(self, bridge_key: int, entity_name: str, action_name: str, level: int = logging.WARNING) -> Optional[Smartbridge]:
         """Look up a connected Smartbridge, logging a standard message if it's missing or still connecting."""
@@ -348,323 +1502,609 @@ class Plugin(indigo.PluginBase):
         return bridge
 
     async def call_bridge(self, coro: Awaitable[Any], device_name: str, action_name: str,
-                           bridge_level: int = logging.WARNING, other_level: int = logging.ERROR) -> tuple[bool, Any]:
+                           bridge_level: int = logging.WARNING, other_level: int = logging.ERROR,
+                           bridge_id: Optional[int] = None) -> tuple[bool, Any]:
         """Await a Smartbridge command, logging BridgeDisconnectedError/BridgeResponseError
         distinctly from other failures. Returns (True, result) on success, (False, None) on
-        failure."""
+        failure. With a bridge_id, the command is timed when instrumentation is on."""
+        if metrics := self.metrics(bridge_id):
+            metrics.in_flight += 1
+            start = time.perf_counter()
         try:
-            return True, await coro
+            result = await coro
+            if metrics:
+                metrics.command_histogram(action_name).record(time.perf_counter() - start)
+            return True, result
         except BridgeDisconnectedError as e:
+            if metrics:
+                metrics.disconnect_errors += 1
             self.logger.log(bridge_level, f"{device_name}: {action_name}: bridge disconnected: {e}")
         except BridgeResponseError as e:
+            if metrics:
+                metrics.errors += 1
             self.logger.log(bridge_level, f"{device_name}: {action_name}: bridge rejected request ({e.code}): {e}")
         except Exception as e:
+            if metrics:
+                metrics.errors += 1
             self.logger.log(other_level, f"{device_name}: {action_name}: unexpected error: {e}")
+        finally:
+            if metrics:
+                metrics.in_flight -= 1
         return False, None
 
-    def create_bridge_task(self, coro: Awaitable[Any], device_name: str, action_name: str) -> None:
-        """Schedule a fire-and-forget Smartbridge command, logging bridge-specific failures distinctly."""
-        self.event_loop.create_task(self.call_bridge(coro, device_name, action_name))
+    def bridge_scheduler(self, bridge_id: int) -> BridgeScheduler:
+        """The bridge's command scheduler, created on first use. Only call this on the event loop."""
+        if not (scheduler := self.bridge_schedulers.get(bridge_id)):
+            name = device.name if (device := self.device_cache.get(bridge_id)) else str(bridge_id)
+            scheduler = self.bridge_schedulers[bridge_id] = BridgeScheduler(name, functools.partial(self.call_bridge, bridge_id=bridge_id), self.logger)
+        return scheduler
+
+    def schedule_command(self, bridge_id: int, priority: int, factory: Callable[[], Awaitable[Any]], device_name: str,
+                         action_name: str) -> asyncio.Future:
+        return self.bridge_scheduler(bridge_id).submit(priority, factory, device_name, action_name)
+
+    def send_bridge_command(self, factory: Callable[[], Awaitable[Any]], device_name: str, action_name: str, bridge_id: int,
+                            key: Optional[Hashable] = None) -> Optional[bool]:
+        """Queue an interactive Smartbridge command on the bridge's scheduler. factory creates the command's coroutine
+        when it's sent. A repeat of the command waiting just before it, with the same key, is dropped.
+
+        When actions wait for the bridge, returns whether the command succeeded, otherwise returns None at once."""
+
+        async def submit() -> bool:
+            success, _ = await self.bridge_scheduler(bridge_id).submit(PRIORITY_INTERACTIVE, factory, device_name, action_name, key=key)
+            return success
+
+        if not self.sync_actions:
+            self.submit_to_loop(submit(), f"{device_name}: {action_name}")
+            return None
+        finished, success = self.run_on_loop(submit(), f"{device_name}: {action_name}", self.action_timeout)
+        return finished and success
+
+    def command_lane(self, device: indigo.Device) -> CommandLane:
+        key = (int(device.pluginProps["bridge"]), device.pluginProps["device"])
+        if not (lane := self.command_lanes.get(key)):
+            lane = self.command_lanes.setdefault(key, CommandLane(device.name, functools.partial(self.schedule_command, key[0])))
+        return lane
+
+    def queue_device_command(self, device: indigo.Device, kind: str, factory: Callable[[], Awaitable[Any]], action_name: str,
+                             target: Any = None) -> Optional[bool]:
+        """Queue a Smartbridge command on the device's lane, replacing any not yet sent command of the same kind.
+        factory creates the coroutine when it's actually sent. target is the value the command sets, if known.
+
+        When actions wait for the bridge, returns whether the command succeeded (None if a newer command replaced it),
+        otherwise returns None at once."""
+        lane = self.command_lane(device)
+        if not self.sync_actions:
+            self.call_on_loop(self.submit_device_command, device, lane, kind, factory, action_name, target, None)
+            return None
+
+        async def submit() -> Optional[bool]:
+            done = asyncio.get_running_loop().create_future()
+            self.submit_device_command(device, lane, kind, factory, action_name, target, done)
+            return await done
+
+        finished, success = self.run_on_loop(submit(), f"{device.name}: {action_name}", self.action_timeout)
+        return success if finished else False
+
+    def submit_device_command(self, device: indigo.Device, lane: CommandLane, kind: str, factory: Callable[[], Awaitable[Any]],
+                              action_name: str, target: Any, done: Optional[asyncio.Future], priority: int = PRIORITY_INTERACTIVE) -> None:
+        """The event loop half of queue_device_command, writing the target optimistically first if that's turned on.
+        intended is set here, in the same step that makes the lane busy, so a device event handled in between can't
+        clear it."""
+        if target is None:
+            lane.intended.pop(kind, None)
+        else:
+            lane.intended[kind] = target
+        if self.optimistic_updates and target is not None and kind in _OPTIMISTIC_STATES:
+            done = done or asyncio.get_running_loop().create_future()
+            self.write_optimistic(device, kind, target)
+            done.add_done_callback(functools.partial(self.optimistic_command_done, device, kind))
+        lane.submit(kind, factory, action_name, done, priority)
+
+    def optimistic_update_list(self, device: indigo.Device, kind: str, target: Any) -> list[dict[str, Any]]:
+        if kind == "fan":
+            return [{'key': "speedIndex", 'value': _FAN_SPEED_INDEX.get(target, 0), 'uiValue': target}]
+        if device.deviceTypeId == DEV_SWITCH:
+            return [{'key': "onOffState", 'value': target > 0}]
+        if device.deviceTypeId in (DEV_DIMMER, DEV_COLOR, DEV_SHADE):
+            return [{'key': "onOffState", 'value': False}] if int(target) == 0 else [{'key': "brightnessLevel", 'value': int(target)}]
+        return []
+
+    def write_optimistic(self, device: indigo.Device, kind: str, target: Any) -> None:
+        """Write the state a command will set before the bridge has it, and give the bridge OPTIMISTIC_CONFIRM_TIMEOUT
+        seconds to report it back. device_event confirms or corrects it."""
+        if not (update_list := self.optimistic_update_list(device, kind, target)):
+            return
+        if previous := self.optimistic_states.pop((device.id, kind), None):
+            previous[1].cancel()
+        timer = self.event_loop.call_later(OPTIMISTIC_CONFIRM_TIMEOUT, self.optimistic_timeout, device, kind)
+        self.optimistic_states[(device.id, kind)] = (target, timer)
+        self.write_states(device, update_list)
+
+    def optimistic_command_done(self, device: indigo.Device, kind: str, done: asyncio.Future) -> None:
+        """Revert at once if the command failed. A replaced command (None) leaves its replacement's state in place."""
+        if done.cancelled() or done.result() is not False:
+            return
+        if (device.id, kind) in self.optimistic_states and not self.command_lane(device).pending.get(kind):
+            self.revert_optimistic(device, kind, "the command failed")
+
+    def optimistic_timeout(self, device: indigo.Device, kind: str) -> None:
+        if (device.id, kind) in self.optimistic_states:
+            self.revert_optimistic(device, kind, f"the bridge didn't confirm it within {OPTIMISTIC_CONFIRM_TIMEOUT}s")
+
+    def revert_optimistic(self, device: indigo.Device, kind: str, reason: str) -> None:
+        """Put back the state the bridge last reported."""
+        target, timer = self.optimistic_states.pop((device.id, kind))
+        timer.cancel()
+        self.logger.warning(f"{device.name}: showed {kind} {target} before the bridge had it, reverting because {reason}")
+        bridge = self.leap_bridges.get(int(device.pluginProps["bridge"]))
+        if bridge and (leap_data := bridge.devices.get(device.pluginProps["device"])):
+            self.write_states(device, self.device_update_list(device, leap_data))
+
+    def reconcile_optimistic(self, device: indigo.Device, lane: Optional[CommandLane], leap_data: dict[str, Any],
+                             update_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Check the device's optimistic states against what the bridge reported. A match confirms the state. A mismatch
+        while commands are still in flight is the bridge reporting something older, so the optimistic value stays on
+        show; with nothing in flight, the bridge's value wins."""
+        for kind, state_keys in _OPTIMISTIC_STATES.items():
+            if not (entry := self.optimistic_states.get((device.id, kind))):
+                continue
+            target, timer = entry
+            if kind == "fan":
+                confirmed = leap_data.get('fan_speed') == target
+            elif device.deviceTypeId == DEV_SWITCH:
+                confirmed = (float(leap_data['current_state']) > 0) == (target > 0)
+            else:
+                confirmed = int(float(leap_data['current_state'])) == int(target)
 
-    def update_device_states(self, device: indigo.Device, data: dict[str, Any]) -> None:
+            if confirmed:
+                self.logger.threaddebug(f"{device.name}: bridge confirmed {kind} {target}")
+            elif lane and lane.busy:
+                update_list = [item for item in update_list if item['key'] not in state_keys]
+                continue
+            else:
+                self.logger.debug(f"{device.name}: bridge reported a different {kind} than {target}, showing the bridge's")
+            timer.cancel()
+            del self.optimistic_states[(device.id, kind)]
+        return update_list
+
+    def cancel_optimistic(self, device_id: int) -> None:
+        for key in [key for key in self.optimistic_states if key[0] == device_id]:
+            self.optimistic_states.pop(key)[1].cancel()
+
+    def intended_value(self, device: indigo.Device, kind: str, reported: Any) -> Any:
+        """The value a command in flight is taking the device to, or the last reported value if there is none."""
+        lane = self.command_lanes.get((int(device.pluginProps["bridge"]), device.pluginProps["device"]))
+        return lane.intended.get(kind, reported) if lane else reported
+
+    def write_states(self, device: indigo.Device, update_list: list[dict[str, Any]]) -> list[str]:
+        """Queue the entries of update_list whose value differs from what was last written to the device as one
+        updateStatesOnServer call on the writer thread. Returns the keys that were queued."""
+        written = self.device_states_written.setdefault(device.id, {})
+        changed = [item for item in update_list if written.get(item['key']) != (item['value'], item.get('uiValue'))]
+
+        self.write_counters["states_skipped"] += len(update_list) - len(changed)
+        if not changed:
+            self.write_counters["updates_skipped"] += 1
+            return []
+
+        self.writer.update_states(device, changed)
+        self.write_counters["updates_sent"] += 1
+        self.write_counters["states_sent"] += len(changed)
+        for item in changed:
+            for coupled_key in _COUPLED_STATES.get(item['key'], ()):
+                written.pop(coupled_key, None)
+            written[item['key']] = (item['value'], item.get('uiValue'))
+        return [item['key'] for item in changed]
+
+    def forget_written_states(self, device_id: int, keys: list[str]) -> None:
+        """Run on the event loop when the writer's update failed, so those states are sent again next time. Only the
+        event loop touches device_states_written."""
+        written = self.device_states_written.get(device_id, {})
+        for key in keys:
+            written.pop(key, None)
+
+    @staticmethod
+    def leap_state_list(data: dict[str, Any]) -> list[dict[str, Any]]:
+        return [{'key': key, 'value': data.get(key)} for key in LEAP_STATE_KEYS]
+
+    def update_group_states(self, device: indigo.Device, data: dict[str, Any]) -> bool:
+        """Write an occupancy group's states, returns True if its occupancy changed."""
+        occupied = data['status'] == "Occupied"
         update_list = [
-            {'key': "area", 'value': data.get('area')},
-            {'key': "button_groups", 'value': data.get('button_groups')},
-            {'key': "current_state", 'value': data.get('current_state')},
-            {'key': "device_id", 'value': data.get('device_id')},
-            {'key': "device_name", 'value': data.get('device_name')},
-            {'key': "fan_speed", 'value': data.get('fan_speed')},
-            {'key': "model", 'value': data.get('model')},
-            {'key': "name", 'value': data.get('name')},
-            {'key': "occupancy_sensors", 'value': data.get('occupancy_sensors')},
-            {'key': "serial", 'value': data.get('serial')},
-            {'key': "tilt", 'value': data.get('tilt')},
-            {'key': "type", 'value': data.get('type')},
-            {'key': "zone", 'value': data.get('zone')},
+            {'key': "onOffState", 'value': occupied, 'uiValue': "Occupied" if occupied else "Unoccupied"},
+            {'key': "area", 'value': data['area']},
+            {'key': "occupancy_group_id", 'value': data['occupancy_group_id']},
+            {'key': "sensors", 'value': json.dumps(data['sensors'])},
+            {'key': "name", 'value': data['name']},
+            {'key': "device_name", 'value': data['device_name']},
         ]
-        try:
-            device.updateStatesOnServer(update_list)
-        except Exception as e:
-            self.logger.error(f"{device.name}: failed to update states: {e}")
+        if "onOffState" not in self.write_states(device, update_list):
+            return False
+
+        if occupied:
+            self.writer.call(device.updateStateImageOnServer, indigo.kStateImageSel.MotionSensorTripped)
+        else:
+            self.writer.call(device.updateStateImageOnServer, indigo.kStateImageSel.MotionSensor)
+        return True
 
     ##############################################################################################
     # Event Handlers
     ##############################################################################################
 
     def device_event(self, bridge_id: int, device_id: str) -> None:
+        start = time.perf_counter() if self.instrumentation else None
+        if not (handler := self.device_event_handlers.get((bridge_id, device_id))):
+            self.logger.debug(f"device_event: no started device for {bridge_id}:{device_id}")
+            return
+        device = self.get_device(handler.dev_id)
 
-        try:
-            device = indigo.devices[self.leap_devices[f"{bridge_id}:{device_id}"]]
-        except Exception as e:
-            self.logger.error(f"device_event: Exception getting device for {bridge_id}:{device_id}: {e}")
+        if handler.throttle_window and not self.throttle_event(bridge_id, device_id, device, handler):
             return
+        self.deliver_device_event(bridge_id, device_id, device, handler)
+        if start is not None and (metrics := self.metrics(bridge_id)):
+            metrics.event_histogram("device_event").record(time.perf_counter() - start)
 
+    def deliver_device_event(self, bridge_id: int, device_id: str, device: indigo.Device, handler: DeviceEventHandler) -> None:
         leap_data = self.leap_bridges[bridge_id].get_device_by_id(device_id)
         self.logger.threaddebug(f"{device.name}: device_event: leap_data = {leap_data}")
-        self.update_device_states(device, leap_data)
-
-        if device.deviceTypeId == DEV_SWITCH:
-            state = True if leap_data['current_state'] > 0 else False
-            device.updateStateOnServer("onOffState", state)
-            self.logger.debug(f"{device.name}: Switch set to {state}")
-
-        elif device.deviceTypeId == DEV_DIMMER:
-            level = float(leap_data['current_state'])
-            if int(level) == 0:
-                device.updateStateOnServer("onOffState", False)
-            else:
-                device.updateStateOnServer("brightnessLevel", int(level))
-            self.logger.debug(f"{device.name}: Dimmer set to {level}%")
-
-        elif device.deviceTypeId == DEV_COLOR:
-            level = float(leap_data['current_state'])
-            if int(level) == 0:
-                device.updateStateOnServer("onOffState", False)
-            else:
-                device.updateStateOnServer("brightnessLevel", int(level))
-            self.logger.debug(f"{device.name}: Color light set to {level}%")
-
-            color = leap_data.get('color')
-            if isinstance(color, WarmCoolColorValue):
-                device.updateStateOnServer("whiteTemperature", int(color.kelvin))
-                self.logger.debug(f"{device.name}: White temperature set to {color.kelvin}K")
-            elif isinstance(color, FullColorValue):
-                red, green, blue = colorsys.hsv_to_rgb(color.hue / 360.0, color.saturation / 100.0, 1.0)
-                device.updateStateOnServer("redLevel", round(red * 100))
-                device.updateStateOnServer("greenLevel", round(green * 100))
-                device.updateStateOnServer("blueLevel", round(blue * 100))
-                self.logger.debug(f"{device.name}: Color set to hue={color.hue}, saturation={color.saturation}")
-
-            warm_dim = leap_data.get('warm_dim')
-            if warm_dim is not None:
-                device.updateStateOnServer("warm_dim", warm_dim)
-                self.logger.debug(f"{device.name}: Warm dim set to {warm_dim}")
-
-        elif device.deviceTypeId == DEV_FAN:
-            fan_speed = leap_data['fan_speed']
-            if fan_speed == "Off":
-                device.updateStateOnServer("speedIndex", 0, uiValue="Off")
-            elif fan_speed == "Low":
-                device.updateStateOnServer("speedIndex", 1, uiValue="Low")
-            elif fan_speed == "Medium":
-                device.updateStateOnServer("speedIndex", 2, uiValue="Medium")
-            elif fan_speed == "MediumHigh":
-                device.updateStateOnServer("speedIndex", 2, uiValue="MediumHigh")      # MediumHigh is treated as Medium
-            elif fan_speed == "High":
-                device.updateStateOnServer("speedIndex", 3, uiValue="High")
-            self.logger.debug(f"{device.name}: Fan speed is now {fan_speed}")
-
-        elif device.deviceTypeId == DEV_SHADE:
-            level = float(leap_data['current_state'])
-            if int(level) == 0:
-                device.updateStateOnServer("onOffState", False)
-            else:
-                device.updateStateOnServer("brightnessLevel", int(level))
-            self.logger.debug(f"{device.name}: Shade set to {level}%")
-
+        if (lane := self.command_lanes.get((bridge_id, device_id))) and not lane.busy:
+            lane.intended.clear()   # the bridge has caught up with everything we sent
+        update_list = self.leap_state_list(leap_data)
+        handler.translate(device, leap_data, update_list)
+        if self.optimistic_states:
+            update_list = self.reconcile_optimistic(device, lane, leap_data, update_list)
+        self.write_states(device, update_list)
+
+    @staticmethod
+    def event_throttle_window(device: indigo.Device) -> float:
+        """Seconds the device's events are throttled to, 0 if they aren't."""
+        setting = device.pluginProps.get("event_throttle", "")
+        if setting == "":
+            return EVENT_THROTTLE_DEFAULTS.get(device.deviceTypeId, 0.0)
+        try:
+            return max(float(setting), 0.0)
+        except ValueError:
+            return EVENT_THROTTLE_DEFAULTS.get(device.deviceTypeId, 0.0)
+
+    def throttle_event(self, bridge_id: int, device_id: str, device: indigo.Device, handler: DeviceEventHandler) -> bool:
+        """Returns True if the event should be delivered now. Events in a device's throttle window are coalesced, and the
+        bridge's latest data is delivered when the window ends, so the final level of a fade or shade move always lands."""
+        if throttle := self.event_throttles.get(device.id):
+            if throttle[1]:
+                key = (bridge_id, device.id)
+                self.events_suppressed[key] = self.events_suppressed.get(key, 0) + 1
+            throttle[1] = True
+            return False
+        timer = self.event_loop.call_later(handler.throttle_window, self.event_throttle_window_end, bridge_id, device_id, device.id)
+        self.event_throttles[device.id] = [timer, not handler.throttle_leading]
+        return handler.throttle_leading
+
+    def event_throttle_window_end(self, bridge_id: int, device_id: str, dev_id: int) -> None:
+        throttle = self.event_throttles.get(dev_id)
+        handler = self.device_event_handlers.get((bridge_id, device_id))
+        if not throttle or not throttle[1] or not handler or bridge_id not in self.leap_bridges:
+            self.event_throttles.pop(dev_id, None)
+            return
+        # deliver what's waiting, then keep throttling in case the device is still moving
+        throttle[0] = self.event_loop.call_later(handler.throttle_window, self.event_throttle_window_end, bridge_id, device_id, dev_id)
+        throttle[1] = False
+        try:
+            self.deliver_device_event(bridge_id, device_id, self.get_device(dev_id), handler)
+        except Exception as e:
+            self.logger.error(f"event_throttle_window_end: Exception delivering event for {bridge_id}:{device_id}: {e}")
+
+    @staticmethod
+    def device_event_key(device: indigo.Device) -> tuple[int, Optional[str]]:
+        return int(device.pluginProps.get('bridge') or 0), device.pluginProps.get('device')
+
+    def drop_device_event_handler(self, device: indigo.Device) -> None:
+        key = self.device_event_key(device)
+        if (handler := self.device_event_handlers.get(key)) and handler.dev_id == device.id:
+            del self.device_event_handlers[key]
+
+    def cancel_event_throttle(self, device_id: int) -> None:
+        if throttle := self.event_throttles.pop(device_id, None):
+            throttle[0].cancel()
+
+    def device_update_list(self, device: indigo.Device, leap_data: dict[str, Any]) -> list[dict[str, Any]]:
+        """Translate a LEAP device's data into the Indigo states for the device's type."""
+        update_list = self.leap_state_list(leap_data)
+        self.state_translator(device.deviceTypeId)(device, leap_data, update_list)
+        return update_list
+
+    def state_translator(self, device_type: str) -> Callable[[indigo.Device, dict[str, Any], list[dict[str, Any]]], None]:
+        return {
+            DEV_SWITCH: self.switch_states,
+            DEV_DIMMER: self.dimmer_states,
+            DEV_COLOR: self.color_states,
+            DEV_FAN: self.fan_states,
+            DEV_SHADE: self.shade_states,
+        }.get(device_type, self.unknown_device_states)
+
+    def compile_device_event_handler(self, device: indigo.Device) -> None:
+        """Work out what device_event needs for the device, see DeviceEventHandler. Called when the device starts and
+        whenever its props change."""
+        handler = DeviceEventHandler(device.id, self.state_translator(device.deviceTypeId), self.event_throttle_window(device),
+                                     bool(device.pluginProps.get("event_throttle_leading", True)))
+        self.device_event_handlers[self.device_event_key(device)] = handler
+
+    def switch_states(self, device: indigo.Device, leap_data: dict[str, Any], update_list: list[dict[str, Any]]) -> None:
+        state = True if leap_data['current_state'] > 0 else False
+        update_list.append({'key': "onOffState", 'value': state})
+        self.logger.debug(f"{device.name}: Switch set to {state}")
+
+    def dimmer_states(self, device: indigo.Device, leap_data: dict[str, Any], update_list: list[dict[str, Any]], label: str = "Dimmer") -> None:
+        level = float(leap_data['current_state'])
+        if int(level) == 0:
+            update_list.append({'key': "onOffState", 'value': False})
         else:
-            self.logger.debug(f"{device.name}: device_event Unknown device type: {device.deviceTypeId}")
+            update_list.append({'key': "brightnessLevel", 'value': int(level)})
+        self.logger.debug(f"{device.name}: {label} set to {level}%")
+
+    def shade_states(self, device: indigo.Device, leap_data: dict[str, Any], update_list: list[dict[str, Any]]) -> None:
+        self.dimmer_states(device, leap_data, update_list, "Shade")
+
+    def color_states(self, device: indigo.Device, leap_data: dict[str, Any], update_list: list[dict[str, Any]]) -> None:
+        self.dimmer_states(device, leap_data, update_list, "Color light")
+
+        color = leap_data.get('color')
+        if isinstance(color, WarmCoolColorValue):
+            update_list.append({'key': "whiteTemperature", 'value': int(color.kelvin)})
+            self.logger.debug(f"{device.name}: White temperature set to {color.kelvin}K")
+        elif isinstance(color, FullColorValue):
+            red, green, blue = colorsys.hsv_to_rgb(color.hue / 360.0, color.saturation / 100.0, 1.0)
+            update_list.append({'key': "redLevel", 'value': round(red * 100)})
+            update_list.append({'key': "greenLevel", 'value': round(green * 100)})
+            update_list.append({'key': "blueLevel", 'value': round(blue * 100)})
+            self.logger.debug(f"{device.name}: Color set to hue={color.hue}, saturation={color.saturation}")
+
+        warm_dim = leap_data.get('warm_dim')
+        if warm_dim is not None:
+            update_list.append({'key': "warm_dim", 'value': warm_dim})
+            self.logger.debug(f"{device.name}: Warm dim set to {warm_dim}")
+
+    def fan_states(self, device: indigo.Device, leap_data: dict[str, Any], update_list: list[dict[str, Any]]) -> None:
+        fan_speed = leap_data['fan_speed']
+        if (speed_index := _FAN_SPEED_INDEX.get(fan_speed)) is not None:     # MediumHigh is treated as Medium
+            update_list.append({'key': "speedIndex", 'value': speed_index, 'uiValue': fan_speed})
+        self.logger.debug(f"{device.name}: Fan speed is now {fan_speed}")
+
+    def unknown_device_states(self, device: indigo.Device, _leap_data: dict[str, Any], _update_list: list[dict[str, Any]]) -> None:
+        self.logger.debug(f"{device.name}: device_event Unknown device type: {device.deviceTypeId}")
 
     def occupancy_event(self, bridge_id: int, group_id: str) -> None:
+        start = time.perf_counter() if self.instrumentation else None
         self.logger.debug(f"occupancy_event: bridge_id = {bridge_id}, group_id = {group_id}")
 
-        dev = indigo.devices[self.leap_devices[f"{bridge_id}:GROUP.{group_id}"]]   # occupancy group device
+        dev = self.get_device(self.leap_devices[f"{bridge_id}:GROUP.{group_id}"])   # occupancy group device
         data = self.leap_bridges[bridge_id].occupancy_groups[group_id]
         self.logger.debug(f"{dev.name}: occupancy_event data = {data}")
-        occupied = data['status'] == "Occupied"
-        dev.updateStateOnServer("onOffState", occupied, uiValue="Occupied" if occupied else "Unoccupied")
+        changed = self.update_group_states(dev, data)
         self.logger.debug(f"{dev.name}: Group set to {data['status']}")
+        if start is not None and (metrics := self.metrics(bridge_id)):
+            metrics.event_histogram("occupancy_event").record(time.perf_counter() - start)
+
+        group_address = f"{bridge_id}:{data['occupancy_group_id']}"
+        self.execute_triggers(("occupancy_event", group_address, data['status']))
+        # only on a change, RA3 bridges resend an unchanged status with every area status
+        condition = RULE_OCCUPANCY_CONDITIONS.get(data['status'])
+        if changed and condition and (rules := self.rule_index.get((group_address, condition))):
+            self.run_rules(rules)
+
+    ################################################################################
+    #
+    # Local rules, run on the event loop
+    #
+    ################################################################################
+
+    def run_rules(self, rules: Iterable[Rule]) -> None:
+        for rule in rules:
+            try:
+                self.run_rule(rule)
+            except Exception as e:
+                self.logger.error(f"Rule {rule.name}: {e}")
+
+    def run_rule(self, rule: Rule) -> None:
+        """Send a rule's command straight to the bridge when its target is on one, only going through the Indigo server
+        for other plugins' devices."""
+        self.logger.debug(f"Rule {rule.name}: {rule.condition} at {rule.source}, {rule.action} {rule.target}")
+        if rule.action in ("scene", "tap"):
+            bridge_id, leap_id = rule.target.split(":", 1)
+            bridge_id = int(bridge_id)
+            if not (bridge := self.leap_bridges.get(bridge_id)):
+                self.logger.debug(f"Rule {rule.name}: bridge not connected")
+                return
+            if rule.action == "scene":
+                factory, action_name, key = functools.partial(bridge.activate_scene, leap_id), "activate_scene", ("scene", leap_id)
+            else:
+                factory, action_name, key = functools.partial(bridge.tap_button, leap_id), "tap_button", None
+            self.bridge_scheduler(bridge_id).submit(PRIORITY_INTERACTIVE, factory, f"Rule {rule.name}", action_name, key=key)
+            return
 
-        if data['status'] == "Occupied":
-            dev.updateStateImageOnServer(indigo.kStateImageSel.MotionSensorTripped)
+        dev_id = int(rule.target)
+        if (device := self.device_cache.get(dev_id)) and device.deviceTypeId in RULE_DIRECT_TYPES:
+            self.run_rule_on_bridge(rule, device)
+        elif rule.action == "toggle":
+            self.writer.call(indigo.device.toggle, dev_id)
+        elif rule.action == "on":
+            self.writer.call(indigo.device.turnOn, dev_id)
+        elif rule.action == "off":
+            self.writer.call(indigo.device.turnOff, dev_id)
+        elif rule.action == "level":
+            self.writer.call(functools.partial(indigo.dimmer.setBrightness, dev_id, value=rule.level))
+
+    def run_rule_on_bridge(self, rule: Rule, device: indigo.Device) -> None:
+        bridge_id, leap_device_id = int(device.pluginProps["bridge"]), device.pluginProps["device"]
+        if not (bridge := self.leap_bridges.get(bridge_id)) or not (leap_data := bridge.devices.get(leap_device_id)):
+            self.logger.debug(f"Rule {rule.name}: {device.name} isn't on a connected bridge")
+            return
+        if rule.action == "toggle":
+            level = 0 if self.intended_value(device, "level", leap_data.get('current_state') or 0) > 0 else 100
+        elif rule.action == "level":
+            level = clamp(rule.level, 0, 100)
         else:
-            dev.updateStateImageOnServer(indigo.kStateImageSel.MotionSensor)
-
-        update_list = [
-            {'key': "area", 'value': data['area']},
-            {'key': "occupancy_group_id", 'value': data['occupancy_group_id']},
-            {'key': "sensors", 'value': json.dumps(data['sensors'])},
-            {'key': "name", 'value': data['name']},
-            {'key': "device_name", 'value': data['device_name']},
-        ]
-        try:
-            dev.updateStatesOnServer(update_list)
-        except Exception as e:
-            self.logger.error(f"{dev.name}: failed to update states: {e}")
-
-        for trigger in indigo.triggers.iter("self"):
-            if trigger.pluginTypeId == "occupancy_event":
-                if trigger.pluginProps['occupancy_group'] == f"{bridge_id}:{data['occupancy_group_id']}" and \
-                        trigger.pluginProps['event_type'] == data['status']:
-                    indigo.trigger.execute(trigger)
+            level = 100 if rule.action == "on" else 0
+        if level in (0, 100):
+            factory = functools.partial(bridge.turn_on if level else bridge.turn_off, leap_device_id)
+        else:
+            factory = functools.partial(bridge.set_value, leap_device_id, level)
+        self.submit_device_command(device, self.command_lane(device), "level", factory, f"rule {rule.name}", level, None)
 
     def smart_away_event(self, bridge_id: int, status: str) -> None:
         self.logger.debug(f"smart_away_event: bridge_id = {bridge_id}, status = {status}")
 
-        bridge_dev = indigo.devices[bridge_id]
-        bridge_dev.updateStateOnServer('smart_away_status', status)
+        bridge_dev = self.get_device(bridge_id)
+        self.write_states(bridge_dev, [{'key': "smart_away_status", 'value': status}])
         self.logger.debug(f"{bridge_dev.name}: Smart Away status set to {status}")
 
-        for trigger in indigo.triggers.iter("self"):
-            if trigger.pluginTypeId == "smart_away_event":
-                if int(trigger.pluginProps['bridge']) == bridge_id and trigger.pluginProps['event_type'] == status:
-                    indigo.trigger.execute(trigger)
+        self.execute_triggers(("smart_away_event", str(bridge_id), status))
 
     def button_event(self, bridge: int, button_device: str, button_id: str, event_type: str) -> None:
         button_address = f"{bridge}:{button_id}"
         self.logger.debug(f"button_event: {button_device=}, {button_address=}, {event_type=}")
 
-        for trigger in indigo.triggers.iter("self"):
-            if trigger.pluginTypeId == "buttonEvent":
-                if trigger.pluginProps['event_type'] == event_type and trigger.pluginProps['button_address'] == button_address:
-                    indigo.trigger.execute(trigger)
+        self.execute_triggers(("buttonEvent", button_address, event_type))
 
         if event_type == "Press":
             # only process multi-press triggers on PRESS events
-            self.keypress_queue.put((button_address, time.time()))      # queue processed in async self.buttonMultiPressCheck()
-
-            # check for linked devices, again only on PRESS events
-            for link_item in self.linked_device_list.values():
-                self.logger.debug(f"Linked Device check, link_item: {link_item}")
-                controlling_button = link_item["controlling_button"]
-                if controlling_button == button_address:
-                    linked_device = indigo.devices[int(link_item["linked_device_id"])]
-                    self.logger.debug(f"Linked Device Match, controlling_button: {controlling_button}, linked_device: {linked_device.id}")
-                    indigo.device.toggle(linked_device.id)
-
-    async def buttonMultiPressCheck(self) -> None:
-
-        if self.keypress_queue.empty():
-            if self.activeKeyPress and time.time() > (self.currentKeyTime + self.click_timeout):
-                self.logger.debug(f"buttonMultiPressCheck: Timeout reached for button = {self.currentKeyAddress}, presses = {self.currentKeyTaps}")
-                self.activeKeyPress = False
-                await self.multi_trigger_check()
-            return
-
-        newKeyAddress, newKeyTime = self.keypress_queue.get()
-        self.logger.debug(f"buttonMultiPressCheck: New button press: {newKeyAddress}, {newKeyTime}")
-
-        if not self.activeKeyPress:
-            self.activeKeyPress = True
-            self.currentKeyAddress = newKeyAddress
-            self.currentKeyTaps = 1
-            self.currentKeyTime = newKeyTime
-            return
-
-        if newKeyAddress == self.currentKeyAddress:
-            self.currentKeyTaps += 1
-
-        else:
-            # newKeyAddress != self.currentKeyAddress - different button so process the current one
-            await self.multi_trigger_check()
-
-            # then set up the new key
-            self.activeKeyPress = True
-            self.currentKeyAddress = newKeyAddress
-            self.currentKeyTaps = 1
-            self.currentKeyTime = newKeyTime
-
-    async def multi_trigger_check(self) -> None:
-        for trigger in indigo.triggers.iter("self"):
-            if trigger.pluginTypeId != "multiButtonPress":
-                continue
-
-            if trigger.pluginProps["button_address"] != self.currentKeyAddress:
-                self.logger.threaddebug(f"buttonMultiPressCheck: Skipping Trigger '{trigger.name}', wrong keypad button: {self.currentKeyAddress}")
-                continue
-
-            if self.currentKeyTaps != int(trigger.pluginProps.get("clicks", "1")):
-                self.logger.threaddebug(f"buttonMultiPressCheck: Skipping Trigger {trigger.name}, wrong click count: {self.currentKeyTaps}")
-                continue
-
-            self.logger.debug(f"buttonMultiPressCheck: Executing Trigger '{trigger.name}', keypad button: {self.currentKeyAddress}")
-            indigo.trigger.execute(trigger)
+            self.button_tap(button_address)
+
+        if rules := self.rule_index.get((button_address, event_type.lower())):
+            self.run_rules(rules)
+
+    def button_tap(self, button_address: str) -> None:
+        """Count a press towards the multi-press sequence of this button and (re)start its click timer.
+        Each button has its own sequence, so presses on different keypads don't interfere."""
+        taps, timer = self.button_taps.pop(button_address, (0, None))
+        if timer:
+            timer.cancel()
+        click_timeout = max(self.button_click_timeouts.get(button_address, {}).values(), default=self.click_timeout)
+        timer = self.event_loop.call_later(click_timeout, self.button_taps_complete, button_address)
+        self.button_taps[button_address] = (taps + 1, timer)
+        if self.instrumentation:
+            self.multi_press_peak = max(self.multi_press_peak, len(self.button_taps))
+        self.logger.debug(f"button_tap: {button_address}, presses = {taps + 1}, timeout = {click_timeout}")
+
+    def button_taps_complete(self, button_address: str) -> None:
+        taps, _ = self.button_taps.pop(button_address, (0, None))
+        self.logger.debug(f"button_taps_complete: Timeout reached for button = {button_address}, presses = {taps}")
+        self.multi_trigger_check(button_address, taps)
+
+    def multi_trigger_check(self, button_address: str, taps: int) -> None:
+        self.execute_triggers(("multiButtonPress", button_address, str(taps)))
+        if rules := self.rule_index.get((button_address, "taps")):
+            self.run_rules([rule for rule in rules if rule.taps == taps])
 
     ##################
     # Device Methods
     ##################
 
-    def validateDeviceConfigUi(self, valuesDict: indigo.Dict, typeId: str, devId: int) -> tuple[bool, indigo.Dict]:
+    def validateEventConfigUi(self, valuesDict: indigo.Dict, typeId: str, eventId: int) -> tuple[bool, indigo.Dict] | tuple[bool, indigo.Dict, indigo.Dict]:
+        self.logger.threaddebug(f"validateEventConfigUi, typeId = {typeId}, eventId = {eventId}, valuesDict = {valuesDict}")
+
+        if typeId == "multiButtonPress" and (click_timeout := valuesDict.get('click_timeout', "")):
+            try:
+                if float(click_timeout) <= 0:
+                    raise ValueError
+            except ValueError:
+                errorsDict = indigo.Dict()
+                errorsDict['click_timeout'] = "Click Timeout must be a number of seconds greater than zero, or blank."
+                return False, valuesDict, errorsDict
+
+        return True, valuesDict
+
+    def validateDeviceConfigUi(self, valuesDict: indigo.Dict, typeId: str, devId: int) -> tuple[bool, indigo.Dict] | tuple[bool, indigo.Dict, indigo.Dict]:
         self.logger.debug(f"validateDeviceConfigUi, typeId = {typeId}, devId = {devId}, valuesDict = {valuesDict}")
 
         if typeId == 'leapBridge':
-            self.event_loop.create_task(self.lap_pair(devId, valuesDict['address']))
+            self.submit_to_loop(self.lap_pair(devId, valuesDict['address']), "lap_pair")
+
+        elif event_throttle := valuesDict.get('event_throttle', ""):
+            try:
+                if float(event_throttle) < 0:
+                    raise ValueError
+            except ValueError:
+                errorsDict = indigo.Dict()
+                errorsDict['event_throttle'] = "Event Throttle must be a number of seconds, 0 or more, or blank."
+                return False, valuesDict, errorsDict
 
         return True, valuesDict
 
     def deviceStartComm(self, device: indigo.Device) -> None:
         self.logger.threaddebug(f"{device.name}: Starting Device")
+        self.device_cache[device.id] = device
 
         if device.deviceTypeId == 'leapBridge':
             self.leap_bridges[device.id] = None  # create a placeholder for the bridge object, created asynchronously
-            self.bridge_connected_events[device.id] = asyncio.Event()  # create an event to wait for the bridge to connect
+            self.load_catalog_snapshot(device)
             if device.pluginProps['paired'] == 'true':
-                self.bridge_connect_tasks[device.id] = self.event_loop.create_task(self.bridge_connect(device))
+                self.bridge_connect_tasks[device.id] = self.submit_to_loop(self.bridge_connect(device), f"{device.name}: bridge_connect")
             else:
                 self.logger.warning(f"{device.name}: Not paired, skipping connect")
         elif device.deviceTypeId == DEV_BATTERY:
-            # battery status has no push subscription; poll it directly, on the periodic schedule from then on
-            self.event_loop.create_task(self.async_start_battery_device(device))
+            # battery status has no push subscription, battery_status_loop polls it when it's due
+            pass
         else:
-            self.leap_devices[device.address] = device.id
-            self.event_loop.create_task(self.async_start_device(device))
+            self.leap_devices[sys.intern(device.address)] = device.id
+            self.submit_to_loop(self.async_start_device(device), f"{device.name}: async_start_device")
 
         device.stateListOrDisplayStateIdChanged()
 
     def deviceStopComm(self, device: indigo.Device) -> None:
         self.logger.threaddebug(f"{device.name}: Stopping Device")
+        self.call_on_loop(self.device_states_written.pop, device.id, None)
+        self.device_cache.pop(device.id, None)
+        self.call_on_loop(self.cancel_optimistic, device.id)
+        self.call_on_loop(self.cancel_event_throttle, device.id)
+        self.call_on_loop(self.drop_device_event_handler, device)
+        self.call_on_loop(self.forget_started_device, device)
         if device.deviceTypeId == 'leapBridge':
             task = self.bridge_connect_tasks.pop(device.id, None)
             if task and not task.done():
                 task.cancel()
+            self.bridge_retry_wakeups.pop(device.id, None)
+            self.link_health.pop(device.id, None)
+            # devices started from now on wait for the next connect; ones already waiting keep waiting on the pending future
+            if self.is_bridge_ready(device.id):
+                self.bridge_ready_futures.pop(device.id, None)
+            self.device_start_progress.pop(device.id, None)
             bridge = self.leap_bridges.pop(device.id, None)
+            if scheduler := self.bridge_schedulers.pop(device.id, None):
+                self.call_on_loop(scheduler.close)
             if bridge:
-                self.event_loop.create_task(bridge.close())
+                # keep the last known levels for the next start
+                self.submit_to_loop(self.save_catalog_snapshot(device), f"{device.name}: save_catalog_snapshot")
+                self.submit_to_loop(bridge.close(), f"{device.name}: close")
 
-    async def async_start_battery_device(self, device: indigo.Device) -> None:
+    async def async_start_device(self, device: indigo.Device) -> None:
         bridge_id = int(device.pluginProps['bridge'])
+        ready = self.bridge_ready(bridge_id)
+        progress = self.device_start_progress.setdefault(bridge_id, [0, 0])
+        progress[1] += 1
 
-        # wait for the associated bridge to connect
-        while not self.bridge_connected_events.get(bridge_id, None):
-            await asyncio.sleep(1)
-        await self.bridge_connected_events[bridge_id].wait()
+        # wait for the associated bridge to connect, showing the last known state in the meantime
+        if not ready.done() and bridge_id in self.catalog_snapshots:
+            self.show_snapshot_states(device, bridge_id)
+        bridge = await asyncio.shield(ready)    # shielded, other devices are waiting on the same future
 
-        await self.poll_battery_device(device)
+        self.start_device(device, bridge_id, bridge)
+        await asyncio.sleep(0)  # let the loop read bridge traffic between device starts
 
-    async def async_start_device(self, device: indigo.Device) -> None:
-
-        # wait for the associated bridge to connect
-        while not self.bridge_connected_events.get(int(device.pluginProps['bridge']), None):
-            await asyncio.sleep(1)
-
-        bridge_id = int(device.pluginProps['bridge'])
-        await self.bridge_connected_events[bridge_id].wait()
-        bridge = self.leap_bridges[bridge_id]
+        progress[0] += 1
+        if progress[0] == progress[1] or progress[0] % max(1, progress[1] // 10) == 0:
+            bridge_dev = self.get_device(bridge_id)
+            self.write_states(bridge_dev, [{'key': "devices_started", 'value': f"{progress[0]}/{progress[1]}"}])
+            self.logger.debug(f"{bridge_dev.name}: {progress[0]} of {progress[1]} devices started")
 
+    def start_device(self, device: indigo.Device, bridge_id: int, bridge: Smartbridge) -> None:
         if device.deviceTypeId == 'occupancy_group':
             occupancy_group_id = device.pluginProps['device']
             leap_data = bridge.occupancy_groups[occupancy_group_id]
             self.logger.threaddebug(f"{device.name}: async_start_device leap_data = {leap_data}")
-            bridge.add_occupancy_subscriber(occupancy_group_id, lambda group_id=occupancy_group_id: self.occupancy_event(bridge_id, group_id))
-            occupied = leap_data['status'] == "Occupied"
-            device.updateStateOnServer("onOffState", occupied, uiValue="Occupied" if occupied else "Unoccupied")
-
-            if leap_data['status'] == "Occupied":
-                device.updateStateImageOnServer(indigo.kStateImageSel.MotionSensorTripped)
-            else:
-                device.updateStateImageOnServer(indigo.kStateImageSel.MotionSensor)
-
-            update_list = [
-                {'key': "area", 'value': leap_data['area']},
-                {'key': "occupancy_group_id", 'value': leap_data['occupancy_group_id']},
-                {'key': "sensors", 'value': json.dumps(leap_data['sensors'])},
-                {'key': "name", 'value': leap_data['name']},
-                {'key': "device_name", 'value': leap_data['device_name']},
-            ]
-            try:
-                device.updateStatesOnServer(update_list)
-            except Exception as e:
-                self.logger.error(f"{device.name}: failed to update states: {e}")
+            bridge.add_occupancy_subscriber(occupancy_group_id, BridgeEventRoute(self.occupancy_event, bridge_id, occupancy_group_id))
+            self.started_devices.setdefault(bridge_id, set()).add(device.id)
+            self.update_group_states(device, leap_data)
         else:
             leap_device_id = device.pluginProps['device']
             try:
@@ -673,8 +2113,19 @@ class Plugin(indigo.PluginBase):
                 self.logger.error(f"{device.name}: async_start_device: Exception getting device {leap_device_id} from bridge: {e}")
                 return
             self.logger.threaddebug(f"{device.name}: async_start_device leap_data = {leap_data}")
-            bridge.add_subscriber(leap_device_id, lambda device_id=leap_device_id: self.device_event(bridge_id, device_id))
-            self.update_device_states(device, leap_data)
+            self.compile_device_event_handler(device)
+            bridge.add_subscriber(leap_device_id, BridgeEventRoute(self.device_event, bridge_id, leap_device_id))
+            self.started_devices.setdefault(bridge_id, set()).add(device.id)
+            self.write_states(device, self.device_update_list(device, leap_data))
+
+    def show_snapshot_states(self, device: indigo.Device, bridge_id: int) -> None:
+        """Show the last known state from the catalog snapshot until the bridge connects."""
+        if device.deviceTypeId == DEV_GROUP:
+            if leap_data := self.leap_known_groups[bridge_id].get(device.pluginProps['device']):
+                self.update_group_states(device, leap_data)
+        elif leap_data := self.leap_known_devices[bridge_id].get(device.pluginProps['device']):
+            self.write_states(device, self.device_update_list(device, leap_data))
+        self.logger.threaddebug(f"{device.name}: showing last known state from catalog snapshot")
 
     ########################################
     # callbacks from device creation UI
@@ -699,56 +2150,30 @@ class Plugin(indigo.PluginBase):
         return scenes
 
     def get_area_path(self, area_id: Optional[str], bridge_id: int) -> Optional[str]:
-        if not area_id:
+        if not (index := self.catalog_indexes.get(bridge_id)):
             return None
+        return index.area_path(area_id, self.leap_areas[bridge_id])
 
-        area = self.leap_areas[bridge_id].get(area_id)
-        if not area.get("parent_id"):
-            return area.get('name')
-        else:
-            if parent_path := self.get_area_path(area.get("parent_id"), bridge_id):
-                return f"{parent_path}/{area.get('name')}"
-            else:
-                return area.get('name')
+    def get_area_list(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[str, str]]:
+        self.logger.threaddebug(f"get_area_list: typeId = {typeId}, targetId = {targetId}, filter = {filter}, valuesDict = {valuesDict}")
+        areas = self.leap_areas.get(targetId, {})
+        return sorted(((area_id, self.get_area_path(area_id, targetId) or area['name']) for area_id, area in areas.items()), key=lambda tup: tup[1])
+
+    def get_light_device_list(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[int, str]]:
+        self.logger.threaddebug(f"get_light_device_list: typeId = {typeId}, targetId = {targetId}, filter = {filter}, valuesDict = {valuesDict}")
+        retList = [(dev.id, dev.name) for dev in indigo.devices.iter("self") if dev.deviceTypeId in (DEV_SWITCH, DEV_DIMMER, DEV_COLOR)]
+        retList.sort(key=lambda tup: tup[1])
+        return retList
 
     def get_button_list(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[str, str]]:
         self.logger.threaddebug(f"get_button_list: typeId = {typeId}, targetId = {targetId}, filter = {filter}, valuesDict = {valuesDict}")
         bridge_id = int(valuesDict.get('bridge', targetId))
         buttons = []
-        if bridge_id:
-            for button in self.leap_buttons.get(bridge_id, {}).values():
-                address = f"{bridge_id}:{button['device_id']}"
-                parent_device = self.leap_known_devices.get(bridge_id, {}).get(button.get('parent_device'))
-
-                # build a full path name for the button, starting with the area (if defined)
-                name = ""
-
-                if parent_device:
-                    if area := self.get_area_path(parent_device.get('area'), bridge_id):
-                        name = f"{area}/"
-
-                    if control_station_name := parent_device.get('control_station_name'):
-                        name += f"{control_station_name}/"
-
-                    if parent_device_name := parent_device.get('device_name'):
-                        name += f"{parent_device_name}/"
-
-                name += f"({button.get('button_number')}) {button.get('device_name')} ({button['device_id']})"
-                buttons.append((address, name))
-            buttons.sort(key=lambda tup: tup[1])
-        self.logger.threaddebug(f"get_button_list: {buttons=}")
+        if bridge_id and (index := self.catalog_indexes.get(bridge_id)):
+            buttons = index.filtered(index.button_list, filter)
+        self.logger.threaddebug(f"get_button_list: {len(buttons)} buttons")
         return buttons
 
-    def linkable_devices(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[int, str]]:
-        self.logger.threaddebug(f"linkable_devices, {typeId=}, {targetId=}, {filter=}, valuesDict = {valuesDict}")
-        retList = []
-        for dev in indigo.devices:
-            if hasattr(dev, "onState"):
-                if dev.pluginId != self.pluginId:
-                    retList.append((dev.id, dev.name))
-        retList.sort(key=lambda tup: tup[1])
-        return retList
-
     # doesn't do anything, just needed to force other menus to dynamically refresh
     def menuChanged(self, valuesDict: Optional[indigo.Dict] = None, typeId: Optional[str] = None, devId: Optional[int] = None) -> Optional[indigo.Dict]:  # noqa
         self.logger.threaddebug(f"menuChanged: typeId = {typeId}, devId = {devId}, valuesDict = {valuesDict}")
@@ -769,32 +2194,37 @@ class Plugin(indigo.PluginBase):
         bridge = self.get_connected_bridge(device.pluginProps["bridge"], device.name, "actionControlDimmerRelay")
         if not bridge:
             return
+        leap_device_id = device.pluginProps["device"]
+
+        # relative changes start from the level already on its way to the bridge, not the last reported one
+        current_level = self.intended_value(device, "level", getattr(device, "brightness", 100 if device.onState else 0))
 
         if action.deviceAction == indigo.kDeviceAction.TurnOn:
-            self.create_bridge_task(bridge.turn_on(device.pluginProps["device"]), device.name, "turn_on")
+            self.queue_device_command(device, "level", lambda: bridge.turn_on(leap_device_id), "turn_on", target=100)
 
         elif action.deviceAction == indigo.kDeviceAction.TurnOff:
-            self.create_bridge_task(bridge.turn_off(device.pluginProps["device"]), device.name, "turn_off")
+            self.queue_device_command(device, "level", lambda: bridge.turn_off(leap_device_id), "turn_off", target=0)
 
         elif action.deviceAction == indigo.kDeviceAction.Toggle:
-            if device.onState:
-                self.create_bridge_task(bridge.turn_off(device.pluginProps["device"]), device.name, "toggle (off)")
+            if current_level > 0:
+                self.queue_device_command(device, "level", lambda: bridge.turn_off(leap_device_id), "toggle (off)", target=0)
             else:
-                self.create_bridge_task(bridge.turn_on(device.pluginProps["device"]), device.name, "toggle (on)")
+                self.queue_device_command(device, "level", lambda: bridge.turn_on(leap_device_id), "toggle (on)", target=100)
 
         elif action.deviceAction == indigo.kDeviceAction.SetBrightness:
-            self.create_bridge_task(bridge.set_value(device.pluginProps["device"], clamp(action.actionValue, 0, 100)), device.name, "set_brightness")
+            level = clamp(action.actionValue, 0, 100)
+            self.queue_device_command(device, "level", lambda: bridge.set_value(leap_device_id, level), "set_brightness", target=level)
 
         elif action.deviceAction == indigo.kDimmerRelayAction.BrightenBy:
-            self.create_bridge_task(
-                bridge.set_value(device.pluginProps["device"], clamp(device.brightness + action.actionValue, 0, 100)), device.name, "brighten_by")
+            level = clamp(current_level + action.actionValue, 0, 100)
+            self.queue_device_command(device, "level", lambda: bridge.set_value(leap_device_id, level), "brighten_by", target=level)
 
         elif action.deviceAction == indigo.kDimmerRelayAction.DimBy:
-            self.create_bridge_task(
-                bridge.set_value(device.pluginProps["device"], clamp(device.brightness - action.actionValue, 0, 100)), device.name, "dim_by")
+            level = clamp(current_level - action.actionValue, 0, 100)
+            self.queue_device_command(device, "level", lambda: bridge.set_value(leap_device_id, level), "dim_by", target=level)
 
         elif action.deviceAction == indigo.kDeviceAction.SetColorLevels:
-            leap_device = bridge.devices.get(device.pluginProps["device"])
+            leap_device = bridge.devices.get(leap_device_id)
             if not leap_device:
                 self.logger.warning(f"{device.name}: SetColorLevels: device not found on bridge")
                 return
@@ -806,8 +2236,8 @@ class Plugin(indigo.PluginBase):
                 else:
                     kelvin = int(action.actionValue['whiteTemperature'])
                     self.logger.debug(f"{device.name}: Setting white temperature to {kelvin}K")
-                    self.create_bridge_task(
-                        bridge.set_value(device.pluginProps["device"], color_value=WarmCoolColorValue(kelvin)), device.name, "set_white_temperature")
+                    self.queue_device_command(device, "color", lambda: bridge.set_value(leap_device_id, color_value=WarmCoolColorValue(kelvin)),
+                                              "set_white_temperature")
 
             elif device.supportsRGB and ('redLevel' in action.actionValue or 'greenLevel' in action.actionValue or 'blueLevel' in action.actionValue):
                 if leap_type not in COLOR_TUNABLE_LEAP_TYPES:
@@ -818,9 +2248,9 @@ class Plugin(indigo.PluginBase):
                     blue = action.actionValue.get('blueLevel', 0) / 100.0
                     hue, saturation, _value = colorsys.rgb_to_hsv(red, green, blue)
                     self.logger.debug(f"{device.name}: Setting color to hue={hue * 360:.0f}, saturation={saturation * 100:.0f}")
-                    self.create_bridge_task(
-                        bridge.set_value(device.pluginProps["device"], color_value=FullColorValue(int(hue * 360), int(saturation * 100))),
-                        device.name, "set_color")
+                    self.queue_device_command(device, "color",
+                                              lambda: bridge.set_value(leap_device_id, color_value=FullColorValue(int(hue * 360), int(saturation * 100))),
+                                              "set_color")
 
             else:
                 self.logger.debug(f"{device.name}: SetColorLevels, unsupported color change")
@@ -838,95 +2268,196 @@ class Plugin(indigo.PluginBase):
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "actionControlSpeedControl")
         if not bridge:
             return
+        leap_device_id = dev.pluginProps["device"]
+
+        # relative changes start from the speed already on its way to the bridge, not the last reported one
+        current_speed = self.intended_value(dev, "fan", dev.states['fan_speed'])
+        current_index = _FAN_SPEED_INDEX.get(current_speed, dev.speedIndex)
 
         if action.speedControlAction == indigo.kSpeedControlAction.TurnOn:
             last_speed = dev.pluginProps.get("last_speed", "Medium")
-            self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], last_speed), dev.name, "fan_turn_on")
+            self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, last_speed), "fan_turn_on", target=last_speed)
 
         elif action.speedControlAction == indigo.kSpeedControlAction.TurnOff:
             newProps = dev.pluginProps
-            newProps['last_speed'] = dev.states['fan_speed']    # save the last speed
+            newProps['last_speed'] = current_speed    # save the last speed
             dev.replacePluginPropsOnServer(newProps)
-            self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], "Off"), dev.name, "fan_turn_off")
+            self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, "Off"), "fan_turn_off", target="Off")
 
         elif action.speedControlAction == indigo.kSpeedControlAction.Toggle:
-            if dev.onState:
+            if current_index > 0:
                 newProps = dev.pluginProps
-                newProps['last_speed'] = dev.states['fan_speed']    # save the last speed
+                newProps['last_speed'] = current_speed    # save the last speed
                 dev.replacePluginPropsOnServer(newProps)
-                self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], "Off"), dev.name, "fan_toggle (off)")
+                self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, "Off"), "fan_toggle (off)", target="Off")
             else:
                 last_speed = dev.pluginProps.get("last_speed", "Medium")
-                self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], last_speed), dev.name, "fan_toggle (on)")
+                self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, last_speed), "fan_toggle (on)", target=last_speed)
 
         elif action.speedControlAction == indigo.kSpeedControlAction.SetSpeedIndex:
             speed = _FAN_SPEED_MAP.get(action.actionValue, "Medium")
             self.logger.debug(f"{dev.name}: SetSpeedIndex to {action.actionValue}, speed = {speed}")
-            self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], speed), dev.name, "set_speed_index")
+            self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, speed), "set_speed_index", target=speed)
 
         elif action.speedControlAction == indigo.kSpeedControlAction.IncreaseSpeedIndex:
-            speed = _FAN_SPEED_MAP.get(min(dev.speedIndex + action.actionValue, 3))
+            speed = _FAN_SPEED_MAP.get(min(current_index + action.actionValue, 3))
             self.logger.debug(f"{dev.name}: IncreaseSpeedIndex by {action.actionValue}, speed = {speed}")
-            self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], speed), dev.name, "increase_speed_index")
+            self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, speed), "increase_speed_index", target=speed)
 
         elif action.speedControlAction == indigo.kSpeedControlAction.DecreaseSpeedIndex:
-            speed = _FAN_SPEED_MAP.get(max(dev.speedIndex - action.actionValue, 0))
+            speed = _FAN_SPEED_MAP.get(max(current_index - action.actionValue, 0))
             self.logger.debug(f"{dev.name}: DecreaseSpeedIndex by {action.actionValue}, speed = {speed}")
-            self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], speed), dev.name, "decrease_speed_index")
+            self.queue_device_command(dev, "fan", lambda: bridge.set_fan(leap_device_id, speed), "decrease_speed_index", target=speed)
 
     ########################################
     # Plugin Actions object callbacks (pluginAction is an Indigo plugin action instance)
     ########################################
 
-    def activate_smart_away_action(self, _pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> None:
+    def activate_smart_away_action(self, _pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(bridge_dev.id, bridge_dev.name, "activate_smart_away_action")
         if not bridge:
-            return
+            return False
         self.logger.debug(f"{bridge_dev.name}: Activating Smart Away")
-        self.create_bridge_task(bridge.activate_smart_away(), bridge_dev.name, "activate_smart_away")
+        return self.send_bridge_command(bridge.activate_smart_away, bridge_dev.name, "activate_smart_away", bridge_dev.id, key="activate_smart_away")
 
-    def deactivate_smart_away_action(self, _pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> None:
+    def deactivate_smart_away_action(self, _pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(bridge_dev.id, bridge_dev.name, "deactivate_smart_away_action")
         if not bridge:
-            return
+            return False
         self.logger.debug(f"{bridge_dev.name}: Deactivating Smart Away")
-        self.create_bridge_task(bridge.deactivate_smart_away(), bridge_dev.name, "deactivate_smart_away")
+        return self.send_bridge_command(bridge.deactivate_smart_away, bridge_dev.name, "deactivate_smart_away", bridge_dev.id, key="deactivate_smart_away")
 
-    def activate_scene_action(self, pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> None:
+    def activate_scene_action(self, pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(bridge_dev.id, bridge_dev.name, "activate_scene_action")
         if not bridge:
-            return
+            return False
         scene_id = pluginAction.props["scene_id"]
         self.logger.debug(f"{bridge_dev.name}: Activating scene {scene_id}")
-        self.create_bridge_task(bridge.activate_scene(scene_id), bridge_dev.name, "activate_scene")
+        return self.send_bridge_command(functools.partial(bridge.activate_scene, scene_id), bridge_dev.name, "activate_scene", bridge_dev.id,
+                                        key=("scene", scene_id))
 
-    def tap_button_action(self, pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> None:
+    def tap_button_action(self, pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(bridge_dev.id, bridge_dev.name, "tap_button_action")
         if not bridge:
-            return
+            return False
         button_address = pluginAction.props["button_address"]
         self.logger.debug(f"{bridge_dev.name}: Tapping button {button_address}")
-        self.create_bridge_task(bridge.tap_button(button_address.split(":")[1]), bridge_dev.name, "tap_button")
+        # not deduplicated, two taps queued together are two taps
+        return self.send_bridge_command(functools.partial(bridge.tap_button, button_address.split(":")[1]), bridge_dev.name, "tap_button", bridge_dev.id)
 
-    def fade_dimmer_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> None:
+    def batch_set_level_action(self, pluginAction: indigo.PluginAction, bridge_dev: indigo.Device) -> dict[str, Any]:
+        """Set every light in an area (optionally with its sub-areas), or in a list of devices, to one level at once.
+        The result is returned to scripts, e.g.
+
+            plugin = indigo.server.getPlugin("com.flyingdiver.indigoplugin.lutron-leap")
+            result = plugin.executeAction("batch_set_level", deviceId=bridge_id, waitUntilDone=True,
+                                          props={"target_type": "area", "area_id": "12", "include_subareas": True, "brightness": "40"})
+        """
+        props = pluginAction.props
+        try:
+            level = clamp(float(indigo.activePlugin.substitute(str(props.get("brightness", "")))), 0, 100)
+            fade_time_str = indigo.activePlugin.substitute(str(props.get("fadeTime", "")))
+            fade_time = timedelta(seconds=float(fade_time_str)) if fade_time_str else None
+            kelvin_str = indigo.activePlugin.substitute(str(props.get("whiteTemperature", "")))
+            kelvin = int(float(kelvin_str)) if kelvin_str else None
+        except ValueError as e:
+            self.logger.warning(f"{bridge_dev.name}: batch_set_level: invalid value: {e}")
+            return {"success": False, "requested": 0, "succeeded": 0, "superseded": 0, "failed": [], "error": str(e)}
+
+        devices = self.batch_targets(bridge_dev.id, props)
+        if not devices:
+            self.logger.warning(f"{bridge_dev.name}: batch_set_level: no lights to set")
+            return {"success": False, "requested": 0, "succeeded": 0, "superseded": 0, "failed": [], "error": "no lights to set"}
+
+        self.logger.debug(f"{bridge_dev.name}: batch_set_level: {len(devices)} lights to {level}")
+        finished, result = self.run_on_loop(self.batch_set_level(devices, level, fade_time, kelvin), f"{bridge_dev.name}: batch_set_level",
+                                            BATCH_ACTION_TIMEOUT)
+        if not finished:
+            return {"success": False, "requested": len(devices), "succeeded": 0, "superseded": 0, "failed": [], "error": "timed out"}
+
+        level_name = logging.INFO if result["success"] else logging.WARNING
+        self.logger.log(level_name, f"{bridge_dev.name}: batch_set_level: {result['succeeded']} of {result['requested']} lights set"
+                                    f"{', failed: ' + ', '.join(result['failed']) if result['failed'] else ''}")
+        return result
+
+    def batch_targets(self, bridge_id: int, props: indigo.Dict) -> list[indigo.Device]:
+        """The enabled light devices a batch action applies to: the ones whose LEAP device is in the area (and its
+        sub-areas if asked), or the listed devices."""
+        lights = (DEV_SWITCH, DEV_DIMMER, DEV_COLOR)
+        if props.get("target_type", "area") == "devices":
+            device_ids = {int(device_id) for device_id in props.get("device_list", [])}
+            return [dev for dev in indigo.devices.iter("self") if dev.id in device_ids and dev.deviceTypeId in lights and dev.enabled]
+
+        area_ids = {props.get("area_id", "")}
+        if props.get("include_subareas", False):
+            children: dict[Optional[str], list[str]] = {}
+            for area_id, area in self.leap_areas.get(bridge_id, {}).items():
+                children.setdefault(area.get('parent_id'), []).append(area_id)
+            pending = list(area_ids)
+            while pending:
+                for child in children.get(pending.pop(), ()):
+                    if child not in area_ids:
+                        area_ids.add(child)
+                        pending.append(child)
+
+        known_devices = self.leap_known_devices.get(bridge_id, {})
+        return [dev for dev in indigo.devices.iter("self")
+                if dev.deviceTypeId in lights and dev.enabled and int(dev.pluginProps.get("bridge", 0)) == bridge_id
+                and known_devices.get(dev.pluginProps.get("device"), {}).get('area') in area_ids]
+
+    async def batch_set_level(self, devices: list[indigo.Device], level: float, fade_time: Optional[timedelta] = None,
+                              kelvin: Optional[int] = None) -> dict[str, Any]:
+        """Send the level to all the devices concurrently, at batch priority so interactive commands still go first. Each
+        goes through the device's command lane, so it's ordered with the device's other commands, and is shown
+        optimistically like a single device command."""
+
+        async def set_device(device: indigo.Device) -> Optional[bool]:
+            bridge_id = int(device.pluginProps["bridge"])
+            bridge = self.leap_bridges.get(bridge_id)
+            if not bridge or not self.is_bridge_ready(bridge_id):
+                self.logger.debug(f"{device.name}: batch_set_level: bridge not connected")
+                return False
+            leap_device_id = device.pluginProps["device"]
+            if device.deviceTypeId == DEV_SWITCH:
+                factory = functools.partial(bridge.turn_on if level > 0 else bridge.turn_off, leap_device_id)
+            elif kelvin is not None and bridge.devices.get(leap_device_id, {}).get("type") in WHITE_TUNABLE_LEAP_TYPES + COLOR_TUNABLE_LEAP_TYPES:
+                factory = functools.partial(bridge.set_value, leap_device_id, level, fade_time, color_value=WarmCoolColorValue(kelvin))
+            else:
+                factory = functools.partial(bridge.set_value, leap_device_id, level, fade_time)
+
+            done = self.event_loop.create_future()
+            self.submit_device_command(device, self.command_lane(device), "level", factory, "batch_set_level", level, done, PRIORITY_BATCH)
+            return await done
+
+        results = await asyncio.gather(*(set_device(device) for device in devices))
+        failed = [device.name for device, success in zip(devices, results) if success is False]
+        return {
+            "success": not failed,
+            "requested": len(devices),
+            "succeeded": sum(1 for success in results if success),
+            "superseded": sum(1 for success in results if success is None),
+            "failed": failed,
+        }
+
+    def fade_dimmer_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "fade_dimmer_action")
         if not bridge:
-            return
+            return False
         brightness = float(indigo.activePlugin.substitute(pluginAction.props["brightness"]))
         fadeTime = timedelta(seconds=float(indigo.activePlugin.substitute(pluginAction.props["fadeTime"])))
         self.logger.debug(f"{dev.name}: Fading to {brightness} over {fadeTime.total_seconds()}s")
-        self.create_bridge_task(bridge.set_value(dev.pluginProps["device"], brightness, fadeTime), dev.name, "fade_dimmer")
+        return self.queue_device_command(dev, "level", lambda: bridge.set_value(dev.pluginProps["device"], brightness, fadeTime), "fade_dimmer", target=brightness)
 
-    def set_warm_dim_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> None:
+    def set_warm_dim_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "set_warm_dim_action")
         if not bridge:
-            return
+            return False
 
         enabled = str(pluginAction.props.get("enabled", "true")).lower() == "true"
 
@@ -942,49 +2473,51 @@ class Plugin(indigo.PluginBase):
 
         fade_time_seconds = f"{fade_time.total_seconds()}s" if fade_time is not None else None
         self.logger.debug(f"{dev.name}: Setting warm dim: enabled={enabled}, value={value}, fade_time={fade_time_seconds}")
-        self.create_bridge_task(bridge.set_warm_dim(dev.pluginProps["device"], enabled, value, fade_time), dev.name, "set_warm_dim")
+        # its own kind, so a level command queued after it doesn't replace the warm dim setting
+        return self.queue_device_command(dev, "warm_dim", lambda: bridge.set_warm_dim(dev.pluginProps["device"], enabled, value, fade_time),
+                                         "set_warm_dim")
 
-    def start_raising_action(self, _pluginAction: indigo.PluginAction, dev: indigo.Device) -> None:
+    def start_raising_action(self, _pluginAction: indigo.PluginAction, dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "start_raising_action")
         if not bridge:
-            return
+            return False
         self.logger.debug(f"{dev.name}: Raising")
-        self.create_bridge_task(bridge.raise_cover(dev.pluginProps["device"]), dev.name, "start_raising")
+        return self.queue_device_command(dev, "level", lambda: bridge.raise_cover(dev.pluginProps["device"]), "start_raising")
 
-    def start_lowering_action(self, _pluginAction: indigo.PluginAction, dev: indigo.Device) -> None:
+    def start_lowering_action(self, _pluginAction: indigo.PluginAction, dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "start_lowering_action")
         if not bridge:
-            return
+            return False
         self.logger.debug(f"{dev.name}: Lowering")
-        self.create_bridge_task(bridge.lower_cover(dev.pluginProps["device"]), dev.name, "start_lowering")
+        return self.queue_device_command(dev, "level", lambda: bridge.lower_cover(dev.pluginProps["device"]), "start_lowering")
 
-    def stop_shade_action(self, _pluginAction: indigo.PluginAction, device: indigo.Device) -> None:
+    def stop_shade_action(self, _pluginAction: indigo.PluginAction, device: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(device.pluginProps["bridge"], device.name, "stop_shade_action")
         if not bridge:
-            return
+            return False
         self.logger.debug(f"{device.name}: Stopping")
-        self.create_bridge_task(bridge.stop_cover(device.pluginProps["device"]), device.name, "stop_shade")
+        return self.queue_device_command(device, "level", lambda: bridge.stop_cover(device.pluginProps["device"]), "stop_shade")
 
-    def set_tilt_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> None:
+    def set_tilt_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "set_tilt_action")
         if not bridge:
-            return
+            return False
         tilt = float(indigo.activePlugin.substitute(pluginAction.props["tilt"]))
         self.logger.debug(f"{dev.name}: Tilting to {tilt}")
-        self.create_bridge_task(bridge.set_tilt(dev.pluginProps["device"], tilt), dev.name, "set_tilt")
+        return self.queue_device_command(dev, "tilt", lambda: bridge.set_tilt(dev.pluginProps["device"], tilt), "set_tilt", target=tilt)
 
-    def set_fan_speed_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> None:
+    def set_fan_speed_action(self, pluginAction: indigo.PluginAction, dev: indigo.Device) -> Optional[bool]:
 
         bridge = self.get_connected_bridge(dev.pluginProps["bridge"], dev.name, "set_fan_speed_action")
         if not bridge:
-            return
+            return False
         fan_speed = pluginAction.props["fan_speed"]
         self.logger.debug(f"{dev.name}: Setting fan speed: {fan_speed}")
-        self.create_bridge_task(bridge.set_fan(dev.pluginProps["device"], fan_speed), dev.name, "set_fan_speed")
+        return self.queue_device_command(dev, "fan", lambda: bridge.set_fan(dev.pluginProps["device"], fan_speed), "set_fan_speed", target=fan_speed)
 
     ########################################
 
@@ -999,79 +2532,193 @@ class Plugin(indigo.PluginBase):
         self.logger.info(f"Scenes:\n{json.dumps(self.leap_scenes[bridge_id], sort_keys=True, indent=4)}")
         self.logger.info(f"Areas:\n{json.dumps(self.leap_areas[bridge_id], sort_keys=True, indent=4)}")
         self.logger.info(f"Groups:\n{json.dumps(self.leap_known_groups[bridge_id], sort_keys=True, indent=4)}")
+        self.call_on_loop(self.log_catalog_memory, bridge_id)
         return True
 
+    def log_catalog_memory(self, bridge_id: int) -> None:
+        """Log roughly how much memory the bridge's catalog and the plugin's structures built on it take. Shared objects
+        are counted once, against whichever is listed first. Runs on the event loop, where the catalog is updated."""
+        seen: set[int] = set()
+        sizes = [(category, len(cache.get(bridge_id, {})), deep_sizeof(cache.get(bridge_id, {}), seen))
+                 for category, cache in self.catalog_caches().items()]
+        if index := self.catalog_indexes.get(bridge_id):
+            sizes.append(("labels and area paths", len(index.device_labels) + len(index.button_labels), deep_sizeof(index, seen)))
+        sizes.append(("change fingerprints", sum(len(f) for f in self.catalog_fingerprints.get(bridge_id, {}).values()),
+                      deep_sizeof(self.catalog_fingerprints.get(bridge_id, {}), seen)))
+        if bridge := self.leap_bridges.get(bridge_id):
+            subscribers = [getattr(bridge, name, {}) for name in ("_subscribers", "_button_subscribers", "_occupancy_subscribers")]
+            sizes.append(("event subscriptions", sum(len(s) for s in subscribers), sum(deep_sizeof(s, seen) for s in subscribers)))
+        self.logger.info(f"Catalog memory, {sum(size for _, _, size in sizes) / 1024:.1f} KB in all:")
+        for name, count, size in sizes:
+            self.logger.info(f"    {name}: {count} entries, {size / 1024:.1f} KB")
+
+    def menu_log_statistics(self) -> None:
+        counters = self.write_counters
+        self.logger.info("Indigo state writes:")
+        self.logger.info(f"    updateStatesOnServer calls sent: {counters['updates_sent']}, skipped (nothing changed): {counters['updates_skipped']}")
+        self.logger.info(f"    states sent: {counters['states_sent']}, skipped (unchanged): {counters['states_skipped']}")
+        self.logger.info(f"    merged by the writer thread into an update already waiting: {self.writer.updates_merged}, "
+                         f"updates made by the writer thread: {self.writer.updates_sent}")
+        superseded = sum(lane.superseded for lane in list(self.command_lanes.values()))
+        self.logger.info(f"Device commands replaced by a newer command before being sent: {superseded}")
+        for scheduler in list(self.bridge_schedulers.values()):
+            self.logger.info(f"{scheduler.name}: commands waiting {scheduler.depth}, in flight {scheduler.in_flight}, rejected {scheduler.rejected}, "
+                             f"background shed {scheduler.shed}, repeats dropped {scheduler.deduplicated}")
+        suppressed = sorted(list(self.events_suppressed.items()), key=lambda item: item[1], reverse=True)
+        self.logger.info(f"Device events coalesced by event throttling: {sum(count for _, count in suppressed)}")
+        for (_, dev_id), count in suppressed[:EVENT_THROTTLE_TOP_DEVICES]:
+            if dev_id in indigo.devices:
+                self.logger.info(f"    {indigo.devices[dev_id].name}: {count}")
+        if not self.instrumentation:
+            self.logger.info("Bridge timing statistics are collected when instrumentation is turned on in the plugin config")
+            return
+        self.call_on_loop(self.log_metrics)
+
+    def log_metrics(self) -> None:
+        """Log the timing percentiles collected for each bridge. Runs on the event loop, where they're recorded."""
+        self.logger.info(f"Event loop tasks pending: {len(asyncio.all_tasks(self.event_loop))}, buttons in a multi-press sequence: "
+                         f"{len(self.button_taps)} (peak {self.multi_press_peak})")
+        for bridge_id, metrics in list(self.bridge_metrics.items()):
+            if bridge_id not in self.leap_bridges:
+                continue
+            self.logger.info(f"{indigo.devices[bridge_id].name}: commands in flight {metrics.in_flight}, errors {metrics.errors}, "
+                             f"disconnected errors {metrics.disconnect_errors}, reconnects {metrics.reconnects}")
+            for action_name, histogram in sorted(metrics.commands.items()):
+                self.logger.info(f"    command {action_name}: {histogram.summary()}")
+            for handler, histogram in sorted(metrics.events.items()):
+                self.logger.info(f"    event {handler}: {histogram.summary()}")
+
     def menu_create_devices_for_bridge(self, valuesDict: indigo.Dict, _typeId: str) -> bool:
-        self.event_loop.create_task(self.create_devices_for_bridge(valuesDict))
+        self.submit_to_loop(self.create_devices_for_bridge(valuesDict), "create_devices_for_bridge")
         return True
 
     ########################################
-    # Methods to handle the Manage Linked Devices dialog
+    # Methods to handle the Manage Rules dialog
     ########################################
 
-    def add_linked_device(self, valuesDict: indigo.Dict, _typeId: str, _devId: int) -> None:
-        self.logger.debug(f"add_linked_device: valuesDict: {valuesDict}")
-
-        controlling_button = valuesDict["controlling_button"]
-        linked_device_id = valuesDict["linked_device"]
-        link_name = valuesDict["link_name"]
-
-        if controlling_button is None:
-            self.logger.error(f"add_linked_device: controlling_button {controlling_button} not found")
-            return
-
-        self.logger.debug(f"add_linked_device: controlling_button: {controlling_button}")
-
-        link_id = f"{controlling_button}-{linked_device_id}"
-        if len(link_name) == 0:
-            link_name = link_id
-        link_item = {"name": link_name, "controlling_button": controlling_button, "linked_device_id": linked_device_id}
-        self.logger.debug(f"Adding link_item {link_id}: {link_item}")
-        self.linked_device_list[link_id] = link_item
-        self.log_linked_devices()
-
-        indigo.activePlugin.pluginPrefs["linked_devices"] = json.dumps(self.linked_device_list)
-
-    def delete_linked_devices(self, valuesDict: indigo.Dict, _typeId: str, _devId: int) -> None:
+    def load_rules(self) -> None:
+        if saved := self.pluginPrefs.get("rules"):
+            self.rules = {rule.rule_id: rule for rule in (Rule(*fields) for fields in json.loads(saved))}
+        elif saved := self.pluginPrefs.get("linked_devices"):
+            # linked devices toggled their device on a button press, which is a press/toggle rule
+            for link_item in json.loads(saved).values():
+                rule = Rule(link_item["name"], link_item["controlling_button"], "press", 1, "toggle", str(link_item["linked_device_id"]), 0)
+                self.rules[rule.rule_id] = rule
+            self.logger.info(f"Converted {len(self.rules)} linked devices to rules")
+            self.save_rules()
+            del self.pluginPrefs["linked_devices"]
+        self.rule_index = self.build_rule_index()
+        self.log_rules()
+
+    def save_rules(self) -> None:
+        self.pluginPrefs["rules"] = json.dumps([list(rule) for rule in self.rules.values()], separators=(",", ":"))
+        self.rule_index = self.build_rule_index()
+
+    def build_rule_index(self) -> dict[tuple[str, str], tuple[Rule, ...]]:
+        index: dict[tuple[str, str], list[Rule]] = {}
+        for rule in self.rules.values():
+            index.setdefault((sys.intern(rule.source), rule.condition), []).append(rule)
+        return {key: tuple(rules) for key, rules in index.items()}
+
+    def add_rule(self, valuesDict: indigo.Dict, _typeId: str, _devId: int) -> indigo.Dict | tuple[indigo.Dict, indigo.Dict]:
+        self.logger.debug(f"add_rule: valuesDict: {valuesDict}")
+        errorsDict = indigo.Dict()
+        source_type = valuesDict.get("source_type", "button")
+        source = valuesDict.get("source_button" if source_type == "button" else "source_group", "")
+        condition = valuesDict.get("condition", "")
+        action = valuesDict.get("action", "")
+        target = valuesDict.get({"scene": "target_scene", "tap": "target_button"}.get(action, "target_device"), "")
+        if not source:
+            errorsDict["source_button" if source_type == "button" else "source_group"] = "Choose what the rule listens to."
+        if condition not in (("press", "release", "taps") if source_type == "button" else ("occupied", "vacant")):
+            errorsDict["condition"] = "Choose a condition for this source."
+        if not target:
+            errorsDict["action"] = "Choose what the rule controls."
+        try:
+            taps = int(valuesDict.get("taps") or 1) if condition == "taps" else 1
+            level = int(clamp(float(valuesDict.get("level") or 0), 0, 100)) if action == "level" else 0
+            if taps < 1:
+                raise ValueError
+        except ValueError:
+            errorsDict["taps" if condition == "taps" else "level"] = "Must be a number."
+            taps, level = 1, 0
+        if errorsDict:
+            return valuesDict, errorsDict
+
+        rule = Rule(valuesDict.get("rule_name", ""), str(source), condition, taps, action, str(target), level)
+        if not rule.name:
+            rule = rule._replace(name=rule.rule_id)
+        self.logger.debug(f"Adding rule {rule.rule_id}: {rule}")
+        self.rules[rule.rule_id] = rule
+        self.save_rules()
+        self.log_rules()
+        return valuesDict
 
-        for item in valuesDict["linkedDeviceList"]:
-            self.logger.info(f"deleting device {item}")
-            del self.linked_device_list[item]
+    def delete_rules(self, valuesDict: indigo.Dict, _typeId: str, _devId: int) -> None:
+        for rule_id in valuesDict["rule_list"]:
+            if rule := self.rules.pop(rule_id, None):
+                self.logger.info(f"deleting rule {rule.name}")
+        self.save_rules()
+        self.log_rules()
+
+    def list_rules(self, _filter: str, _valuesDict: indigo.Dict, _typeId: str, _targetId: int) -> list[tuple[str, str]]:
+        return sorted(((rule_id, rule.name) for rule_id, rule in self.rules.items()), key=lambda item: item[1])
+
+    def get_rule_conditions(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[str, str]]:
+        if (valuesDict or {}).get("source_type", "button") == "group":
+            return [("occupied", "Occupied"), ("vacant", "Vacant")]
+        return [("press", "Pressed"), ("release", "Released"), ("taps", "Multi-Tap")]
+
+    def get_rule_devices(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[int, str]]:
+        """This plugin's lights and shades, which rules control on the bridge directly, and any other plugin's on/off devices."""
+        retList = [(dev.id, dev.name) for dev in indigo.devices
+                   if (dev.deviceTypeId in RULE_DIRECT_TYPES if dev.pluginId == self.pluginId else hasattr(dev, "onState"))]
+        retList.sort(key=lambda tup: tup[1])
+        return retList
 
-        self.log_linked_devices()
-        indigo.activePlugin.pluginPrefs["linked_devices"] = json.dumps(self.linked_device_list)
+    def get_rule_scene_list(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[str, str]]:
+        bridge_id = int((valuesDict or {}).get('bridge') or 0)
+        return sorted(((f"{bridge_id}:{k}", v['name']) for k, v in self.leap_scenes.get(bridge_id, {}).items()), key=lambda tup: tup[1])
 
-    def list_linked_devices(self, _filter: str, _valuesDict: indigo.Dict, _typeId: str, _targetId: int) -> list[tuple[str, str]]:
-        returnList = list()
-        for linkID, linkItem in self.linked_device_list.items():
-            returnList.append((linkID, linkItem["name"]))
-        return sorted(returnList, key=lambda item: item[1])
+    def get_occupancy_group_list(self, filter: str = "", valuesDict: Optional[indigo.Dict] = None, typeId: str = "", targetId: int = 0) -> list[tuple[str, str]]:
+        bridge_id = int((valuesDict or {}).get('bridge') or 0)
+        groups = [(f"{bridge_id}:{group_id}", f"{self.get_area_path(group.get('area'), bridge_id) or group.get('name')} ({group_id})")
+                  for group_id, group in self.leap_known_groups.get(bridge_id, {}).items()]
+        return sorted(groups, key=lambda tup: tup[1])
 
-    def log_linked_devices(self) -> None:
-        if len(self.linked_device_list) == 0:
-            self.logger.info("No linked Devices")
+    def log_rules(self) -> None:
+        if len(self.rules) == 0:
+            self.logger.info("No rules")
             return
 
-        fstring = "{:^25} {:^25} {:^20} {:^20}"
-        self.logger.info(fstring.format("Link ID", "Link Name", "Controlling Button", "Linked Device"))
-        for link_id, link_item in self.linked_device_list.items():
-            self.logger.info(fstring.format(link_id, link_item["name"], link_item["controlling_button"], link_item["linked_device_id"]))
+        fstring = "{:^25} {:^20} {:^12} {:^10} {:^20}"
+        self.logger.info(fstring.format("Rule Name", "Source", "Condition", "Action", "Target"))
+        for rule in self.rules.values():
+            condition = f"{rule.taps} taps" if rule.condition == "taps" else rule.condition
+            action = f"level {rule.level}" if rule.action == "level" else rule.action
+            self.logger.info(fstring.format(rule.name, rule.source, condition, action, rule.target))
 
     ########################################
 
     async def create_devices_for_bridge(self, valuesDict: indigo.Dict) -> None:
+        """Work out the Indigo devices the bridge's catalog calls for, on the event loop, then hand them to the writer
+        thread to look up, create and rename, so the loop doesn't wait on the server."""
 
         group_by = valuesDict["group_by"]
         rename_devices = bool(valuesDict["rename_devices"])
-        self.logger.info(f"Creating Devices, Grouping = {group_by}")
+        dry_run = bool(valuesDict.get("dry_run", False))
+        self.logger.info(f"Creating Devices, Grouping = {group_by}{' (dry run, no changes will be made)' if dry_run else ''}")
 
         bridge_id = int(valuesDict["bridge"])
-        bridge = self.get_connected_bridge(bridge_id, indigo.devices[bridge_id].name, "create_devices_for_bridge")
+        bridge = self.get_connected_bridge(bridge_id, self.get_device(bridge_id).name, "create_devices_for_bridge")
         if not bridge:
             return
 
+        # (device type, name, address, props) for everything the bridge knows about
+        wanted: list[tuple[str, str, str, dict[str, Any]]] = []
+
         for device in bridge.get_devices().values():
-            self.logger.debug(f"Working on device: {json.dumps(device, sort_keys=True, indent=4)}")
+            self.logger.threaddebug(f"Working on device: {json.dumps(device, sort_keys=True, indent=4)}")
 
             if device['type'] in ['SmartBridge', 'SmartBridge Pro', 'RadioRa3Processor']:
                 self.logger.debug(f"Skipping Bridge device type {device['type']}")
@@ -1097,14 +2744,9 @@ class Plugin(indigo.PluginBase):
                 self.logger.warning(f"Unknown Lutron device type {device['type']}: {device}")
                 continue
 
-            # build a full path name for the device
-            parent_device = self.leap_known_devices[bridge_id].get(device.get('parent_device'))
-            name = f"{self.get_area_path(device.get('area'), bridge_id)}"
-            if parent_device and (parent_device_control_station_name := parent_device.get('control_station_name')):
-                name += f"/{parent_device_control_station_name}"
-            if parent_device and (parent_device_name := parent_device.get('device_name')):
-                name += f"/{parent_device_name}"
-            name += f"/{device.get('device_name')} ({device['device_id']})"
+            # the full path name for the device
+            index = self.catalog_indexes[bridge_id]
+            name = index.device_labels.get(device['device_id']) or index.device_label(device, self.leap_known_devices[bridge_id])
 
             address = f"{bridge_id}:{device['device_id']}"
             props = {
@@ -1112,8 +2754,7 @@ class Plugin(indigo.PluginBase):
                 "device": device['device_id'],
             }
 
-            self.logger.info(f"Creating Device '{name}' ({address})")
-            self.create_leap_device(device_type, name, address, props, group_by, rename_devices)
+            wanted.append((device_type, name, address, props))
 
         for group in bridge.occupancy_groups.values():
 
@@ -1125,13 +2766,54 @@ class Plugin(indigo.PluginBase):
                 "device": group['occupancy_group_id'],
             }
 
-            self.logger.info(f"Creating Occupancy Group '{name}' ({address})")
-            self.create_leap_device(DEV_GROUP, name, address, props, group_by, rename_devices)
+            wanted.append((DEV_GROUP, name, address, props))
 
-        self.logger.info("Creating Devices done.")
-        return
+        self.writer.call(self.apply_bridge_devices, bridge_id, wanted, group_by, rename_devices, dry_run)
 
-    def create_leap_device(self, devType: str, name: str, address: str, props: dict[str, Any], group_by: str = "None", rename_devices: bool = False) -> Optional[indigo.Device]:
+    def apply_bridge_devices(self, bridge_id: int, wanted: list[tuple[str, str, str, dict[str, Any]]], group_by: str,
+                             rename_devices: bool, dry_run: bool) -> None:
+        """The server half of create_devices_for_bridge, run on the writer thread."""
+
+        # one pass over the Indigo devices, instead of one per LEAP device
+        existing_devices = {device.address: device for device in indigo.devices.iter("self")}
+        created, renamed, unchanged = [], [], []
+        folder_ids: dict[str, int] = {}
+
+        for device_type, name, address, props in wanted:
+            if device := existing_devices.get(address):
+                if rename_devices and device.name != name:
+                    renamed.append(f"'{device.name}' -> '{name}'")
+                else:
+                    unchanged.append(name)
+                if dry_run:
+                    continue
+            else:
+                created.append(f"{device_type} '{name}' ({address})")
+                if dry_run:
+                    continue
+            self.create_leap_device(device_type, name, address, props, group_by, rename_devices, existing_devices, folder_ids)
+
+        # devices for this bridge that the bridge no longer reports.  They're left alone, just reported.
+        wanted_addresses = {address for _, _, address, _ in wanted}
+        orphaned = [f"'{device.name}' ({address})" for address, device in existing_devices.items()
+                    if device.deviceTypeId != 'leapBridge' and address.split(":")[0] == str(bridge_id) and address not in wanted_addresses]
+
+        if dry_run:     # otherwise create_leap_device has already logged them
+            for item in created:
+                self.logger.info(f"Would create {item}")
+        verb = "Would rename" if dry_run else "Renamed"
+        for item in renamed:
+            self.logger.info(f"{verb} {item}")
+        for item in orphaned:
+            self.logger.info(f"Orphaned (not found on bridge): {item}")
+        self.logger.info(f"Creating Devices done{' (dry run)' if dry_run else ''}: {len(created)} created, {len(renamed)} renamed, "
+                         f"{len(unchanged)} unchanged, {len(orphaned)} orphaned")
+
+    def create_leap_device(self, devType: str, name: str, address: str, props: dict[str, Any], group_by: str = "None", rename_devices: bool = False,
+                           existing_devices: Optional[dict[str, indigo.Device]] = None, folder_ids: Optional[dict[str, int]] = None) -> Optional[indigo.Device]:
+        """Create the Indigo device for a LEAP device, or return (and optionally rename) the one that already has this address.
+        existing_devices (address -> device) and folder_ids (folder name -> id) let bulk callers avoid a lookup per device,
+        newly created devices and folders are added to them."""
 
         self.logger.threaddebug(f"create_leap_device: devType = {devType}, name = {name}, address = {address}, props = {props}")
 
@@ -1146,29 +2828,34 @@ class Plugin(indigo.PluginBase):
         }
 
         # first, make sure this device doesn't exist.  Unless I screwed up, the addresses should be unique
-        # it would be more efficient to search through the internal device lists, but a pain to code.
         # If it does exist, update with the new properties
 
-        for device in indigo.devices.iter("self"):
-            if device.address == address:  # existing device
-                self.logger.debug(f"Indigo device: '{name}' ({address}) already exists")
+        if existing_devices is None:
+            existing_devices = {device.address: device for device in indigo.devices.iter("self")}
+        if folder_ids is None:
+            folder_ids = {}
 
-                if rename_devices and device.name != name:
-                    self.logger.debug(f"Renaming '{device.name}' to '{name}'")
-                    device.name = name
-                    device.replaceOnServer()
+        if device := existing_devices.get(address):  # existing device
+            self.logger.debug(f"Indigo device: '{name}' ({address}) already exists")
 
-                return device
+            if rename_devices and device.name != name:
+                self.logger.debug(f"Renaming '{device.name}' to '{name}'")
+                device.name = name
+                device.replaceOnServer()
+
+            return device
 
         # Pick the folder for this device, create it if necessary
 
         if group_by == "Type":
             folder_name = folder_name_dict[devType]
-            if folder_name in indigo.devices.folders:
-                folder_id = indigo.devices.folders[folder_name].id
+            if folder_name in folder_ids:
+                folder_id = folder_ids[folder_name]
+            elif folder_name in indigo.devices.folders:
+                folder_id = folder_ids[folder_name] = indigo.devices.folders[folder_name].id
             else:
                 self.logger.debug(f"Creating Device Folder: '{folder_name}'")
-                folder_id = indigo.devices.folder.create(folder_name).id
+                folder_id = folder_ids[folder_name] = indigo.devices.folder.create(folder_name).id
 
         elif group_by == "None":
             folder_name = "DEVICES"
@@ -1186,5 +2873,7 @@ class Plugin(indigo.PluginBase):
         except Exception as e:
             self.logger.error(f"Error in indigo.device.create(): {e}")
             newDevice = None
+        else:
+            existing_devices[address] = newDevice
 
         return newDevice
@@ -0,0 +1,264 @@
+#! /usr/bin/env python
+"""Offline benchmarks for the plugin's hot paths, running plugin.py against fake_indigo and FakeSmartbridge.
+
+    python tools/benchmark.py --output after.json --compare before.json
+
+pylutron_caseta and zeroconf must be installed (see the plugin's requirements.txt), only the Indigo server and the
+bridge are faked. Each benchmark reports throughput and per-call latency percentiles, plus the Indigo server round
+trips it caused, and the results are written as JSON so runs can be compared.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fake_indigo     # noqa: E402
+from fake_smartbridge import FakeSmartbridge, synthetic_catalog     # noqa: E402
+
+PLUGIN_PATH = Path(__file__).resolve().parent.parent / "Lutron Leap.indigoPlugin" / "Contents" / "Server Plugin" / "plugin.py"
+PLUGIN_ID = "com.flyingdiver.indigoplugin.lutronleap"
+
+
+def load_plugin_module() -> Any:
+    sys.modules["indigo"] = fake_indigo
+    spec = importlib.util.spec_from_file_location("plugin", PLUGIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.Smartbridge = FakeSmartbridge
+    return module
+
+
+def summarize(samples: list[float], total: float, **extra: Any) -> dict[str, Any]:
+    """samples are per-call seconds, total is the wall time for all of them."""
+    ordered = sorted(samples) or [0.0]
+
+    def percentile(percent: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(percent / 100.0 * len(ordered)))] * 1000.0, 4)
+
+    return {
+        "count": len(samples),
+        "total_s": round(total, 4),
+        "ops_per_s": round(len(samples) / total, 1) if total else None,
+        "mean_ms": round(statistics.fmean(ordered) * 1000.0, 4),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000.0, 4),
+        **extra,
+    }
+
+
+def timed(call: Callable[[], Any], samples: list[float]) -> Any:
+    start = time.perf_counter()
+    result = call()
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+class Bench:
+    def __init__(self, module: Any, args: argparse.Namespace) -> None:
+        self.module = module
+        self.args = args
+        self.bridges_created = 0
+
+    def new_plugin(self) -> Any:
+        prefs = fake_indigo.Dict(logLevel=str(self.args.log_level), instrumentation=self.args.instrumentation, click_timeout="0.5")
+        plugin = self.module.Plugin(PLUGIN_ID, "Lutron Leap", "benchmark", prefs)
+        plugin.event_loop = asyncio.get_running_loop()
+        plugin.writer.start()
+        fake_indigo.activePlugin = plugin
+        return plugin
+
+    def new_bridge_device(self, plugin: Any) -> Any:
+        """A paired bridge device at a fresh address, so no catalog snapshot from an earlier benchmark is found."""
+        self.bridges_created += 1
+        bridge_dev = fake_indigo.Device("Benchmark Bridge", f"192.0.2.{self.bridges_created}", "leapBridge", {"paired": "true"})
+        fake_indigo.devices[bridge_dev.id] = bridge_dev
+        Path(f"{plugin.ssl_file_path(bridge_dev.address)}.key").touch()
+        return bridge_dev
+
+    def create_load_devices(self, bridge_dev: Any, catalog: dict) -> list[Any]:
+        devices = []
+        for leap_device in catalog["devices"].values():
+            if leap_device["zone"] is None:
+                continue
+            device_type = "leapDimmer" if "Dimmer" in leap_device["type"] else "leapSwitch"
+            device = fake_indigo.Device(leap_device["name"], f"{bridge_dev.id}:{leap_device['device_id']}", device_type,
+                                        {"bridge": bridge_dev.id, "device": leap_device["device_id"]})
+            fake_indigo.devices[device.id] = device
+            devices.append(device)
+        for group in catalog["occupancy_groups"].values():
+            device = fake_indigo.Device(group["name"], f"{bridge_dev.id}:GROUP.{group['occupancy_group_id']}", "occupancy_group",
+                                        {"bridge": bridge_dev.id, "device": group["occupancy_group_id"]})
+            fake_indigo.devices[device.id] = device
+            devices.append(device)
+        return devices
+
+    async def start_bridge(self, plugin: Any, bridge_dev: Any, devices: list[Any]) -> None:
+        plugin.deviceStartComm(bridge_dev)
+        for device in devices:
+            plugin.deviceStartComm(device)
+        await plugin.bridge_ready(bridge_dev.id)
+        while devices and plugin.device_start_progress.get(bridge_dev.id, [0, 1])[0] < len(devices):
+            await asyncio.sleep(0.001)
+
+    async def run(self) -> dict[str, dict[str, Any]]:
+        args = self.args
+        results = {}
+        catalog = synthetic_catalog(devices=args.devices, seed=args.seed)
+        FakeSmartbridge.catalog = catalog
+        FakeSmartbridge.latency = args.latency / 1000.0
+
+        # startup to all devices ready
+        fake_indigo.reset()
+        plugin = self.new_plugin()
+        bridge_dev = self.new_bridge_device(plugin)
+        devices = self.create_load_devices(bridge_dev, catalog)
+        start = time.perf_counter()
+        await self.start_bridge(plugin, bridge_dev, devices)
+        plugin.writer.flush()
+        elapsed = time.perf_counter() - start
+        results["startup"] = summarize([elapsed], elapsed, devices=len(devices), **dict(fake_indigo.stats))
+        bridge = plugin.leap_bridges[bridge_dev.id]
+
+        # device_event storm
+        loads = [leap_id for leap_id, leap_device in catalog["devices"].items() if leap_device["zone"] is not None]
+        before, samples = dict(fake_indigo.stats), []
+        start = time.perf_counter()
+        for n in range(args.events):
+            leap_id = loads[n % len(loads)]
+            level = (n * 37) % 101
+            timed(lambda: bridge.emit_device_event(leap_id, level), samples)
+            if n % 100 == 99:
+                await asyncio.sleep(0)
+        plugin.writer.flush()   # the per-event samples are the loop's share, the total includes the writer thread's
+        results["device_event"] = summarize(samples, time.perf_counter() - start, updates=fake_indigo.stats["updates"] - before["updates"])
+
+        # button_event with many triggers
+        button_ids = list(catalog["buttons"])
+        for n in range(args.triggers):
+            button_address = f"{bridge_dev.id}:{button_ids[n % len(button_ids)]}"
+            if n % 4 == 3:
+                trigger = fake_indigo.Trigger(f"Multi {n}", "multiButtonPress", {"button_address": button_address, "clicks": str(1 + n % 3)})
+            else:
+                trigger = fake_indigo.Trigger(f"Button {n}", "buttonEvent",
+                                              {"button_address": button_address, "event_type": "Press" if n % 2 else "Release"})
+            fake_indigo.triggers[trigger.id] = trigger
+            plugin.triggerStartProcessing(trigger)
+        before, samples = dict(fake_indigo.stats), []
+        start = time.perf_counter()
+        for n in range(args.events):
+            button_id = button_ids[n % len(button_ids)]
+            timed(lambda: bridge.emit_button_event(button_id, "Press"), samples)
+            timed(lambda: bridge.emit_button_event(button_id, "Release"), samples)
+            if n % 100 == 99:
+                await asyncio.sleep(0)
+        plugin.writer.flush()
+        results["button_event"] = summarize(samples, time.perf_counter() - start, triggers=args.triggers,
+                                            trigger_executes=fake_indigo.stats["trigger_executes"] - before["trigger_executes"])
+
+        # config dialog button list
+        values = fake_indigo.Dict(bridge=str(bridge_dev.id))
+        samples = []
+        start = time.perf_counter()
+        for n in range(args.dialog_calls):
+            timed(lambda: plugin.get_button_list("Button 3" if n % 2 else "", values), samples)
+        results["get_button_list"] = summarize(samples, time.perf_counter() - start, buttons=len(button_ids))
+
+        # the bridge moves to a new address, and Indigo restarts it; its devices have to follow it to the new Smartbridge
+        throttle_wait = max(self.module.EVENT_THROTTLE_DEFAULTS.values()) + 0.1
+        for leap_id in loads:
+            bridge.emit_device_event(leap_id, 100)
+        await asyncio.sleep(throttle_wait)    # past any throttle window, so only the new Smartbridge's events can turn them off
+        start = time.perf_counter()
+        plugin.move_bridge(bridge_dev, f"{bridge_dev.address}0")
+        plugin.deviceStopComm(bridge_dev)
+        bridge_dev.address = bridge_dev.pluginProps["address"]
+        plugin.deviceStartComm(bridge_dev)
+        await plugin.bridge_ready(bridge_dev.id)
+        elapsed = time.perf_counter() - start
+        bridge = plugin.leap_bridges[bridge_dev.id]
+        for leap_id in loads:
+            bridge.emit_device_event(leap_id, 0)
+        await asyncio.sleep(throttle_wait)
+        plugin.writer.flush()
+        following = sum(1 for device in devices if device.deviceTypeId != "occupancy_group" and device.states.get("onOffState") is False)
+        results["bridge_move"] = summarize([elapsed], elapsed, devices=len(loads), devices_following=following)
+
+        # create_devices_for_bridge, into an empty database and again with every device already there
+        plugin.writer.stop()
+        fake_indigo.reset()
+        plugin = self.new_plugin()
+        bridge_dev = self.new_bridge_device(plugin)
+        await self.start_bridge(plugin, bridge_dev, [])
+        options = fake_indigo.Dict(bridge=str(bridge_dev.id), group_by="Type", rename_devices=False, create_bridge_buttons=False)
+        for name in ("create_devices_for_bridge", "create_devices_for_bridge_existing"):
+            before = dict(fake_indigo.stats)
+            start = time.perf_counter()
+            await plugin.create_devices_for_bridge(options)
+            plugin.writer.flush()   # the devices are created on the writer thread
+            elapsed = time.perf_counter() - start
+            results[name] = summarize([elapsed], elapsed, devices=len(catalog["devices"]),
+                                      created=fake_indigo.stats["device_creates"] - before["device_creates"])
+        plugin.writer.stop()
+        return results
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> None:
+    print(f"\n{'benchmark':38} {'metric':10} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("ops_per_s", "p50_ms", "p99_ms"):
+            old, new = baseline[name].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            print(f"{name:38} {metric:10} {old:12.4f} {new:12.4f} {(new - old) / old * 100.0:+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000, help="LEAP devices in the synthetic catalog")
+    parser.add_argument("--triggers", type=int, default=1000, help="button triggers for the button_event benchmark")
+    parser.add_argument("--events", type=int, default=5000, help="events per event benchmark")
+    parser.add_argument("--dialog-calls", type=int, default=200, help="get_button_list calls")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated bridge command latency, ms")
+    parser.add_argument("--log-level", type=int, default=20, help="plugin log level, as in the plugin config")
+    parser.add_argument("--instrumentation", action="store_true", help="turn on the plugin's bridge instrumentation")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the synthetic catalog")
+    parser.add_argument("--output", default="bench_output.json", help="JSON file for the results")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(Bench(load_plugin_module(), args).run())
+    for name, result in results.items():
+        print(f"{name:38} {json.dumps(result)}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {os.path.abspath(args.output)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Stand-in for the `indigo` module that Indigo injects into plugins, with just enough of the API for plugin.py to run
+outside the Indigo server. Server round trips (updateStatesOnServer, trigger executes, device creation) are counted
+in `stats` so benchmarks can report them.
+
+Install it before loading the plugin:
+
+    import fake_indigo
+    sys.modules["indigo"] = fake_indigo
+"""
+
+import itertools
+import logging
+import tempfile
+from typing import Any, Optional
+
+THREADDEBUG = 5
+logging.addLevelName(THREADDEBUG, "THREADDEBUG")
+
+stats: dict[str, int] = {}
+_ids = itertools.count(100000)
+
+
+def reset() -> None:
+    """Forget all devices, triggers and folders, and zero the counters."""
+    devices.clear()
+    devices.folders.clear()
+    triggers.clear()
+    stats.update(updates=0, states=0, trigger_executes=0, device_creates=0, device_toggles=0, state_images=0)
+
+
+class Dict(dict):
+    pass
+
+
+class List(list):
+    pass
+
+
+class PluginLogger(logging.Logger):
+    def threaddebug(self, msg: Any, *args, **kwargs) -> None:
+        if self.isEnabledFor(THREADDEBUG):
+            self._log(THREADDEBUG, msg, args, **kwargs)
+
+
+class Device:
+    def __init__(self, name: str, address: str = "", deviceTypeId: str = "", props: Optional[dict] = None,
+                 pluginId: str = "com.flyingdiver.indigoplugin.lutronleap", folderId: int = 0) -> None:
+        self.id: int = next(_ids)
+        self.name = name
+        self.address = address
+        self.deviceTypeId = deviceTypeId
+        self.pluginId = pluginId
+        self.folderId = folderId
+        self.pluginProps = Dict(props or {})
+        self.states = Dict()
+        self.enabled = True
+        self.onState = False
+        self.brightness = 0
+        self.speedIndex = 0
+        self.supportsRGB = False
+        self.supportsWhiteTemperature = False
+
+    def updateStatesOnServer(self, update_list: list[dict[str, Any]]) -> None:
+        stats["updates"] += 1
+        stats["states"] += len(update_list)
+        for item in update_list:
+            self.states[item['key']] = item['value']
+
+    def updateStateOnServer(self, key: str, value: Any, uiValue: Optional[str] = None) -> None:
+        self.updateStatesOnServer([{'key': key, 'value': value, 'uiValue': uiValue}])
+
+    def updateStateImageOnServer(self, selector: Any) -> None:
+        stats["state_images"] += 1
+
+    def replacePluginPropsOnServer(self, props: dict) -> None:
+        self.pluginProps = Dict(props)
+
+    def replaceOnServer(self) -> None:
+        pass
+
+    def stateListOrDisplayStateIdChanged(self) -> None:
+        pass
+
+    def setErrorStateOnServer(self, message: Optional[str]) -> None:
+        pass
+
+
+class Trigger:
+    def __init__(self, name: str, pluginTypeId: str, props: Optional[dict] = None) -> None:
+        self.id: int = next(_ids)
+        self.name = name
+        self.pluginTypeId = pluginTypeId
+        self.pluginProps = Dict(props or {})
+
+
+class PluginAction:
+    def __init__(self, props: Optional[dict] = None, **kwargs) -> None:
+        self.props = Dict(props or {})
+        self.__dict__.update(kwargs)
+
+
+class _Folder:
+    def __init__(self, name: str) -> None:
+        self.id: int = next(_ids)
+        self.name = name
+
+
+class _FolderFactory:
+    @staticmethod
+    def create(name: str) -> _Folder:
+        folder = devices.folders[name] = _Folder(name)
+        return folder
+
+
+class _DeviceCollection(dict):
+    def __init__(self) -> None:
+        super().__init__()
+        self.folders: dict[str, _Folder] = {}
+        self.folder = _FolderFactory
+
+    def iter(self, filter: str = "") -> list[Device]:
+        return list(self.values())
+
+    def subscribeToChanges(self) -> None:
+        pass
+
+
+class _DeviceCommands:
+    @staticmethod
+    def create(protocol: Any, address: str = "", name: str = "", deviceTypeId: str = "", props: Optional[dict] = None,
+               folder: int = 0) -> Device:
+        stats["device_creates"] += 1
+        device = Device(name, address, deviceTypeId, props, folderId=folder)
+        devices[device.id] = device
+        return device
+
+    @staticmethod
+    def toggle(device_id: int) -> None:
+        stats["device_toggles"] += 1
+
+
+class _TriggerCommands:
+    @staticmethod
+    def execute(trigger_id: int) -> None:
+        stats["trigger_executes"] += 1
+
+
+class _Server:
+    install_folder: str = tempfile.mkdtemp(prefix="fake-indigo-")
+
+    def getInstallFolderPath(self) -> str:
+        return self.install_folder
+
+    def log(self, message: str, *args, **kwargs) -> None:
+        print(message)
+
+
+class PluginBase:
+    def __init__(self, pluginId: str, pluginDisplayName: str, pluginVersion: str, pluginPrefs: Dict) -> None:
+        # Indigo's plugin logger passes everything down to its handlers, which filter at the plugin's log level
+        self.logger = PluginLogger(f"Plugin.{pluginId}")
+        self.logger.setLevel(THREADDEBUG)
+        self.indigo_log_handler = logging.NullHandler()
+        self.plugin_file_handler = logging.NullHandler()
+        self.logger.addHandler(self.indigo_log_handler)
+        self.logger.addHandler(self.plugin_file_handler)
+        self.pluginId = pluginId
+        self.pluginPrefs = pluginPrefs
+        self.stopThread = False
+
+    def deviceDeleted(self, device: Device) -> None:
+        pass
+
+    def deviceUpdated(self, oldDevice: Device, newDevice: Device) -> None:
+        pass
+
+    def stopConcurrentThread(self) -> None:
+        self.stopThread = True
+
+    def substitute(self, text: str) -> str:
+        return text
+
+
+class kProtocol:
+    Plugin = "Plugin"
+
+
+class kStateImageSel:
+    MotionSensor = "MotionSensor"
+    MotionSensorTripped = "MotionSensorTripped"
+
+
+class kDeviceAction:
+    TurnOn, TurnOff, Toggle, SetBrightness, SetColorLevels, RequestStatus = range(6)
+
+
+class kDimmerRelayAction:
+    BrightenBy, DimBy = range(10, 12)
+
+
+class kSpeedControlAction:
+    TurnOn, TurnOff, Toggle, SetSpeedIndex, SetSpeedLevel, IncreaseSpeedIndex, DecreaseSpeedIndex = range(20, 27)
+
+
+devices = _DeviceCollection()
+triggers: dict[int, Trigger] = {}
+device = _DeviceCommands
+trigger = _TriggerCommands
+server = _Server()
+activePlugin: Optional[PluginBase] = None
+
+reset()
@@ -0,0 +1,219 @@
+"""Stand-in for pylutron_caseta's Smartbridge, serving a synthetic catalog with the same entry layout, for running
+plugin.py without Lutron hardware. Commands complete after a configurable latency and echo the new level back to the
+device's subscriber like a real bridge does; the emit_* methods generate events as if they came from the bridge."""
+
+import asyncio
+import random
+from typing import Any, Callable, Optional
+
+DIMMER_TYPES = ("WallDimmer", "PlugInDimmer", "SunnataDimmer")
+SWITCH_TYPES = ("WallSwitch", "PlugInSwitch")
+KEYPAD_TYPES = ("Pico3ButtonRaiseLower", "SunnataKeypad")
+
+
+def synthetic_catalog(devices: int = 100, keypad_share: float = 0.25, buttons_per_keypad: int = 5, areas: int = 20,
+                      groups: int = 10, scenes: int = 20, seed: int = 1) -> dict[str, dict[str, dict[str, Any]]]:
+    """A catalog of roughly `devices` loads and keypads spread over a two level area tree, as dicts keyed by id in the
+    layout Smartbridge uses for devices, buttons, scenes, areas and occupancy_groups."""
+    rng = random.Random(seed)
+    catalog: dict[str, dict[str, dict[str, Any]]] = {"devices": {}, "buttons": {}, "scenes": {}, "areas": {}, "occupancy_groups": {}}
+
+    catalog["areas"]["1"] = {"id": "1", "name": "House", "parent_id": None}
+    for n in range(2, areas + 2):
+        parent = "1" if n < 2 + max(1, areas // 5) else str(rng.randint(2, 1 + max(1, areas // 5)))
+        catalog["areas"][str(n)] = {"id": str(n), "name": f"Area {n}", "parent_id": parent}
+    area_ids = [area_id for area_id in catalog["areas"] if area_id != "1"]
+
+    catalog["devices"]["1"] = {"device_id": "1", "name": "Smart Bridge", "type": "SmartBridge", "model": "L-BDG2-WH", "serial": 1234,
+                               "area": None, "zone": None, "button_groups": None, "occupancy_sensors": None, "device_name": "Smart Bridge",
+                               "current_state": -1, "fan_speed": None, "tilt": None}
+    next_id = 100
+    for n in range(devices):
+        next_id += 1
+        device_id, area = str(next_id), rng.choice(area_ids)
+        keypad = rng.random() < keypad_share
+        device_type = rng.choice(KEYPAD_TYPES if keypad else DIMMER_TYPES + SWITCH_TYPES)
+        device_name = f"{'Keypad' if keypad else 'Load'} {n}"
+        device: dict[str, Any] = {"device_id": device_id, "name": f"{catalog['areas'][area]['name']}_{device_name}", "type": device_type,
+                                  "model": f"MODEL-{device_type}", "serial": 10000 + n, "area": area, "zone": None if keypad else device_id,
+                                  "button_groups": None, "occupancy_sensors": None, "device_name": device_name,
+                                  "current_state": -1 if keypad else rng.choice((0, 25, 50, 100)), "fan_speed": None, "tilt": None}
+        catalog["devices"][device_id] = device
+        if keypad:
+            device["button_groups"] = [f"{device_id}0"]
+            for button_number in range(1, buttons_per_keypad + 1):
+                next_id += 1
+                button_id = str(next_id)
+                catalog["buttons"][button_id] = {
+                    "device_id": button_id, "current_state": "Release", "button_number": button_number, "button_group": f"{device_id}0",
+                    "name": device["name"], "type": device_type, "model": device["model"], "serial": device["serial"],
+                    "button_name": f"Button {button_number}", "button_led": None, "device_name": f"Button {button_number}",
+                    "parent_device": device_id}
+
+    for n in range(1, groups + 1):
+        area = area_ids[n % len(area_ids)]
+        catalog["occupancy_groups"][str(n)] = {"occupancy_group_id": str(n), "status": "Unoccupied", "sensors": [],
+                                              "name": f"{catalog['areas'][area]['name']} Occupancy", "device_name": "Occupancy", "area": area}
+    for n in range(1, scenes + 1):
+        catalog["scenes"][str(n)] = {"scene_id": str(n), "name": f"Scene {n}"}
+    return catalog
+
+
+class FakeSmartbridge:
+    """Serves `catalog` (see synthetic_catalog) through the parts of the Smartbridge API the plugin uses. Set the class
+    attributes before the plugin connects, create_tls builds each bridge from them."""
+
+    catalog: Optional[dict[str, dict[str, dict[str, Any]]]] = None
+    latency: float = 0.0        # seconds each bridge command takes
+    connect_latency: float = 0.0
+
+    def __init__(self, catalog: dict[str, dict[str, dict[str, Any]]], on_connect_callback: Optional[Callable[[], None]] = None) -> None:
+        self.devices = catalog["devices"]
+        self.buttons = catalog["buttons"]
+        self.scenes = catalog["scenes"]
+        self.areas = catalog["areas"]
+        self.occupancy_groups = catalog["occupancy_groups"]
+        self._on_connect_callback = on_connect_callback
+        self._login_task: Optional[asyncio.Task] = None
+        self._login_completed: Optional[asyncio.Future] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._subscribers: dict[str, Callable[[], None]] = {}
+        self._button_subscribers: dict[str, Callable[[str], None]] = {}
+        self._occupancy_subscribers: dict[str, Callable[[], None]] = {}
+        self._smart_away_subscribers: list[Callable[[str], None]] = []
+        self.commands_sent: int = 0
+        self.offline: bool = False      # set to have pings go unanswered and new sessions fail to open
+
+    @classmethod
+    def create_tls(cls, hostname: str, keyfile: str, certfile: str, ca_certs: str, port: int = 8081,
+                   on_connect_callback: Optional[Callable[[], None]] = None) -> "FakeSmartbridge":
+        return cls(cls.catalog or synthetic_catalog(), on_connect_callback)
+
+    async def connect(self) -> None:
+        """Like Smartbridge.connect(), the first call waits for the login, later ones restart the session and return at
+        once. The session keeps retrying while the bridge is offline."""
+        if self._login_completed is None:
+            self._login_completed = asyncio.get_running_loop().create_future()
+        await self.close()
+        self._session_task = asyncio.get_running_loop().create_task(self._open_session())
+        await self._login_completed
+
+    async def _open_session(self) -> None:
+        while self.offline:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(self.connect_latency)
+        if self._on_connect_callback:
+            self._on_connect_callback()
+        if not self._login_completed.done():
+            self._login_completed.set_result(None)
+
+    async def close(self) -> None:
+        if self._session_task and not self._session_task.done():
+            self._session_task.cancel()
+
+    def get_devices(self) -> dict[str, dict[str, Any]]:
+        return self.devices
+
+    def get_device_by_id(self, device_id: str) -> dict[str, Any]:
+        return self.devices[device_id]
+
+    def get_buttons(self) -> dict[str, dict[str, Any]]:
+        return self.buttons
+
+    def get_scenes(self) -> dict[str, dict[str, Any]]:
+        return self.scenes
+
+    def add_subscriber(self, device_id: str, callback: Callable[[], None]) -> None:
+        self._subscribers[device_id] = callback
+
+    def add_button_subscriber(self, button_id: str, callback: Callable[[str], None]) -> None:
+        self._button_subscribers[button_id] = callback
+
+    def add_occupancy_subscriber(self, occupancy_group_id: str, callback: Callable[[], None]) -> None:
+        self._occupancy_subscribers[occupancy_group_id] = callback
+
+    def add_smart_away_subscriber(self, callback: Callable[[str], None]) -> None:
+        self._smart_away_subscribers.append(callback)
+
+    # commands
+
+    async def _command(self) -> None:
+        self.commands_sent += 1
+        await asyncio.sleep(self.latency)
+
+    async def _request(self, communique_type: str, url: str, body: Optional[dict] = None) -> dict[str, Any]:
+        """Answers the health monitor's pings, unless the bridge is offline."""
+        await asyncio.sleep(3600 if self.offline else self.latency)
+        return {"CommuniqueType": f"{communique_type[:-len('Request')]}Response", "Header": {"StatusCode": "200 OK", "Url": url}}
+
+    async def set_value(self, device_id: str, value: int, fade_time: Any = None) -> None:
+        await self._command()
+        self.emit_device_event(device_id, value)
+
+    async def turn_on(self, device_id: str, **kwargs) -> None:
+        await self.set_value(device_id, 100)
+
+    async def turn_off(self, device_id: str, **kwargs) -> None:
+        await self.set_value(device_id, 0)
+
+    async def set_fan(self, device_id: str, value: str) -> None:
+        await self._command()
+        self.devices[device_id]["fan_speed"] = value
+        self._notify(device_id)
+
+    async def set_tilt(self, device_id: str, value: int) -> None:
+        await self._command()
+        self.devices[device_id]["tilt"] = value
+        self._notify(device_id)
+
+    async def set_warm_dim(self, device_id: str, enabled: bool, value: Optional[int] = None, fade_time: Any = None) -> None:
+        await self._command()
+
+    async def raise_cover(self, device_id: str) -> None:
+        await self._command()
+
+    async def lower_cover(self, device_id: str) -> None:
+        await self._command()
+
+    async def stop_cover(self, device_id: str) -> None:
+        await self._command()
+
+    async def activate_scene(self, scene_id: str) -> None:
+        await self._command()
+
+    async def tap_button(self, button_id: str) -> None:
+        await self._command()
+
+    async def get_battery_status(self, device_id: str) -> str:
+        await self._command()
+        return "Good"
+
+    async def get_smart_away_status(self) -> str:
+        await self._command()
+        return "Disabled"
+
+    async def activate_smart_away(self) -> None:
+        await self._command()
+
+    async def deactivate_smart_away(self) -> None:
+        await self._command()
+
+    # events, as if they came from the bridge
+
+    def _notify(self, device_id: str) -> None:
+        if callback := self._subscribers.get(device_id):
+            callback()
+
+    def emit_device_event(self, device_id: str, level: int) -> None:
+        self.devices[device_id]["current_state"] = level
+        self._notify(device_id)
+
+    def emit_button_event(self, button_id: str, event_type: str) -> None:
+        self.buttons[button_id]["current_state"] = event_type
+        if callback := self._button_subscribers.get(button_id):
+            callback(event_type)
+
+    def emit_occupancy_event(self, occupancy_group_id: str, status: str) -> None:
+        self.occupancy_groups[occupancy_group_id]["status"] = status
+        if callback := self._occupancy_subscribers.get(occupancy_group_id):
+            callback()
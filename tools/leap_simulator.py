@@ -0,0 +1,452 @@
+#! /usr/bin/env python
+"""A local LEAP bridge for load and reconnect testing, speaking enough of the Caseta Smart Bridge protocol for
+pylutron_caseta's Smartbridge to log in, load the catalog, subscribe, and send commands.
+
+    python tools/leap_simulator.py --ssl-prefix /tmp/leap/127.0.0.1/leapBridge --zone-rate 20 --drop-every 60
+
+The client certificate, key and CA are written to --ssl-prefix with the names the plugin's ssl_file_path() expects
+(leapBridge.key, leapBridge.crt, leapBridge-CA.crt), so the prefix can point into the plugin's Preferences folder for
+a bridge device whose address is this machine. Existing certificates are reused.
+
+The catalog is synthetic (--devices, --areas, ...) or loaded from a JSON file with the layout of the plugin's saved
+catalog snapshots (devices, buttons, scenes, areas, groups). Zone, button and occupancy events are generated at the
+given rates, and responses can be delayed, connections dropped, and commands rejected to exercise the error paths.
+
+--self-test SECONDS runs a real Smartbridge against the simulator in the same process and reports what it saw.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import re
+import ssl
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_smartbridge import synthetic_catalog     # noqa: E402
+
+LEAP_PORT = 8081
+COMMAND_TYPES = ("CreateRequest", "UpdateRequest")
+
+
+def generate_certificates(prefix: Path) -> None:
+    """A CA, a server certificate and a client certificate signed by it. The client side goes where the plugin looks
+    for a paired bridge's files, the server side next to it with -server/-CA.key suffixes."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    def write_key(key: Any, path: Path) -> None:
+        path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                           serialization.NoEncryption()))
+
+    def certificate(subject: str, key: Any, issuer: Optional[x509.Name], issuer_key: Any, ca: bool) -> x509.Certificate:
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, subject)])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        builder = (x509.CertificateBuilder().subject_name(name).issuer_name(issuer or name).public_key(key.public_key())
+                   .serial_number(x509.random_serial_number()).not_valid_before(now - datetime.timedelta(days=1))
+                   .not_valid_after(now + datetime.timedelta(days=3650))
+                   .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True))
+        if not ca:
+            builder = builder.add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        return builder.sign(issuer_key, hashes.SHA256())
+
+    prefix.parent.mkdir(parents=True, exist_ok=True)
+    ca_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ca_cert = certificate("LEAP Simulator CA", ca_key, None, ca_key, ca=True)
+    write_key(ca_key, Path(f"{prefix}-CA.key"))
+    Path(f"{prefix}-CA.crt").write_bytes(ca_cert.public_bytes(serialization.Encoding.PEM))
+    for suffix, subject in (("-server", "LEAP Simulator"), ("", "LEAP Simulator Client")):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        write_key(key, Path(f"{prefix}{suffix}.key"))
+        Path(f"{prefix}{suffix}.crt").write_bytes(certificate(subject, key, ca_cert.subject, ca_key, ca=False)
+                                                  .public_bytes(serialization.Encoding.PEM))
+
+
+def ensure_certificates(prefix: Path) -> None:
+    needed = [Path(f"{prefix}{suffix}") for suffix in (".key", ".crt", "-CA.crt", "-server.key", "-server.crt")]
+    if not all(path.exists() for path in needed):
+        generate_certificates(prefix)
+        print(f"certificates written to {prefix.parent}")
+
+
+def load_catalog(path: str) -> dict[str, dict[str, dict[str, Any]]]:
+    """A catalog from JSON, in the synthetic_catalog layout or the plugin's catalog snapshot layout."""
+    with open(path) as f:
+        data = json.load(f)
+    if "groups" in data and "occupancy_groups" not in data:
+        data["occupancy_groups"] = data.pop("groups")
+    return {key: data.get(key) or {} for key in ("devices", "buttons", "scenes", "areas", "occupancy_groups")}
+
+
+def href(kind: str, item_id: Any) -> dict[str, str]:
+    return {"href": f"/{kind}/{item_id}"}
+
+
+class SimulatedClient:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.subscriptions: dict[str, str] = {}     # url -> client tag
+        self.logged_in = False     # has loaded the catalog, so it can take zone events
+
+    def send(self, message: dict[str, Any]) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message).encode() + b"\r\n")
+
+
+class LeapSimulator:
+    def __init__(self, catalog: dict[str, dict[str, dict[str, Any]]], args: argparse.Namespace) -> None:
+        self.catalog = catalog
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.clients: set[SimulatedClient] = set()
+        self.accepting = True
+        self.smart_away = "Disabled"
+        self.stats: dict[str, int] = {"connections": 0, "requests": 0, "errors_injected": 0, "drops": 0, "events": 0}
+
+        self.zones = {device["zone"]: device for device in catalog["devices"].values() if device.get("zone") is not None}
+        button_groups = {group: device for device in catalog["devices"].values() for group in device.get("button_groups") or ()}
+        self.button_groups = {button_id: button.get("button_group") or next(
+            (group for group, device in button_groups.items() if device["device_id"] == button.get("parent_device")), None)
+                              for button_id, button in catalog["buttons"].items()}
+
+    # protocol
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if not self.accepting:
+            writer.transport.abort()
+            return
+        client = SimulatedClient(writer)
+        self.clients.add(client)
+        self.stats["connections"] += 1
+        try:
+            while line := await reader.readline():
+                asyncio.create_task(self.respond(client, json.loads(line)))
+        except (ConnectionError, ssl.SSLError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    async def respond(self, client: SimulatedClient, message: dict[str, Any]) -> None:
+        self.stats["requests"] += 1
+        if self.args.latency or self.args.jitter:
+            await asyncio.sleep((self.args.latency + self.rng.uniform(0, self.args.jitter)) / 1000.0)
+
+        communique_type, header = message.get("CommuniqueType", ""), message.get("Header", {})
+        url, tag = header.get("Url", ""), header.get("ClientTag")
+        response_type = communique_type.replace("Request", "Response")
+        if self.args.error_rate and (communique_type in COMMAND_TYPES or url.endswith("/status") and url.startswith("/device/")) \
+                and self.rng.random() < self.args.error_rate:
+            self.stats["errors_injected"] += 1
+            client.send({"CommuniqueType": response_type, "Header": {"StatusCode": "500 Internal Server Error", "Url": url, "ClientTag": tag}})
+            return
+
+        status, body_type, body, after = self.route(communique_type, url, message.get("Body") or {})
+        if status.startswith("2") and communique_type == "SubscribeRequest":
+            client.subscriptions[url] = tag
+            client.logged_in = True     # subscriptions come after the catalog is loaded
+        response_header = {"StatusCode": status, "Url": url, "ClientTag": tag}
+        if body_type:
+            response_header["MessageBodyType"] = body_type
+        response = {"CommuniqueType": response_type, "Header": response_header}
+        if body is not None:
+            response["Body"] = body
+        client.send(response)
+        if after:
+            after()
+
+    def route(self, communique_type: str, url: str, body: dict[str, Any]) -> tuple[str, Optional[str], Optional[dict], Any]:
+        """(status, MessageBodyType, Body, callable to run after the response is sent) for a request."""
+        catalog = self.catalog
+        if url == "/server/1/status/ping":
+            return "200 OK", "OnePingResponse", {"PingResponse": {"LEAPVersion": 1.115}}, None
+        if url == "/project":
+            return "200 OK", "OneProjectDefinition", {"Project": {"ProductType": "Lutron Smart Bridge Project"}}, None
+        if url == "/area":
+            return "200 OK", "MultipleAreaDefinition", {"Areas": [
+                {**href("area", area["id"]), "Name": area["name"], **({"Parent": href("area", area["parent_id"])} if area.get("parent_id") else {})}
+                for area in catalog["areas"].values()]}, None
+        if url == "/device":
+            return "200 OK", "MultipleDeviceDefinition", {"Devices": [self.device_definition(device) for device in catalog["devices"].values()]}, None
+        if url == "/button":
+            return "200 OK", "MultipleButtonDefinition", {"Buttons": [
+                {**href("button", button_id), "ButtonNumber": button.get("button_number", 0), "Parent": href("buttongroup", self.button_groups[button_id])}
+                for button_id, button in catalog["buttons"].items() if self.button_groups.get(button_id)]}, None
+        if url == "/virtualbutton":
+            return "200 OK", "MultipleVirtualButtonDefinition", {"VirtualButtons": [
+                {**href("virtualbutton", scene_id), "Name": scene["name"], "IsProgrammed": True} for scene_id, scene in catalog["scenes"].items()]}, None
+        if url == "/occupancygroup":
+            return "200 OK", "MultipleOccupancyGroupDefinition", {"OccupancyGroups": [
+                {**href("occupancygroup", group_id),
+                 "AssociatedSensors": [{"OccupancySensor": href("occupancysensor", sensor)} for sensor in group.get("sensors") or [f"{group_id}00"]],
+                 "AssociatedAreas": [{"Area": href("area", group["area"])}]}
+                for group_id, group in catalog["occupancy_groups"].items()]}, None
+        if url == "/occupancygroup/status":
+            return "200 OK", "MultipleOccupancyGroupStatus", self.occupancy_body(catalog["occupancy_groups"]), None
+        if url == "/system/away/1/status":
+            if communique_type == "UpdateRequest":
+                self.smart_away = body.get("AwayStatus", {}).get("EnabledState", self.smart_away)
+                return "200 OK", "OneAwayStatus", {"AwayStatus": {"EnabledState": self.smart_away}}, lambda: self.publish(
+                    url, "OneAwayStatus", {"AwayStatus": {"EnabledState": self.smart_away}})
+            return "200 OK", "OneAwayStatus", {"AwayStatus": {"EnabledState": self.smart_away}}, None
+
+        if match := re.fullmatch(r"/zone/(\w+)/status", url):
+            if (device := self.zones.get(match[1])) is None:
+                return "404 Not Found", None, None, None
+            return "200 OK", "OneZoneStatus", self.zone_body(device), None
+        if match := re.fullmatch(r"/zone/(\w+)/commandprocessor", url):
+            if (device := self.zones.get(match[1])) is None:
+                return "404 Not Found", None, None, None
+            self.apply_zone_command(device, body.get("Command", {}))
+            return "201 Created", None, None, lambda: self.broadcast_zone(device)
+        if match := re.fullmatch(r"/button/(\w+)/status/event", url):
+            if match[1] not in catalog["buttons"]:
+                return "404 Not Found", None, None, None
+            return "200 OK", "OneButtonStatusEvent", self.button_body(match[1], "Release"), None
+        if match := re.fullmatch(r"/button/(\w+)/commandprocessor", url):
+            return "201 Created", None, None, lambda: [self.button_event(match[1], event) for event in ("Press", "Release")]
+        if re.fullmatch(r"/virtualbutton/(\w+)/commandprocessor", url):
+            return "201 Created", None, None, None
+        if match := re.fullmatch(r"/device/(\w+)/status", url):
+            if match[1] not in catalog["devices"]:
+                return "404 Not Found", None, None, None
+            return "200 OK", "OneDeviceStatus", {"DeviceStatus": {"BatteryStatus": {"LevelState": "Good"}}}, None
+        return "404 Not Found", None, None, None
+
+    @staticmethod
+    def device_definition(device: dict[str, Any]) -> dict[str, Any]:
+        definition = {**href("device", device["device_id"]), "Name": device.get("device_name") or device["name"],
+                      "FullyQualifiedName": [device["name"]], "DeviceType": device["type"], "ModelNumber": device.get("model"),
+                      "SerialNumber": device.get("serial")}
+        if device.get("area"):
+            definition["AssociatedArea"] = href("area", device["area"])
+        if device.get("zone") is not None:
+            definition["LocalZones"] = [href("zone", device["zone"])]
+        if device.get("button_groups"):
+            definition["ButtonGroups"] = [href("buttongroup", group) for group in device["button_groups"]]
+        if device.get("occupancy_sensors"):
+            definition["OccupancySensors"] = [href("occupancysensor", sensor) for sensor in device["occupancy_sensors"]]
+        return definition
+
+    @staticmethod
+    def zone_body(device: dict[str, Any]) -> dict[str, Any]:
+        status: dict[str, Any] = {"Zone": href("zone", device["zone"]), "Level": max(0, device.get("current_state") or 0)}
+        if device.get("fan_speed") is not None:
+            status["FanSpeed"] = device["fan_speed"]
+        if device.get("tilt") is not None:
+            status["Tilt"] = device["tilt"]
+        return {"ZoneStatus": status}
+
+    def button_body(self, button_id: str, event_type: str) -> dict[str, Any]:
+        return {"ButtonStatus": {"Button": href("button", button_id), "ButtonEvent": {"EventType": event_type}}}
+
+    @staticmethod
+    def occupancy_body(groups: dict[str, dict[str, Any]]) -> dict[str, Any]:
+        return {"OccupancyGroupStatuses": [{"OccupancyGroup": href("occupancygroup", group_id), "OccupancyStatus": group.get("status") or "Unknown"}
+                                           for group_id, group in groups.items()]}
+
+    @staticmethod
+    def apply_zone_command(device: dict[str, Any], command: dict[str, Any]) -> None:
+        command_type = command.get("CommandType")
+        if command_type == "GoToLevel":
+            device["current_state"] = command["Parameter"][0]["Value"]
+        elif command_type in ("GoToDimmedLevel", "GoToWhiteTuningLevel", "GoToSpectrumTuningLevel"):
+            parameters = next((value for key, value in command.items() if key.endswith("Parameters")), {})
+            device["current_state"] = parameters.get("Level", device.get("current_state"))
+        elif command_type == "GoToFanSpeed":
+            device["fan_speed"] = command["FanSpeedParameters"]["FanSpeed"]
+        elif command_type == "GoToTilt":
+            device["tilt"] = command["TiltParameters"]["Tilt"]
+        elif command_type == "Raise":
+            device["current_state"] = 100
+        elif command_type == "Lower":
+            device["current_state"] = 0
+
+    # events
+
+    def broadcast_zone(self, device: dict[str, Any]) -> None:
+        """Zone changes reach every client as untagged OneZoneStatus responses, like a Caseta bridge sends them."""
+        self.stats["events"] += 1
+        message = {"CommuniqueType": "ReadResponse", "Header": {"StatusCode": "200 OK", "Url": f"/zone/{device['zone']}/status",
+                                                                "MessageBodyType": "OneZoneStatus"}, "Body": self.zone_body(device)}
+        for client in list(self.clients):
+            if client.logged_in:
+                client.send(message)
+
+    def publish(self, url: str, body_type: str, body: dict[str, Any]) -> None:
+        """Send an event to the clients subscribed to url, tagged with their subscription."""
+        self.stats["events"] += 1
+        for client in list(self.clients):
+            if tag := client.subscriptions.get(url):
+                client.send({"CommuniqueType": "ReadResponse",
+                             "Header": {"StatusCode": "200 OK", "Url": url, "MessageBodyType": body_type, "ClientTag": tag}, "Body": body})
+
+    def button_event(self, button_id: str, event_type: str) -> None:
+        self.publish(f"/button/{button_id}/status/event", "OneButtonStatusEvent", self.button_body(button_id, event_type))
+
+    async def generate(self, rate: float, emit: Any) -> None:
+        """Call emit() about rate times a second, with exponentially distributed gaps."""
+        while True:
+            await asyncio.sleep(self.rng.expovariate(rate))
+            if self.clients:
+                emit()
+
+    def random_zone_event(self) -> None:
+        device = self.zones[self.rng.choice(list(self.zones))]
+        device["current_state"] = self.rng.choice((0, 25, 50, 75, 100))
+        self.broadcast_zone(device)
+
+    def random_button_press(self) -> None:
+        button_id = self.rng.choice(list(self.catalog["buttons"]))
+        self.button_event(button_id, "Press")
+        asyncio.get_running_loop().call_later(0.1, self.button_event, button_id, "Release")
+
+    def random_occupancy_event(self) -> None:
+        group_id = self.rng.choice(list(self.catalog["occupancy_groups"]))
+        group = self.catalog["occupancy_groups"][group_id]
+        group["status"] = "Unoccupied" if group.get("status") == "Occupied" else "Occupied"
+        self.publish("/occupancygroup/status", "MultipleOccupancyGroupStatus", self.occupancy_body({group_id: group}))
+
+    async def drop_connections(self) -> None:
+        """Abort every connection every --drop-every seconds, optionally staying unreachable for --down-for seconds and
+        changing the catalog while the clients are away."""
+        while True:
+            await asyncio.sleep(self.args.drop_every)
+            self.stats["drops"] += 1
+            for client in list(self.clients):
+                client.writer.transport.abort()
+            if self.args.mutate_on_drop and self.zones:
+                device = self.zones[self.rng.choice(list(self.zones))]
+                device["current_state"] = 100 - max(0, device.get("current_state") or 0)
+                device["name"] = f"{device['name'].split(' (renamed')[0]} (renamed {self.stats['drops']})"
+            if self.args.down_for:
+                self.accepting = False
+                await asyncio.sleep(self.args.down_for)
+                self.accepting = True
+
+    async def serve(self, server_ssl: ssl.SSLContext) -> asyncio.AbstractServer:
+        if self.args.refuse_first:
+            self.accepting = False
+            asyncio.get_running_loop().call_later(self.args.refuse_first, setattr, self, "accepting", True)
+        server = await asyncio.start_server(self.handle_connection, self.args.host, self.args.port, ssl=server_ssl)
+        for rate, emit in ((self.args.zone_rate, self.random_zone_event), (self.args.button_rate, self.random_button_press),
+                           (self.args.occupancy_rate, self.random_occupancy_event)):
+            if rate > 0:
+                asyncio.create_task(self.generate(rate, emit))
+        if self.args.drop_every:
+            asyncio.create_task(self.drop_connections())
+        return server
+
+
+def server_context(prefix: Path) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_cert_chain(f"{prefix}-server.crt", f"{prefix}-server.key")
+    context.load_verify_locations(f"{prefix}-CA.crt")
+    context.verify_mode = ssl.CERT_REQUIRED
+    return context
+
+
+async def self_test(simulator: LeapSimulator, prefix: Path, seconds: float) -> None:
+    """Run a real Smartbridge against the simulator, sending commands and counting connects and events."""
+    from pylutron_caseta import BridgeDisconnectedError, BridgeResponseError
+    from pylutron_caseta.smartbridge import Smartbridge
+
+    counts = {"connects": 0, "zone_events": 0, "button_events": 0, "occupancy_events": 0, "commands": 0, "command_errors": 0}
+    latencies: list[float] = []
+    bridge = Smartbridge.create_tls(simulator.args.host, f"{prefix}.key", f"{prefix}.crt", f"{prefix}-CA.crt", port=simulator.args.port,
+                                    on_connect_callback=lambda: counts.__setitem__("connects", counts["connects"] + 1))
+    start = time.perf_counter()
+    await bridge.connect()
+    print(f"self-test: logged in after {time.perf_counter() - start:.2f}s, {len(bridge.devices)} devices, {len(bridge.buttons)} buttons")
+    for device_id in bridge.devices:
+        bridge.add_subscriber(device_id, lambda: counts.__setitem__("zone_events", counts["zone_events"] + 1))
+    for button_id in bridge.buttons:
+        bridge.add_button_subscriber(button_id, lambda _event: counts.__setitem__("button_events", counts["button_events"] + 1))
+    for group_id in bridge.occupancy_groups:
+        bridge.add_occupancy_subscriber(group_id, lambda: counts.__setitem__("occupancy_events", counts["occupancy_events"] + 1))
+
+    zones = [device_id for device_id, device in bridge.devices.items() if device.get("zone") and device_id != "1"]
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        counts["commands"] += 1
+        sent = time.perf_counter()
+        try:
+            await bridge.set_value(random.choice(zones), random.randint(0, 100))
+            latencies.append(time.perf_counter() - sent)
+        except (BridgeDisconnectedError, BridgeResponseError, asyncio.TimeoutError):
+            counts["command_errors"] += 1
+            await asyncio.sleep(0.5)
+        await asyncio.sleep(0.05)
+    await bridge.close()
+
+    latencies.sort()
+    if latencies:
+        counts["command_p50_ms"] = round(latencies[len(latencies) // 2] * 1000.0, 2)
+        counts["command_p99_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000.0, 2)
+    print(f"self-test client: {json.dumps(counts)}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    prefix = Path(args.ssl_prefix).expanduser()
+    ensure_certificates(prefix)
+    if args.catalog:
+        catalog = load_catalog(args.catalog)
+    else:
+        catalog = synthetic_catalog(devices=args.devices, buttons_per_keypad=args.buttons_per_keypad, areas=args.areas,
+                                    groups=args.groups, scenes=args.scenes, seed=args.seed)
+    simulator = LeapSimulator(catalog, args)
+    server = await simulator.serve(server_context(prefix))
+    print(f"LEAP simulator listening on {args.host}:{args.port}: {len(catalog['devices'])} devices, {len(catalog['buttons'])} buttons, "
+          f"{len(catalog['areas'])} areas, {len(catalog['occupancy_groups'])} occupancy groups")
+
+    async with server:
+        if args.self_test:
+            await self_test(simulator, prefix, args.self_test)
+            print(f"self-test simulator: {json.dumps(simulator.stats)}")
+            return
+        while True:
+            await asyncio.sleep(args.report_every)
+            print(f"{time.strftime('%H:%M:%S')} clients {len(simulator.clients)} {json.dumps(simulator.stats)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=LEAP_PORT)
+    parser.add_argument("--ssl-prefix", default="leap_simulator/127.0.0.1/leapBridge", help="path prefix of the certificate files")
+    parser.add_argument("--catalog", help="catalog JSON, e.g. a plugin catalog snapshot, instead of a synthetic one")
+    parser.add_argument("--devices", type=int, default=100, help="synthetic catalog: LEAP devices")
+    parser.add_argument("--buttons-per-keypad", type=int, default=5, help="synthetic catalog: buttons on each keypad")
+    parser.add_argument("--areas", type=int, default=20, help="synthetic catalog: areas")
+    parser.add_argument("--groups", type=int, default=10, help="synthetic catalog: occupancy groups")
+    parser.add_argument("--scenes", type=int, default=20, help="synthetic catalog: scenes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--zone-rate", type=float, default=0.0, help="zone level changes per second")
+    parser.add_argument("--button-rate", type=float, default=0.0, help="button presses per second")
+    parser.add_argument("--occupancy-rate", type=float, default=0.0, help="occupancy changes per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="ms before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many ms added to each response's latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of commands and device status reads rejected with a 500")
+    parser.add_argument("--drop-every", type=float, default=0.0, help="seconds between dropping every connection")
+    parser.add_argument("--down-for", type=float, default=0.0, help="seconds to refuse connections after each drop")
+    parser.add_argument("--mutate-on-drop", action="store_true", help="rename a device and change its level while clients are disconnected")
+    parser.add_argument("--refuse-first", type=float, default=0.0, help="seconds to refuse connections after starting")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between statistics lines")
+    parser.add_argument("--self-test", type=float, default=0.0, metavar="SECONDS", help="run a Smartbridge client against the simulator")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        pass